@@ -30,25 +30,64 @@ export const rejectRequest = (id) =>
 export const sendMessage = (payload) =>
   axios.post(`${API}/api/chat/send`, { ...payload, lang: getCurrentLang() }).then((r) => r.data);
 
-export const getChatHistory = (room) =>
-  axios.get(`${API}/api/chat/history`, { params: { room, lang: getCurrentLang() } }).then((r) => r.data);
+// since: last seen message seq; only newer messages are returned
+export const getChatHistory = (room, since) =>
+  axios
+    .get(`${API}/api/chat/history`, {
+      params: { room, lang: getCurrentLang(), ...(since ? { since } : {}) },
+    })
+    .then((r) => r.data);
 
 export const getUser = (id) =>
   axios.get(`${API}/api/user`, { params: { id, lang: getCurrentLang() } }).then((r) => r.data);
 
-// Translate text from English to current language
-export const translateText = async (text) => {
+// Server-side cap on strings per /api/translate/batch request
+const TRANSLATE_BATCH_LIMIT = 200;
+
+// Translate a list of strings from English to current language, in order
+export const translateMany = async (texts) => {
   const lang = getCurrentLang();
-  if (lang === 'en' || !text) return text;
-
-  try {
-    const response = await axios.post(`${API}/api/translate`, { text, lang });
-    return response.data.translated || text;
-  } catch (error) {
-    console.error('Translation error:', error);
-    return text;
-    return text;
+  if (lang === 'en' || !texts || texts.length === 0) return texts;
+
+  const results = [];
+  for (let i = 0; i < texts.length; i += TRANSLATE_BATCH_LIMIT) {
+    const chunk = texts.slice(i, i + TRANSLATE_BATCH_LIMIT);
+    try {
+      const response = await axios.post(`${API}/api/translate/batch`, { texts: chunk, lang });
+      results.push(...(response.data.translated || chunk));
+    } catch (error) {
+      console.error('Translation error:', error);
+      results.push(...chunk);
+    }
   }
+  return results;
+};
+
+// translateText calls made in the same tick are coalesced into one batch request
+const TRANSLATE_BATCH_DELAY_MS = 10;
+let pendingTranslations = [];
+let translateTimer = null;
+
+const flushTranslations = async () => {
+  translateTimer = null;
+  const pending = pendingTranslations;
+  pendingTranslations = [];
+
+  const translated = await translateMany(pending.map((p) => p.text));
+  pending.forEach((p, i) => p.resolve(translated[i] || p.text));
+};
+
+// Translate text from English to current language
+export const translateText = (text) => {
+  const lang = getCurrentLang();
+  if (lang === 'en' || !text) return Promise.resolve(text);
+
+  return new Promise((resolve) => {
+    pendingTranslations.push({ text, resolve });
+    if (!translateTimer) {
+      translateTimer = setTimeout(flushTranslations, TRANSLATE_BATCH_DELAY_MS);
+    }
+  });
 };
 
 export const predictDisease = (formData) =>
@@ -10,15 +10,32 @@ export default function BuyerSellerChat({ user, partnerId, partnerName, room, on
   const [messages, setMessages] = useState([]);
   const [inputText, setInputText] = useState("");
   const chatEndRef = useRef(null);
+  const lastSeqRef = useRef(0); // highest message seq received for this room
 
   // Strict check on room validity
   const isValidChat = room && partnerId && user && !room.includes("undefined");
 
+  // Append messages not seen yet, keeping seq order. Only history responses
+  // advance the cursor: a sent message can overtake one not fetched yet.
+  const mergeMessages = (incoming, advanceCursor = true) => {
+    if (!Array.isArray(incoming) || incoming.length === 0) return;
+    if (advanceCursor) {
+      lastSeqRef.current = Math.max(lastSeqRef.current, ...incoming.map((m) => m.seq || 0));
+    }
+    setMessages((prev) => {
+      const seen = new Set(prev.map((m) => m.id));
+      const fresh = incoming.filter((m) => !seen.has(m.id));
+      if (fresh.length === 0) return prev;
+      return [...prev, ...fresh].sort((a, b) => (a.seq || 0) - (b.seq || 0));
+    });
+  };
+
+  // Polls only ask for messages newer than the last one received
   const loadHistory = async () => {
     if (!isValidChat) return;
     try {
-      const history = await getChatHistory(room);
-      setMessages(history);
+      const history = await getChatHistory(room, lastSeqRef.current);
+      mergeMessages(history);
     } catch (error) {
       console.error("Failed to load chat history:", error);
     }
@@ -41,8 +58,9 @@ export default function BuyerSellerChat({ user, partnerId, partnerName, room, on
         room: room,
       };
 
-      await sendMessage(payload);
+      const res = await sendMessage(payload);
       setInputText("");
+      if (res?.msg) mergeMessages([res.msg], false);
       loadHistory();
     } catch (error) {
       console.error("Failed to send message:", error);
@@ -56,6 +74,9 @@ export default function BuyerSellerChat({ user, partnerId, partnerName, room, on
   };
 
   useEffect(() => {
+    // New room: start from the full history
+    lastSeqRef.current = 0;
+    setMessages([]);
     loadHistory();
     if (!isValidChat) return;
 
@@ -14,7 +14,7 @@ import {
   Legend,
 } from "recharts";
 
-import API, { getUser, getCurrentLang, translateText } from "../api.js";
+import API, { getUser, getCurrentLang, translateText, translateMany } from "../api.js";
 import { useTheme } from "../context/ThemeContext";
 
 const BASE_URL = API;
@@ -296,12 +296,12 @@ export default function Dashboard() {
   // Translate crop names when farmList or language changes
   React.useEffect(() => {
     const translateCrops = async () => {
+      const texts = [...new Set(farmList.map((item) => item.text).filter(Boolean))];
+      const translated = await translateMany(texts);
       const translations = {};
-      for (const item of farmList) {
-        if (item.text && !translations[item.text]) {
-          translations[item.text] = await translateText(item.text);
-        }
-      }
+      texts.forEach((text, i) => {
+        translations[text] = translated[i];
+      });
       setTranslatedCrops(translations);
     };
     if (farmList.length > 0) {
@@ -312,26 +312,23 @@ export default function Dashboard() {
   // Translate scheme states when schemes or language changes
   React.useEffect(() => {
     const translateSchemes = async () => {
-      const nameTranslations = {};
-      const stateTranslations = {};
-      const descTranslations = {};
-
-      for (const sch of schemes) {
-        // Translate scheme name
-        if (sch.scheme_name && !nameTranslations[sch.scheme_name]) {
-          nameTranslations[sch.scheme_name] = await translateText(sch.scheme_name);
-        }
-
-        // Translate state ministry
-        if (sch.state_ministry && !stateTranslations[sch.state_ministry]) {
-          stateTranslations[sch.state_ministry] = await translateText(sch.state_ministry);
-        }
-
-        // Translate description
-        if (sch.description && !descTranslations[sch.description]) {
-          descTranslations[sch.description] = await translateText(sch.description);
-        }
-      }
+      const unique = (key) => [...new Set(schemes.map((sch) => sch[key]).filter(Boolean))];
+      const names = unique("scheme_name");
+      const states = unique("state_ministry");
+      const descs = unique("description");
+
+      // One batch request for every name, state and description on the page
+      const translated = await translateMany([...names, ...states, ...descs]);
+      const toMap = (texts, offset) => {
+        const map = {};
+        texts.forEach((text, i) => {
+          map[text] = translated[offset + i];
+        });
+        return map;
+      };
+      const nameTranslations = toMap(names, 0);
+      const stateTranslations = toMap(states, names.length);
+      const descTranslations = toMap(descs, names.length + states.length);
 
       setTranslatedSchemeNames(nameTranslations);
       setTranslatedSchemeDetails(stateTranslations);
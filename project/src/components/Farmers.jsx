@@ -7,6 +7,8 @@ import { FaStar, FaCalendarAlt, FaBullseye, FaPhone, FaMapMarkerAlt, FaHandshake
 import "../style/Farmers.css";
 import { useTranslation } from "react-i18next";
 
+const RECOMMEND_PAGE_SIZE = 20;
+
 export default function Farmer() {
   const { t, i18n } = useTranslation();
   const [crop, setCrop] = useState("");
@@ -14,6 +16,8 @@ export default function Farmer() {
   const [sellers, setSellers] = useState([]);
   const [translatedSellers, setTranslatedSellers] = useState([]);
   const [loading, setLoading] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [acceptedDeals, setAcceptedDeals] = useState([]);
   const [currentChatDeal, setCurrentChatDeal] = useState(null);
   const [showChatList, setShowChatList] = useState(false); // Toggle for chat list
@@ -26,13 +30,15 @@ export default function Farmer() {
 
     setLoading(true);
     setSellers([]); // Clear previous results immediately
+    setNextCursor(null);
 
     try {
-      const data = await recommend({ crop, region });
+      const data = await recommend({ crop, region, limit: RECOMMEND_PAGE_SIZE });
 
       // Simulate network delay for effect
       setTimeout(() => {
-        setSellers(Array.isArray(data) ? data : []);
+        setSellers(Array.isArray(data?.results) ? data.results : []);
+        setNextCursor(data?.next_cursor || null);
         setLoading(false);
       }, 1500);
 
@@ -42,6 +48,20 @@ export default function Farmer() {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const data = await recommend({ crop, region, limit: RECOMMEND_PAGE_SIZE, cursor: nextCursor });
+      setSellers((prev) => [...prev, ...(Array.isArray(data?.results) ? data.results : [])]);
+      setNextCursor(data?.next_cursor || null);
+    } catch (e) {
+      toast.error(t("farmers.loadFailed") || "Could not load more results");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const sendReq = async (s) => {
     const price = prompt(t("farmers.enterPrice"));
     if (!price || isNaN(price)) return toast.error(t("farmers.invalidPrice"));
@@ -268,6 +288,14 @@ export default function Farmer() {
         ))}
       </div>
 
+      {nextCursor && !loading && (
+        <div style={{ textAlign: 'center', margin: '20px 0' }}>
+          <button className="hero-search-btn" onClick={loadMore} disabled={loadingMore}>
+            {loadingMore ? (t("farmers.loading") || "Loading results...") : (t("farmers.loadMore") || "Load more")}
+          </button>
+        </div>
+      )}
+
       {/* FLOATING CHAT BUBBLE */}
       <div className="floating-chat-container">
 
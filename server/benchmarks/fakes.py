@@ -0,0 +1,213 @@
+"""
+Offline stand-ins used by the benchmark harnesses.
+
+FakeChatGroq mimics the parts of langchain_groq.ChatGroq that the pipeline
+uses (invoke -> message with .content and token usage) and sleeps for a
+configurable latency instead of calling Groq. HashingEncoder mimics the
+SentenceTransformer.encode API with deterministic hashed bag-of-words
+vectors, so a synthetic FAISS store can be built without downloading a model.
+"""
+import hashlib
+import random
+import re
+import threading
+import time
+
+import numpy as np
+
+AGRI_WORDS = [
+    "rice", "wheat", "maize", "paddy", "jute", "potato", "tomato", "onion", "mustard", "tea",
+    "soil", "nitrogen", "phosphorus", "potassium", "urea", "compost", "manure", "irrigation",
+    "drip", "rainfall", "monsoon", "kharif", "rabi", "seed", "sowing", "harvest", "yield",
+    "pest", "blight", "rust", "aphid", "fungicide", "insecticide", "scheme", "subsidy",
+    "insurance", "credit", "market", "price", "storage", "livestock", "dairy", "poultry",
+]
+
+FILLER_WORDS = [
+    "the", "of", "and", "for", "in", "with", "during", "after", "before", "per", "acre",
+    "hectare", "farmers", "should", "apply", "recommended", "season", "district", "state",
+]
+
+SAMPLE_QUERIES = [
+    "How much urea should I apply to paddy per acre?",
+    "What is the best time for sowing wheat in rabi season?",
+    "How do I control late blight in potato?",
+    "Which scheme gives subsidy for drip irrigation?",
+    "What causes yellow leaves in tomato plants?",
+    "How can I improve soil nitrogen organically?",
+    "Is crop insurance available for jute farmers?",
+    "What is the market price trend for onion after monsoon?",
+    "How to store harvested maize safely?",
+    "How many liters of milk does a dairy cow give?",
+    "Who won the cricket match yesterday?",
+    "Tell me a good movie to watch tonight",
+]
+
+# (Hindi query, English translation) pairs for the multilingual benchmarks
+SAMPLE_QUERIES_HI = [
+    ("धान में प्रति एकड़ कितना यूरिया डालना चाहिए?", "How much urea should I apply to paddy per acre?"),
+    ("रबी मौसम में गेहूं की बुवाई का सबसे अच्छा समय क्या है?", "What is the best time for sowing wheat in rabi season?"),
+    ("आलू में पछेती झुलसा रोग को कैसे नियंत्रित करें?", "How do I control late blight in potato?"),
+    ("ड्रिप सिंचाई के लिए कौन सी योजना सब्सिडी देती है?", "Which scheme gives subsidy for drip irrigation?"),
+    ("टमाटर के पौधों की पत्तियां पीली क्यों होती हैं?", "What causes yellow leaves in tomato plants?"),
+    ("मिट्टी में नाइट्रोजन जैविक तरीके से कैसे बढ़ाएं?", "How can I improve soil nitrogen organically?"),
+]
+
+
+def synthetic_texts(n: int, words_per_text: int = 120, seed: int = 0) -> list:
+    """Generate n pseudo-agricultural text chunks."""
+    rng = random.Random(seed)
+    texts = []
+    for i in range(n):
+        words = [
+            rng.choice(AGRI_WORDS) if rng.random() < 0.35 else rng.choice(FILLER_WORDS)
+            for _ in range(words_per_text)
+        ]
+        texts.append(f"Document {i}. " + " ".join(words) + ".")
+    return texts
+
+
+class HashingEncoder:
+    """Deterministic bag-of-words encoder with the SentenceTransformer.encode signature."""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _vector(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for tok in re.findall(r"\w+", str(text).lower()):
+            h = int(hashlib.md5(tok.encode("utf-8")).hexdigest()[:8], 16)
+            vec[h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else vec
+
+    def encode(self, sentences, convert_to_tensor: bool = False, show_progress_bar: bool = False, **kwargs):
+        single = isinstance(sentences, str)
+        items = [sentences] if single else list(sentences)
+        out = np.stack([self._vector(t) for t in items]) if items else np.zeros((0, self.dim), dtype=np.float32)
+        if convert_to_tensor:
+            import torch
+            out = torch.from_numpy(out)
+        return out[0] if single else out
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+
+class FakeMessage:
+    def __init__(self, content: str, input_tokens: int, output_tokens: int):
+        self.content = content
+        self.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        self.response_metadata = {}
+
+
+class FakeChatGroq:
+    """
+    ChatGroq stand-in with a log-normal latency distribution.
+
+    Args:
+        latency_ms: median latency of one call
+        jitter: sigma of the log-normal distribution (0 = constant latency)
+        response_words: words in a generated answer
+        classify_answer: reply to YES/NO classification prompts
+        seed: RNG seed for reproducible runs
+    """
+
+    def __init__(self, latency_ms: float = 400.0, jitter: float = 0.3, response_words: int = 60,
+                 classify_answer: str = "YES", seed: int = 0, model_name: str = "fake-llm"):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.response_words = response_words
+        self.classify_answer = classify_answer
+        self.model_name = model_name
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.classify_calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    @staticmethod
+    def _prompt_text(messages) -> str:
+        if isinstance(messages, str):
+            return messages
+        parts = []
+        for m in messages:
+            parts.append(m if isinstance(m, str) else getattr(m, "content", str(m)))
+        return "\n".join(parts)
+
+    def _sample_latency(self) -> float:
+        with self._lock:
+            if self.jitter > 0:
+                return self.latency_ms * self._rng.lognormvariate(0.0, self.jitter) / 1000.0
+            return self.latency_ms / 1000.0
+
+    def invoke(self, messages, **kwargs):
+        prompt = self._prompt_text(messages)
+        time.sleep(self._sample_latency())
+
+        if "YES or NO" in prompt:
+            content = self.classify_answer
+        elif prompt.startswith("Translate the following text"):
+            content = prompt.split(":", 1)[-1].strip()
+        else:
+            with self._lock:
+                words = [self._rng.choice(AGRI_WORDS + FILLER_WORDS) for _ in range(self.response_words)]
+            content = " ".join(words).capitalize() + "."
+
+        # Rough token estimate: ~0.75 words per token
+        in_tok = int(len(prompt.split()) / 0.75)
+        out_tok = int(len(content.split()) / 0.75)
+        with self._lock:
+            self.calls += 1
+            if "YES or NO" in prompt:
+                self.classify_calls += 1
+            self.input_tokens += in_tok
+            self.output_tokens += out_tok
+        return FakeMessage(content, in_tok, out_tok)
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+            self.classify_calls = 0
+            self.input_tokens = 0
+            self.output_tokens = 0
+
+
+class FakeTranslator:
+    """
+    Stand-in for the Google translation helpers with a fixed latency.
+    Known sample queries translate to their English pair; anything else is
+    tagged with the target language so it never equals its input.
+    """
+
+    def __init__(self, latency_ms: float = 150.0):
+        self.latency_ms = latency_ms
+        self._to_en = {hi: en for hi, en in SAMPLE_QUERIES_HI}
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _hit(self):
+        time.sleep(self.latency_ms / 1000.0)
+        with self._lock:
+            self.calls += 1
+
+    def translate_to_english(self, text: str, source_lang: str) -> str:
+        if not text or source_lang == "en":
+            return text
+        self._hit()
+        return self._to_en.get(text, f"[en] {text}")
+
+    def translate_from_english(self, text: str, target_lang: str) -> str:
+        if not text or target_lang == "en":
+            return text
+        self._hit()
+        return f"[{target_lang}] {text}"
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
@@ -0,0 +1,54 @@
+"""
+Compare the two /chatbot modes for non-English users.
+
+"translate" translates the query to English, runs RAG and translates the
+answer back (with LLM fallbacks); "multilingual" retrieves on the native
+query and has the final prompt answer in the user's language. Both runs use
+the fake LLM and fake translator from benchmarks.fakes.
+
+The agriculture gate stays on: translate mode classifies the English
+translation (mostly caught by the English keyword check), while
+multilingual mode classifies native-script text with the multilingual
+model's thresholds, falling back to an LLM call when they are not
+configured. classify_llm_calls_per_request reports that cost separately.
+The classification cache is cleared per request because the sample
+queries repeat and real ones rarely do.
+
+Usage (from the server directory):
+    python -m benchmarks.multilingual_benchmark --requests 60 --lang hi
+    python -m benchmarks.multilingual_benchmark --class-cache    # keep the classification cache
+"""
+import json
+import sys
+
+from benchmarks.rag_benchmark import parse_args, run
+
+COLUMNS = [
+    "p50_ms", "p95_ms", "p99_ms", "throughput_rps",
+    "llm_calls_per_request", "classify_llm_calls_per_request", "translation_calls_per_request",
+    "llm_input_tokens_per_request",
+]
+
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    if "--lang" not in argv:
+        argv += ["--lang", "hi"]
+    if "--class-cache" in argv:
+        argv.remove("--class-cache")
+    elif "--no-class-cache" not in argv:
+        argv.append("--no-class-cache")
+    base = parse_args(argv + ["--target", "route"])
+
+    reports = {}
+    for mode in ("translate", "multilingual"):
+        base.mode = mode
+        reports[mode] = run(base)
+
+    if base.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        print(f"\n=== /chatbot modes, lang={base.lang}, {base.requests} requests ===")
+        print(f"{'metric':>32} {'translate':>12} {'multilingual':>14}")
+        for col in COLUMNS:
+            print(f"{col:>32} {reports['translate'][col]:>12} {reports['multilingual'][col]:>14}")
@@ -0,0 +1,239 @@
+"""
+Offline end-to-end benchmark for the RAG chatbot.
+
+Drives RAGSearch directly (--target rag) or the Flask /chatbot route through
+the test client (--target route) against a synthetic FAISS store and a fake
+Groq LLM, so pipeline changes can be measured without any network access.
+
+Usage (from the server directory):
+    python -m benchmarks.rag_benchmark --requests 200 --concurrency 8 --docs 5000
+    python -m benchmarks.rag_benchmark --target route --llm-latency-ms 600 --json
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.fakes import (
+    FakeChatGroq, FakeTranslator, HashingEncoder, SAMPLE_QUERIES, SAMPLE_QUERIES_HI, synthetic_texts,
+)
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def build_encoder(name: str, dim: int):
+    if name == "hashing":
+        return HashingEncoder(dim)
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(name)
+
+
+def build_synthetic_store(encoder, num_docs: int, seed: int = 0, digests: bool = False):
+    from src.vectorstore import FaissVectorStore
+
+    texts = synthetic_texts(num_docs, seed=seed)
+    store = FaissVectorStore(tempfile.mkdtemp(prefix="bench_faiss_"), model=encoder)
+    start = time.perf_counter()
+    embeddings = np.asarray(encoder.encode(texts), dtype="float32")
+    store.add_embeddings(embeddings, [{"text": t} for t in texts])
+    if digests:
+        from src.digests import ExtractiveSummarizer, build_digests
+        store.digests = build_digests(texts, ExtractiveSummarizer())
+    print(f"[INFO] Synthetic store: {num_docs} docs built in {time.perf_counter() - start:.2f}s")
+    return store
+
+
+def build_rag(args, llm):
+    from src.search import RAGSearch
+
+    encoder = build_encoder(args.encoder, args.dim)
+    store = build_synthetic_store(encoder, args.docs, seed=args.seed, digests=args.digests)
+    llm_cache = False
+    if args.llm_cache:
+        from src.llm_cache import LLMResponseCache
+        llm_cache = LLMResponseCache(os.path.join(tempfile.mkdtemp(prefix="bench_llm_cache_"), "cache.sqlite3"))
+    # Thresholds follow the classifier model of the mode, as in server.py
+    classifier_name = "all-MiniLM-L6-v2"
+    if args.target == "route" and args.mode == "multilingual":
+        from src.encoder import MULTILINGUAL_EMBEDDING_MODEL
+        classifier_name = MULTILINGUAL_EMBEDDING_MODEL
+    rag = RAGSearch(vector_store=store, llm=llm, classifier_model=encoder, llm_cache=llm_cache,
+                    embedding_classifier_name=classifier_name)
+    if args.accept_all:
+        # Skip the intent gate so every query exercises retrieval and generation
+        rag.high_threshold = -1.0
+    return rag
+
+
+def make_rag_caller(rag, args):
+    def call(query):
+        if args.no_class_cache:
+            rag.class_cache.clear()
+        rag.search_and_summarize(query, top_k=args.top_k)
+    return call
+
+
+def make_route_caller(rag, args, translator=None):
+    import server
+    import src.search
+
+    server.rag = rag
+    server.CHATBOT_MODE = args.mode
+    if translator is not None:
+        server.translate_to_english = translator.translate_to_english
+        server.translate_from_english = translator.translate_from_english
+        src.search.translate_from_english = translator.translate_from_english
+    local = threading.local()
+
+    def call(query):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = server.app.test_client()
+        if args.no_class_cache:
+            rag.class_cache.clear()
+        resp = client.post("/chatbot", json={"message": query, "lang": args.lang})
+        if resp.status_code != 200:
+            raise RuntimeError(f"/chatbot returned {resp.status_code}: {resp.get_data(as_text=True)[:200]}")
+    return call
+
+
+def run(args) -> dict:
+    from src.tracing import TRACE_COLLECTOR
+
+    llm = FakeChatGroq(
+        latency_ms=args.llm_latency_ms,
+        jitter=args.llm_jitter,
+        response_words=args.response_words,
+        classify_answer=args.classify_answer,
+        seed=args.seed,
+    )
+    rag = build_rag(args, llm)
+    translator = None
+    if args.target == "route" and args.lang != "en" and not args.live_translate:
+        translator = FakeTranslator(args.translate_latency_ms)
+    if args.target == "route":
+        call = make_route_caller(rag, args, translator)
+    else:
+        call = make_rag_caller(rag, args)
+
+    pool_queries = [hi for hi, _ in SAMPLE_QUERIES_HI] if args.lang != "en" else SAMPLE_QUERIES
+    queries = [pool_queries[i % len(pool_queries)] for i in range(args.requests)]
+
+    for q in queries[:args.warmup]:
+        call(q)
+    llm.reset()
+    if translator is not None:
+        translator.reset()
+    TRACE_COLLECTOR.clear()
+
+    latencies, errors = [], 0
+    lat_lock = threading.Lock()
+
+    def timed(q):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            call(q)
+        except Exception as e:
+            print(f"[WARN] Request failed: {e}")
+            with lat_lock:
+                errors += 1
+            return
+        elapsed = time.perf_counter() - start
+        with lat_lock:
+            latencies.append(elapsed)
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(timed, queries))
+    wall = time.perf_counter() - wall_start
+
+    lat_ms = np.array(latencies) * 1000.0 if latencies else np.zeros(1)
+    return {
+        "target": args.target,
+        "mode": args.mode if args.target == "route" else "rag",
+        "lang": args.lang,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "docs": args.docs,
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 3) if wall > 0 else 0.0,
+        "p50_ms": round(float(np.percentile(lat_ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(lat_ms, 95)), 2),
+        "p99_ms": round(float(np.percentile(lat_ms, 99)), 2),
+        "llm_calls_per_request": round(llm.calls / max(args.requests, 1), 3),
+        # Agriculture YES/NO classification calls (included in llm_calls_per_request)
+        "classify_llm_calls_per_request": round(llm.classify_calls / max(args.requests, 1), 3),
+        "llm_input_tokens_per_request": round(llm.input_tokens / max(args.requests, 1), 1),
+        "translation_calls_per_request": round(translator.calls / max(args.requests, 1), 3) if translator else 0.0,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "stages": TRACE_COLLECTOR.stage_summary(),
+    }
+
+
+def print_report(report: dict):
+    print("\n=== RAG benchmark ===")
+    for key, value in report.items():
+        if key != "stages":
+            print(f"{key:>30}: {value}")
+    print("\n--- per-stage latency (ms) ---")
+    for name, st in sorted(report["stages"].items(), key=lambda kv: -kv[1]["total_ms"]):
+        print(f"{name:>30}: count={st['count']:<6} mean={st['mean_ms']:<10} max={st['max_ms']}")
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Offline RAG chatbot benchmark with a fake LLM")
+    p.add_argument("--target", choices=["rag", "route"], default="rag")
+    p.add_argument("--requests", type=int, default=100)
+    p.add_argument("--concurrency", type=int, default=4)
+    p.add_argument("--warmup", type=int, default=2)
+    p.add_argument("--docs", type=int, default=2000, help="synthetic FAISS store size")
+    p.add_argument("--dim", type=int, default=384, help="embedding size for the hashing encoder")
+    p.add_argument("--encoder", default="hashing",
+                   help="'hashing' (offline) or a SentenceTransformer model name")
+    p.add_argument("--top-k", type=int, default=5)
+    p.add_argument("--llm-latency-ms", type=float, default=400.0)
+    p.add_argument("--llm-jitter", type=float, default=0.3, help="log-normal sigma")
+    p.add_argument("--response-words", type=int, default=60)
+    p.add_argument("--classify-answer", default="YES")
+    p.add_argument("--no-class-cache", action="store_true",
+                   help="clear the classification cache before every request")
+    p.add_argument("--llm-cache", action="store_true",
+                   help="enable the persistent LLM response cache (fresh temp database)")
+    p.add_argument("--digests", action="store_true",
+                   help="precompute extractive chunk digests for the synthetic store")
+    p.add_argument("--accept-all", action="store_true",
+                   help="treat every query as agricultural (useful with the hashing encoder)")
+    p.add_argument("--lang", default="en",
+                   help="language sent to /chatbot (route target); non-English sends Hindi sample queries")
+    p.add_argument("--mode", choices=["translate", "multilingual"], default="translate",
+                   help="CHATBOT_MODE for the route target")
+    p.add_argument("--translate-latency-ms", type=float, default=150.0,
+                   help="latency of the fake translator used for non-English route runs")
+    p.add_argument("--live-translate", action="store_true",
+                   help="use the real translation backend instead of the fake one")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--json", action="store_true", help="print the report as JSON")
+    return p.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = run(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
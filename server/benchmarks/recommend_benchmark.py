@@ -0,0 +1,269 @@
+"""
+Offline benchmark for the marketplace recommender (/api/recommend scoring).
+
+Builds a SellerIndex over synthetic sellers (no MongoDB needed) and times
+the per-request work: BM25 scoring plus either the vectorized column scoring
+(src/recommender.py) or the original per-dict Python loops, kept here as the
+baseline.
+
+Seller commodities are free text like the FPC registries: aliases, plurals,
+compound entries ("Paddy and Vegetable") and misspellings. For every query
+the benchmark checks that the commodity index selects every seller the
+baseline substring filter selects; any seller it misses is reported and
+the run exits with status 1. Where both select the same sellers it also
+checks that they rank them with the same scores (using columns without the
+district proximity matrix, since the loops only know name matching).
+
+Usage (from the server directory):
+    python -m benchmarks.recommend_benchmark --sellers 100000 --requests 50
+    python -m benchmarks.recommend_benchmark --sellers 20000 --top-k 20 --json
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+import numpy as np
+
+from src.commodities import parse_commodities
+from src.district_proximity import DistrictProximity
+from src.recommender import SellerColumns, rank_sellers
+from src.seller_index import SellerIndex, preprocess_text_for_bm25
+
+DISTRICTS = [
+    "Alipurduar", "Jalpaiguri", "Cooch Behar", "Darjeeling", "Malda", "Murshidabad", "Nadia",
+    "Hooghly", "Bankura", "Purulia", "Birbhum", "Howrah", "Paschim Medinipur", "Purba Medinipur",
+    "Uttar Dinajpur", "Dakshin Dinajpur", "North 24 Parganas", "South 24 Parganas", "Kalimpong",
+]
+# Commodity cells as typed in the registries (see data/FPC_sample_alipurduar.csv)
+COMMODITIES = [
+    "Rice", "Paddy", "Wheat", "Maize", "Corn", "Jute", "Potato", "Potatoes", "Aloo", "Tomato",
+    "Onion", "Mustard", "Tea", "Pineapple", "Mango", "Banana", "Ginger", "Turmeric", "Masoor",
+    "Vegetables", "Vegetable", "Fish", "Milk", "Dairy Products", "Honey", "Chili", "Green Chilly",
+    "Paddy and Vegetable", "Paddy, Potato, Medicinal Plant and Vegetables", "Nolen gur and Scented rice",
+    "Basumoti Rice Cultivation", "Sale Vegetables", "Processed Vegetables", "Processed Pulse",
+    "Potato/Onion", "Jute & Mustard", "Ground Nut", "Jaggery", "Seeds, Fertilizer",
+    "Patato", "Pototo", "Mustad", "Growing of crops; market gardening; horticulture",
+]
+QUERIES = [
+    ("rice", "Malda"), ("potato, onion", "Hooghly"), ("tea", "Darjeeling"), ("jute", "Nadia"),
+    ("mango", "Malda"), ("", "Bankura"), ("pineapple, ginger", "Jalpaiguri"), ("fish", ""),
+    ("paddy", "Alipurduar"), ("vegetables", "Cooch Behar"), ("vegetable, honey", "Nadia"),
+    ("chili", "Malda"), ("mustard", "Birbhum"), ("gur", ""), ("pulse", "Bankura"),
+]
+
+
+class _NoCollection:
+    def find(self, *args, **kwargs):
+        return []
+
+
+def synthetic_sellers(n: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    users = []
+    for i in range(n):
+        district = rng.choice(DISTRICTS)
+        users.append({
+            "_id": f"seller{i}",
+            "role": "seller",
+            "fpcName": f"{rng.choice(DISTRICTS)} {rng.choice(['Agro', 'Krishi', 'Farmers'])} Producer Company {i}",
+            "district": district,
+            "address": f"Block {rng.randint(1, 30)}, {district}",
+            "commodities": rng.sample(COMMODITIES, rng.randint(1, 4)),
+            "rating": round(rng.uniform(2.5, 5.0), 1),
+            "experience": rng.randint(1, 25),
+        })
+    return users
+
+
+# ---- baseline: the original per-dict scoring loops ----
+
+def _district_similarity_score(farmer_district, seller_district):
+    farmer_district = str(farmer_district or "").lower().strip()
+    seller_district = str(seller_district or "").lower().strip()
+    if not farmer_district or not seller_district:
+        return 0.3
+    if farmer_district == seller_district:
+        return 1.0
+    if farmer_district in seller_district or seller_district in farmer_district:
+        return 0.7
+    return 0.3
+
+
+def _commodity_match_score(query_crops, seller_commodities):
+    query_crops = [c.strip().lower() for c in str(query_crops or "").split(",") if c.strip()]
+    seller_commodities = str(seller_commodities or "").lower()
+    if not query_crops:
+        return 0.5
+    matches = sum(1 for crop in query_crops if crop in seller_commodities)
+    return min(matches / len(query_crops), 1.0)
+
+
+def _normalize_value(val, min_val, max_val):
+    if max_val == min_val:
+        return 0.5
+    return (val - min_val) / (max_val - min_val)
+
+
+def loop_rank(all_sellers, crop_input, district_input, bm25_scores):
+    crop_keywords = [c.strip().lower() for c in crop_input.split(",") if c.strip()]
+    if crop_keywords:
+        matched = [dict(s) for s in all_sellers
+                   if any(crop in str(s.get("commodities", "")).lower() for crop in crop_keywords)]
+    else:
+        matched = [dict(s) for s in all_sellers]
+    if not matched:
+        return []
+
+    for s in matched:
+        s["bm25_score"] = bm25_scores.get(s["_id"], 0.0)
+        s["district_score"] = _district_similarity_score(district_input, s.get("district", ""))
+        s["commodity_score"] = _commodity_match_score(crop_input, s.get("commodities", ""))
+
+    ratings = [s["rating"] for s in matched]
+    experiences = [s["years_of_experience"] for s in matched]
+    max_b = max(s["bm25_score"] for s in matched) or 1.0
+    min_r, max_r = min(ratings), max(ratings)
+    min_e, max_e = min(experiences), max(experiences)
+
+    for s in matched:
+        s["final_score"] = (
+            _normalize_value(s["rating"], min_r, max_r) * 0.40 +
+            s["district_score"] * 0.25 +
+            s["commodity_score"] * 0.20 +
+            _normalize_value(s["years_of_experience"], min_e, max_e) * 0.10 +
+            s["bm25_score"] / max_b * 0.05
+        )
+    matched.sort(key=lambda x: x["final_score"], reverse=True)
+    return matched
+
+
+# ---- harness ----
+
+def _percentiles(samples_ms: list) -> dict:
+    arr = np.array(samples_ms)
+    return {
+        "p50_ms": round(float(np.percentile(arr, 50)), 3),
+        "p95_ms": round(float(np.percentile(arr, 95)), 3),
+        "mean_ms": round(float(arr.mean()), 3),
+    }
+
+
+def baseline_rows(sellers: list, crop_input: str) -> set:
+    """Rows the original substring filter keeps (loop_rank's first step)."""
+    crop_keywords = [c.strip().lower() for c in crop_input.split(",") if c.strip()]
+    if not crop_keywords:
+        return set(range(len(sellers)))
+    return {i for i, s in enumerate(sellers)
+            if any(crop in str(s.get("commodities", "")).lower() for crop in crop_keywords)}
+
+
+def index_rows(columns: SellerColumns, crop_input: str) -> set:
+    crops = parse_commodities(crop_input)
+    if not crops:
+        return set(range(len(columns)))
+    rows, _ = columns.commodity_index.match(crops, "any")
+    return set(rows.tolist())
+
+
+def run(args) -> dict:
+    t0 = time.perf_counter()
+    index = SellerIndex(_NoCollection(), use_change_stream=False)
+    for user in synthetic_sellers(args.sellers, args.seed):
+        index.upsert(user)
+    index._loaded = True
+    build_index_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    columns = index.columns()
+    build_columns_s = time.perf_counter() - t0
+    sellers = index.sellers()
+    name_match_columns = SellerColumns(sellers, proximity=DistrictProximity.empty())
+
+    # Recall against the substring baseline, once per distinct query
+    missed, extra, same_selection = {}, {}, set()
+    for crop, _ in QUERIES:
+        base, indexed = baseline_rows(sellers, crop), index_rows(name_match_columns, crop)
+        if base - indexed:
+            missed[crop] = len(base - indexed)
+        extra[crop] = len(indexed - base)
+        if base == indexed:
+            same_selection.add(crop)
+
+    bm25_ms, vector_ms, loop_ms = [], [], []
+    mismatches = compared = 0
+    for i in range(args.requests):
+        crop, district = QUERIES[i % len(QUERIES)]
+        tokens = preprocess_text_for_bm25(f"{crop} {district}")
+
+        t = time.perf_counter()
+        scores = index.bm25_scores(tokens)
+        bm25_ms.append((time.perf_counter() - t) * 1000)
+
+        t = time.perf_counter()
+        rows, final = rank_sellers(columns, crop, district, scores, top_k=args.top_k)
+        vector_ms.append((time.perf_counter() - t) * 1000)
+
+        if not args.skip_baseline:
+            t = time.perf_counter()
+            ranked = loop_rank(sellers, crop, district, scores)
+            loop_ms.append((time.perf_counter() - t) * 1000)
+            if crop in same_selection:
+                compared += 1
+                rows, final = rank_sellers(name_match_columns, crop, district, scores, top_k=args.top_k)
+                k = min(args.top_k or 10, len(ranked), len(rows))
+                if not np.allclose(final[:k], [s["final_score"] for s in ranked[:k]]):
+                    mismatches += 1
+
+    report = {
+        "sellers": args.sellers,
+        "requests": args.requests,
+        "top_k": args.top_k,
+        "build_index_s": round(build_index_s, 3),
+        "build_columns_s": round(build_columns_s, 3),
+        "bm25": _percentiles(bm25_ms),
+        "vectorized": _percentiles(vector_ms),
+        # Sellers the substring baseline selects but the index does not (must be empty)
+        "missed_by_index": missed,
+        "extra_from_index": extra,
+    }
+    if loop_ms:
+        report["loops"] = _percentiles(loop_ms)
+        report["speedup_p50"] = round(report["loops"]["p50_ms"] / max(report["vectorized"]["p50_ms"], 1e-9), 1)
+        report["top_k_score_mismatches"] = mismatches
+        report["top_k_requests_compared"] = compared
+    return report
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Offline marketplace recommender benchmark")
+    p.add_argument("--sellers", type=int, default=100000)
+    p.add_argument("--requests", type=int, default=50)
+    p.add_argument("--top-k", type=int, default=None, help="rank only the best k (default: all matches)")
+    p.add_argument("--skip-baseline", action="store_true", help="do not time the original Python loops")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--json", action="store_true")
+    return p.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = run(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"\n=== recommender: {report['sellers']} sellers, {report['requests']} requests ===")
+        print(f"index build {report['build_index_s']}s, column build {report['build_columns_s']}s")
+        for name in ("bm25", "vectorized", "loops"):
+            if name in report:
+                st = report[name]
+                print(f"{name:>12}: p50={st['p50_ms']}ms p95={st['p95_ms']}ms mean={st['mean_ms']}ms")
+        if "speedup_p50" in report:
+            print(f"speedup (p50): {report['speedup_p50']}x, top-k score mismatches: "
+                  f"{report['top_k_score_mismatches']} of {report['top_k_requests_compared']} requests "
+                  f"with identical selections")
+        print(f"extra sellers found by the index: {report['extra_from_index']}")
+        if report["missed_by_index"]:
+            print(f"[FAIL] sellers missed by the index: {report['missed_by_index']}")
+    sys.exit(1 if report["missed_by_index"] else 0)
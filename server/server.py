@@ -1,5 +1,6 @@
 import sys
 import os
+import hmac
 import tempfile
 import whisper
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -16,7 +17,6 @@ from flask_pymongo import PyMongo
 from werkzeug.security import generate_password_hash, check_password_hash
 from dotenv import load_dotenv
 from web3 import Web3
-from rank_bm25 import BM25Okapi
 import warnings
 warnings.filterwarnings("ignore")
 
@@ -29,17 +29,21 @@ import numpy as np
 import requests
 
 from src.scheme_engine.engine import recommend_scheme_single, df as SCHEME_DF
+from src.scheme_engine.translations import localize_scheme
 
 # Optional RAG
 try:
     from src.vectorstore import FaissVectorStore
+    from src.sharded_store import ShardedVectorStore
     from src.search import RAGSearch
+    from src.encoder import MULTILINGUAL_EMBEDDING_MODEL
 except Exception as e:
     print(f"RAG MODULE IMPORT ERROR: {e}")
     # Print full traceback for deep debugging
     import traceback
     traceback.print_exc()
     FaissVectorStore = None
+    ShardedVectorStore = None
     RAGSearch = None
 
 # Translation utility
@@ -47,9 +51,18 @@ from src.translator import (
     translate_text,
     translate_to_english,
     translate_from_english,
-    translate_dict_fields,
+    translate_many,
+    get_cache_info as get_translation_cache_info,
     SUPPORTED_LANGUAGES
 )
+from src.tracing import TRACE_COLLECTOR, start_trace, span, record_llm_usage
+from src.script_detect import SKIP_METRICS, detect_script, is_in_language
+from src.seller_index import SellerIndex, preprocess_text_for_bm25
+from src.recommender import rank_sellers
+from src.fpc_import import detect_encoding, import_sellers, iter_rows
+from src.db_indexes import MONGO_ENSURE_INDEXES, bootstrap as bootstrap_indexes, mongo_reachable
+from src.name_keys import ensure_keys, name_key, with_keys
+from src.chat_store import ChatStore
 
 
 # -----------------------
@@ -64,12 +77,55 @@ MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/krishiMitra")
 app.config["MONGO_URI"] = MONGO_URI
 mongo = PyMongo(app)
 
+# Indexes for every query shape below (src/db_indexes.py). Both startup
+# steps share one short-timeout reachability check.
+MONGO_AVAILABLE = bootstrap_indexes(mongo.db) if MONGO_ENSURE_INDEXES else mongo_reachable(mongo.db)
+
+# Lookup-key backfill (src/name_keys.py). Documents left without keys would
+# silently drop out of seller/request/notification lookups, so that is fatal.
+if MONGO_AVAILABLE:
+    try:
+        updated_keys = ensure_keys(mongo.db)
+        if any(updated_keys.values()):
+            print(f"[INFO] Backfilled lookup keys: {updated_keys}")
+    except RuntimeError:
+        raise
+    except Exception as e:
+        print(f"[WARN] Lookup key check skipped, MongoDB unavailable: {e}")
+else:
+    print("[WARN] Lookup key check skipped, MongoDB unreachable")
+
+# Sellers + BM25 index kept in memory for /api/recommend, synced in the background
+SELLER_INDEX = SellerIndex(mongo.db.users)
+SELLER_INDEX.start()
+
 OPENWEATHER_KEY = os.getenv("OPENWEATHER_API")
 
 INFURA_URL = os.getenv("INFURA_URL")
 PRIVATE_KEY = os.getenv("PRIVATE_KEY")
 CONTRACT_ADDRESS = os.getenv("CONTRACT_ADDRESS")
 PORT = int(os.getenv("PORT", "5000"))
+# "single" (faiss_store) or "sharded" (faiss_shards, see src/sharded_store.py)
+VECTOR_STORE = os.getenv("VECTOR_STORE", "single")
+# Marketplace page sizes
+RECOMMEND_PAGE_SIZE = int(os.getenv("RECOMMEND_PAGE_SIZE", "20"))
+RECOMMEND_MAX_LIMIT = 100
+SELLERS_PAGE_SIZE = int(os.getenv("SELLERS_PAGE_SIZE", "50"))
+SELLERS_MAX_LIMIT = 200
+# Fields /api/sellers returns (no email/password)
+SELLER_LIST_PROJECTION = {
+    "_id": 1, "fpcName": 1, "district": 1, "state": 1, "commodities": 1,
+    "experience": 1, "rating": 1, "contact_phone": 1, "address": 1,
+}
+# Shared secret for /api/sellers/import (X-Import-Token); the endpoint is off when unset
+SELLER_IMPORT_TOKEN = os.getenv("SELLER_IMPORT_TOKEN")
+SELLER_IMPORT_MAX_MB = int(os.getenv("SELLER_IMPORT_MAX_MB", "50"))
+# Shared secret for /api/debug/traces (X-Debug-Token); the endpoint is off when unset
+DEBUG_TRACES_TOKEN = os.getenv("DEBUG_TRACES_TOKEN")
+DEBUG_TRACES_MAX_LIMIT = 200
+# "translate": translate in -> English RAG -> translate out (default)
+# "multilingual": multilingual embeddings on the native query, LLM answers in the user's language
+CHATBOT_MODE = os.getenv("CHATBOT_MODE", "translate")
 
 ABI = [
     {
@@ -158,9 +214,19 @@ rag = None
 if FaissVectorStore and RAGSearch:
     try:
         print("Initializing RAG...")
-        store = FaissVectorStore("faiss_store")
+        if CHATBOT_MODE == "multilingual":
+            # Store built with the multilingual model (python -m src.vectorstore --multilingual)
+            embedding_model = MULTILINGUAL_EMBEDDING_MODEL
+            store_suffix = "_multilingual"
+        else:
+            embedding_model = "all-MiniLM-L6-v2"
+            store_suffix = ""
+        if VECTOR_STORE == "sharded":
+            store = ShardedVectorStore("faiss_shards" + store_suffix, embedding_model)
+        else:
+            store = FaissVectorStore("faiss_store" + store_suffix, embedding_model)
         store.load()
-        rag = RAGSearch(vector_store=store)
+        rag = RAGSearch(vector_store=store, embedding_classifier_name=embedding_model)
         print("RAG successfully initialized!")
     except Exception as e:
         print("RAG INIT ERROR:", e)
@@ -168,88 +234,6 @@ if FaissVectorStore and RAGSearch:
 else:
     print("RAG modules not found: FaissVectorStore or RAGSearch is None")
 
-# -----------------------
-# MARKETPLACE RECOMMENDER HELPERS (FROM FILE F)
-# -----------------------
-def preprocess_text_for_bm25(text):
-    t = str(text or "").lower()
-    t = re.sub(r'[^a-z0-9\s]', ' ', t)
-    return [tok for tok in t.split() if tok]
-
-
-def build_seller_docs_from_db():
-    sellers_cursor = mongo.db.users.find({"role": {"$regex": "^seller$", "$options": "i"}})
-    sellers, corpus = [], []
-
-    for s in sellers_cursor:
-        seller = {
-            "_id": s.get("_id"),
-            "fpcName": s.get("fpcName") or s.get("fpc_name") or s.get("_id"),
-            "district": s.get("district", ""),
-            "address": s.get("address", "") or s.get("Address", ""),
-            "contact_phone": s.get("contact_phone", "") or s.get("Contact_Phone", "")
-        }
-
-        comms = s.get("commodities", [])
-        if isinstance(comms, list):
-            seller["commodities"] = ", ".join([str(x) for x in comms if x])
-        else:
-            seller["commodities"] = str(comms)
-
-        try:
-            rating_value = s.get("rating") or s.get("Rating") or 5
-            seller["rating"] = float(rating_value)
-        except:
-            seller["rating"] = 5.0
-
-        try:
-            exp_value = s.get("experience") or s.get("years_of_experience") or 5
-            seller["years_of_experience"] = float(exp_value)
-        except:
-            seller["years_of_experience"] = 5.0
-
-        sellers.append(seller)
-
-        doc_text = (
-            f"{seller['fpcName']} {seller['district']} "
-            f"{seller['commodities']} {seller['address']}"
-        )
-        corpus.append(preprocess_text_for_bm25(doc_text))
-
-    bm25 = BM25Okapi(corpus) if corpus else None
-    return sellers, bm25
-
-
-def district_similarity_score(farmer_district, seller_district):
-    farmer_district = str(farmer_district or "").lower().strip()
-    seller_district = str(seller_district or "").lower().strip()
-    if not farmer_district or not seller_district:
-        return 0.3
-    if farmer_district == seller_district:
-        return 1.0
-    if farmer_district in seller_district or seller_district in farmer_district:
-        return 0.7
-    return 0.3
-
-
-def commodity_match_score(query_crops, seller_commodities):
-    query_crops = [c.strip().lower() for c in str(query_crops or "").split(",") if c.strip()]
-    seller_commodities = str(seller_commodities or "").lower()
-    if not query_crops:
-        return 0.5
-    matches = sum(1 for crop in query_crops if crop in seller_commodities)
-    return min(matches / len(query_crops), 1.0)
-
-
-def normalize_value(val, min_val, max_val):
-    if max_val == min_val:
-        return 0.5
-    try:
-        return (val - min_val) / (max_val - min_val)
-    except:
-        return 0.5
-
-
 # -----------------------
 # GOV SCHEME ENGINE HELPERS (FROM FILE O)
 # -----------------------
@@ -360,7 +344,8 @@ def signUp():
         })
 
     try:
-        mongo.db.users.insert_one(user_doc)
+        mongo.db.users.insert_one(with_keys("users", user_doc))
+        SELLER_INDEX.upsert(user_doc)
         return jsonify({"message": "Signup successful", "user": uid}), 201
 
     except Exception as e:
@@ -382,7 +367,8 @@ def login():
 
     if not user:
         return jsonify({"error": "Invalid userID"}), 400
-    if not check_password_hash(user["password"], pw):
+    # Sellers created by the FPC registry import have no password yet
+    if not user.get("password") or not check_password_hash(user["password"], pw):
         return jsonify({"error": "Wrong password"}), 400
 
     response = {
@@ -421,6 +407,38 @@ def translate_api():
         return jsonify({"translated": text}), 200
 
 
+# Upper bound on strings per /api/translate/batch request
+TRANSLATE_BATCH_LIMIT = 200
+
+
+@app.post("/api/translate/batch")
+def translate_batch_api():
+    """Translate an array of strings from English to the target language, in order."""
+    data = request.get_json() or {}
+    texts = data.get("texts") or []
+    lang = data.get("lang", "en")
+
+    if not isinstance(texts, list):
+        return jsonify({"error": "texts must be an array"}), 400
+    if len(texts) > TRANSLATE_BATCH_LIMIT:
+        return jsonify({"error": f"at most {TRANSLATE_BATCH_LIMIT} texts per request"}), 400
+
+    if lang == "en" or lang not in SUPPORTED_LANGUAGES:
+        return jsonify({"translated": texts}), 200
+
+    try:
+        return jsonify({"translated": translate_many(texts, lang)}), 200
+    except Exception as e:
+        print(f"Translation error: {e}")
+        return jsonify({"translated": texts}), 200
+
+
+@app.get("/api/translate/cache")
+def translate_cache_info():
+    """Hit/miss/eviction counters for the in-process and shared translation caches."""
+    return jsonify(get_translation_cache_info()), 200
+
+
 # ============================================================
 # WEATHER ENDPOINTS (FROM FILE O)
 # ============================================================
@@ -513,7 +531,7 @@ def scheme_bycrop():
 
     # Translate scheme_name and state_ministry if not English
     if lang != "en" and lang in SUPPORTED_LANGUAGES:
-        scheme_dict = translate_dict_fields(scheme_dict, ["scheme_name", "state_ministry"], lang)
+        scheme_dict = localize_scheme(scheme_dict, ["scheme_name", "state_ministry"], lang)
 
     return jsonify({"recommended_scheme": scheme_dict}), 200
 
@@ -544,7 +562,7 @@ def scheme_auto():
 
     # Translate description and scheme_name if not English
     if lang != "en" and lang in SUPPORTED_LANGUAGES:
-        scheme_dict = translate_dict_fields(scheme_dict, ["description", "scheme_name"], lang)
+        scheme_dict = localize_scheme(scheme_dict, ["description", "scheme_name"], lang)
 
     return jsonify({
         "crop": crop,
@@ -558,17 +576,74 @@ def scheme_auto():
 # ============================================================
 @app.get("/api/sellers")
 def get_sellers():
+    """
+    Sellers in a state, one page at a time (keyset pagination on _id).
+    Pass the returned next_cursor as ?cursor= for the following page.
+    """
     state = request.args.get("state")
     if not state:
         return jsonify({"error": "State required"}), 400
 
-    sellers = list(
-        mongo.db.users.find(
-            {"role": "seller", "state": state},
-            {"_id": 0, "password": 0}
-        )
+    try:
+        limit = min(max(int(request.args.get("limit", SELLERS_PAGE_SIZE)), 1), SELLERS_MAX_LIMIT)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    cursor = request.args.get("cursor")
+
+    # Equality on role_key and state, then _id order: served by the
+    # role_key_1_state_1__id_1 index (src/db_indexes.py), so a page reads
+    # limit + 1 index keys however many sellers the state has
+    query = {"role_key": "seller", "state": state}
+    if cursor:
+        query["_id"] = {"$gt": cursor}
+
+    docs = list(
+        mongo.db.users.find(query, SELLER_LIST_PROJECTION)
+        .sort("_id", 1)
+        .limit(limit + 1)
     )
-    return jsonify({"sellers": sellers}), 200
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    next_cursor = str(docs[-1]["_id"]) if has_more and docs else None
+
+    sellers = []
+    for d in docs:
+        d.pop("_id", None)
+        sellers.append(d)
+    return jsonify({"sellers": sellers, "next_cursor": next_cursor}), 200
+
+
+@app.post("/api/sellers/import")
+def import_sellers_csv():
+    """
+    Bulk-import an FPC registry CSV (multipart "file", form "state",
+    optional "dry_run") as sellers. See src/fpc_import.py.
+    """
+    if not SELLER_IMPORT_TOKEN:
+        return jsonify({"error": "Seller import is disabled"}), 403
+    if not hmac.compare_digest(request.headers.get("X-Import-Token", ""), SELLER_IMPORT_TOKEN):
+        return jsonify({"error": "Invalid import token"}), 401
+    # Checked before the multipart body is parsed
+    if request.content_length and request.content_length > SELLER_IMPORT_MAX_MB * 1024 * 1024:
+        return jsonify({"error": f"File larger than {SELLER_IMPORT_MAX_MB} MB"}), 413
+
+    upload = request.files.get("file")
+    state = (request.form.get("state") or "").strip()
+    if not upload or not state:
+        return jsonify({"error": "file and state required"}), 400
+    dry_run = request.form.get("dry_run", "").lower() in ("1", "true", "yes")
+
+    try:
+        # Streamed from the spooled upload; only a sample is read to pick the encoding
+        rows = iter_rows(upload.stream, encoding=detect_encoding(upload.stream))
+        report = import_sellers(rows, mongo.db.users, state, seller_index=SELLER_INDEX, dry_run=dry_run)
+    except Exception as e:
+        print("SELLER IMPORT ERROR:", e)
+        return jsonify({"error": "Import failed", "details": str(e)}), 500
+
+    print(f"[INFO] Seller import ({state}): {report['valid']} upserted, "
+          f"{report['rejected_total']} rejected, {report['rows_per_s']} rows/s")
+    return jsonify(report), 200
 
 
 # ============================================================
@@ -672,73 +747,50 @@ def recommend():
         if not district_input:
             district_input = data.get("region", "").strip()
 
-        all_sellers, bm25_model = build_seller_docs_from_db()
+        paginated = data.get("limit") is not None or data.get("cursor") is not None
+        offset, limit = 0, None
+        if paginated:
+            try:
+                limit = min(max(int(data.get("limit") or RECOMMEND_PAGE_SIZE), 1), RECOMMEND_MAX_LIMIT)
+                offset = max(int(data.get("cursor") or 0), 0)
+            except (TypeError, ValueError):
+                return jsonify({"error": "limit and cursor must be integers"}), 400
 
-        if not all_sellers:
-            return jsonify([]), 200
+        def respond(results, next_cursor=None):
+            if paginated:
+                return jsonify({"results": results, "next_cursor": next_cursor}), 200
+            return jsonify(results), 200
 
-        crop_keywords = [c.strip().lower() for c in crop_input.split(",") if c.strip()]
-        matched = []
+        columns = SELLER_INDEX.columns()
 
-        if crop_keywords:
-            for s in all_sellers:
-                seller_comm = str(s.get("commodities", "")).lower()
-                if any(crop in seller_comm for crop in crop_keywords):
-                    matched.append(s)
-        else:
-            matched = all_sellers
-
-        if not matched:
-            return jsonify([]), 200
+        if not len(columns):
+            return respond([])
 
         query = f"{crop_input} {district_input} {state_input}".strip()
         tokenized = preprocess_text_for_bm25(query)
 
-        bm25_scores = {}
-        if bm25_model:
-            scores = bm25_model.get_scores(tokenized)
-            for i, seller in enumerate(all_sellers):
-                sid = seller.get("_id")
-                bm25_scores[sid] = scores[i] if i < len(scores) else 0.0
-
-        for seller in matched:
-            sid = seller["_id"]
-            seller["bm25_score"] = bm25_scores.get(sid, 0.0)
-            seller["district_score"] = district_similarity_score(
-                district_input, seller.get("district", "")
-            )
-            seller["commodity_score"] = commodity_match_score(
-                crop_input, seller.get("commodities", "")
-            )
-
-        ratings = [s.get("rating", 5.0) for s in matched]
-        experiences = [s.get("years_of_experience", 5.0) for s in matched]
-        bm25_vals = [s.get("bm25_score", 0.0) for s in matched]
-
-        min_r, max_r = min(ratings), max(ratings)
-        min_e, max_e = min(experiences), max(experiences)
-        max_b = max(bm25_vals) if max(bm25_vals) > 0 else 1.0
-
-        for s in matched:
-            s["rating_norm"] = normalize_value(s.get("rating", 5.0), min_r, max_r)
-            s["experience_norm"] = normalize_value(
-                s.get("years_of_experience", 5.0), min_e, max_e
-            )
-            s["bm25_norm"] = s.get("bm25_score", 0.0) / max_b
-
-        for s in matched:
-            s["final_score"] = (
-                s["rating_norm"] * 0.40 +
-                s["district_score"] * 0.25 +
-                s["commodity_score"] * 0.20 +
-                s["experience_norm"] * 0.10 +
-                s["bm25_norm"] * 0.05
-            )
-
-        matched.sort(key=lambda x: x["final_score"], reverse=True)
+        bm25_scores = SELLER_INDEX.bm25_scores(tokenized)
+        # "any" (default): sellers carrying any requested crop; "all": every one
+        crop_match = "all" if data.get("crop_match") == "all" else "any"
+        # One extra row tells us whether another page exists
+        top_k = offset + limit + 1 if paginated else None
+        rows, final_scores = rank_sellers(
+            columns, crop_input, district_input, bm25_scores, top_k=top_k, crop_match=crop_match,
+            state_input=state_input,
+        )
+
+        next_cursor = None
+        if paginated:
+            if rows.size > offset + limit:
+                next_cursor = str(offset + limit)
+            rows, final_scores = rows[offset:offset + limit], final_scores[offset:offset + limit]
+
+        if rows.size == 0:
+            return respond([])
 
         output = []
-        for s in matched:
+        for row, final_score in zip(rows, final_scores):
+            s = columns.sellers[row]
             comm = s.get("commodities", "")
             comm = ", ".join(comm) if isinstance(comm, list) else comm
 
@@ -750,12 +802,12 @@ def recommend():
                 "Years_of_Experience": s.get("years_of_experience", 5.0),
                 "Contact_Phone": s.get("contact_phone", ""),
                 "Address": s.get("address", ""),
-                "match_percentage": round(s["final_score"] * 100, 1),
+                "match_percentage": round(float(final_score) * 100, 1),
                 "fpc_name": s.get("fpcName"),
                 "fpc_id": s.get("_id")
             })
 
-        return jsonify(output), 200
+        return respond(output, next_cursor)
 
     except Exception as e:
         print("RECOMMENDATION ERROR:", e)
@@ -765,7 +817,8 @@ def recommend():
 # ============================================================
 # REQUEST SYSTEM (KEEPING FILE F)
 # ============================================================
-CHATS = []
+# Buyer/seller chat: Mongo "messages" + hot-room ring buffers (src/chat_store.py)
+CHAT_STORE = ChatStore(mongo.db.messages, mongo.db.chat_rooms)
 
 @app.post("/api/request")
 def create_request():
@@ -797,8 +850,9 @@ def create_request():
         if seller and seller.get("fpcName"):
             fpc_name_store = seller["fpcName"]
     else:
-        seller = mongo.db.users.find_one({"fpcName": {"$regex": f"^{re.escape(fpc_value)}$", "$options": "i"}})
+        seller = mongo.db.users.find_one({"fpcName_key": name_key(fpc_value)})
         if not seller:
+            # Fuzzy fallback: substring match, not index-backed
             seller = mongo.db.users.find_one({"fpcName": {"$regex": f"{re.escape(fpc_value)}", "$options": "i"}})
         if seller:
             fpc_id = seller.get("_id")
@@ -819,7 +873,7 @@ def create_request():
     }
 
     try:
-        mongo.db.requests.insert_one(doc)
+        mongo.db.requests.insert_one(with_keys("requests", doc))
         notif = {
             "id": str(uuid.uuid4()),
             "to": fpc_name_store,
@@ -828,7 +882,7 @@ def create_request():
             "read": False,
             "request_id": request_id
         }
-        mongo.db.notifications.insert_one(notif)
+        mongo.db.notifications.insert_one(with_keys("notifications", notif))
 
         return jsonify({"ok": True, "request_id": request_id}), 201
 
@@ -849,7 +903,11 @@ def list_requests():
     if fpc_id:
         q["fpc_id"] = clean_alphanumeric(fpc_id)
     if fpc:
-        q["fpc_name"] = {"$regex": re.escape(fpc.strip()), "$options": "i"}
+        # Exact (indexed) by default; ?match=fuzzy for the old substring search
+        if request.args.get("match") == "fuzzy":
+            q["fpc_name"] = {"$regex": re.escape(fpc.strip()), "$options": "i"}
+        else:
+            q["fpc_name_key"] = name_key(fpc)
 
     try:
         data = list(mongo.db.requests.find(q, {"_id": 0}))
@@ -906,8 +964,7 @@ def delete_request(rid):
         room1 = f"{farmer_id}_{fpc_id}"
         room2 = f"{fpc_id}_{farmer_id}"
 
-        global CHATS
-        CHATS = [m for m in CHATS if not (m["room"] == room1 or m["room"] == room2)]
+        CHAT_STORE.delete_rooms([room1, room2])
 
         return jsonify({"ok": True}), 200
 
@@ -923,14 +980,15 @@ def notifications():
     if not fpc_name_input:
         return jsonify([]), 200
 
-    normalized = fpc_name_input.strip()
+    # Exact (indexed) by default; ?match=fuzzy for the old substring search
+    if request.args.get("match") == "fuzzy":
+        q = {"to": {"$regex": f"{re.escape(fpc_name_input.strip())}", "$options": "i"}}
+    else:
+        q = {"to_key": name_key(fpc_name_input)}
 
     try:
         notifs = list(
-            mongo.db.notifications.find(
-                {"to": {"$regex": f"{re.escape(normalized)}", "$options": "i"}},
-                {"_id": 0}
-            ).sort("timestamp", -1)
+            mongo.db.notifications.find(q, {"_id": 0}).sort("timestamp", -1)
         )
         return jsonify(notifs), 200
 
@@ -953,16 +1011,11 @@ def send_message():
     if not sender or not receiver or not text or not room:
         return jsonify({"ok": False, "error": "Missing sender/receiver/text/room"}), 400
 
-    msg = {
-        "id": str(uuid.uuid4()),
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "sender": str(sender),
-        "receiver": str(receiver),
-        "text": text,
-        "room": room,
-    }
-
-    CHATS.append(msg)
+    try:
+        msg = CHAT_STORE.send(sender, receiver, text, room)
+    except Exception as e:
+        print("Chat send error:", e)
+        return jsonify({"ok": False, "error": "Failed to store message"}), 500
     return jsonify({"ok": True, "msg": msg}), 201
 
 
@@ -972,7 +1025,14 @@ def chat_history():
     if not room:
         return jsonify({"ok": False, "error": "room required"}), 400
 
-    msgs = [m for m in CHATS if m.get("room") == room]
+    # ?since=<seq | message id | timestamp> returns only newer messages
+    since = request.args.get("since") or None
+
+    try:
+        msgs = CHAT_STORE.history(room, since=since)
+    except Exception as e:
+        print("Chat history error:", e)
+        return jsonify({"ok": False, "error": "Failed to fetch history"}), 500
     return jsonify(msgs), 200
 
 
@@ -987,55 +1047,99 @@ def chatbot():
     data = request.get_json() or {}
     user_input = (data.get("message") or "").strip()
     lang = data.get("lang", "en")
+    debug = bool(data.get("debug"))
+    # Lets the sharded store skip other states' handbooks
+    state = (data.get("state") or "").strip()
+    filters = {"state": state} if state and VECTOR_STORE == "sharded" else None
 
     if not user_input:
         return jsonify({"error": "Empty message"}), 400
 
     print(f"DEBUG CHATBOT: Received lang='{lang}', message='{user_input}'")
 
+    # Single pass: no translation hops, the LLM answers in the user's language
+    multilingual = CHATBOT_MODE == "multilingual" and lang != "en" and lang in SUPPORTED_LANGUAGES
+
     try:
-        # Translate user message to English for RAG processing
-        english_input = user_input
-        if lang != "en" and lang in SUPPORTED_LANGUAGES:
-            english_input = translate_to_english(user_input, lang)
-            # Fallback to LLM if standard translation failed
-            if english_input == user_input and rag and hasattr(rag, 'llm'):
-                print(f"DEBUG: Translation fallback to LLM for input ({lang} -> en)")
-                try:
-                    lang_name = SUPPORTED_LANGUAGES.get(lang, lang)
-                    # Use a system-like prompt for better instructions
-                    prompt = f"Translate the following text from {lang_name} to English. Output ONLY the translation, no extra text: {user_input}"
-                    resp = rag.llm.invoke(prompt)
-                    english_input = resp.content.strip()
-                except Exception as e:
-                    print(f"LLM Input Translation Error: {e}")
-            
-            print(f"DEBUG CHATBOT: Final English input='{english_input}'")
-
-        # Process with RAG in English
-        ans = rag.search_and_summarize(english_input)
-
-        # Translate response back to user's language
-        if lang != "en" and lang in SUPPORTED_LANGUAGES:
-            original_ans = ans
-            ans = translate_from_english(ans, lang)
-            # Fallback to LLM if standard translation failed
-            if ans == original_ans and rag and hasattr(rag, 'llm'):
-                 print(f"DEBUG: Translation fallback to LLM for output (en -> {lang})")
-                 try:
-                    lang_name = SUPPORTED_LANGUAGES.get(lang, lang)
-                    prompt = f"Translate the following text from English to {lang_name}. Output ONLY the translation, no extra text: {original_ans}"
-                    resp = rag.llm.invoke(prompt)
-                    ans = resp.content.strip()
-                 except Exception as e:
-                    print(f"LLM Output Translation Error: {e}")
-
-        return jsonify({"reply": ans}), 200
+        with start_trace("chatbot", lang=lang, mode=CHATBOT_MODE) as trace:
+            # Translate user message to English for RAG processing
+            english_input = user_input
+            if lang != "en" and lang in SUPPORTED_LANGUAGES and not multilingual:
+                with span("translate_in", script=detect_script(user_input)):
+                    english_input = translate_to_english(user_input, lang)
+                # Fallback to LLM if standard translation failed, unless the
+                # message was already English
+                needs_llm = english_input == user_input and not is_in_language(user_input, "en")
+                if english_input == user_input:
+                    SKIP_METRICS.record("llm_translate_in", not needs_llm)
+                if needs_llm and rag and hasattr(rag, 'llm'):
+                    print(f"DEBUG: Translation fallback to LLM for input ({lang} -> en)")
+                    with span("llm_translate_in") as s:
+                        try:
+                            lang_name = SUPPORTED_LANGUAGES.get(lang, lang)
+                            # Use a system-like prompt for better instructions
+                            prompt = f"Translate the following text from {lang_name} to English. Output ONLY the translation, no extra text: {user_input}"
+                            resp = rag.llm.invoke(prompt, template="translate_in")
+                            record_llm_usage(s, resp)
+                            english_input = resp.content.strip()
+                        except Exception as e:
+                            print(f"LLM Input Translation Error: {e}")
+
+                print(f"DEBUG CHATBOT: Final English input='{english_input}'")
+
+            # Process with RAG in English (or natively in multilingual mode)
+            ans = rag.search_and_summarize(english_input, filters=filters, answer_lang=lang if multilingual else None)
+
+            # Translate response back to user's language
+            if lang != "en" and lang in SUPPORTED_LANGUAGES and not multilingual:
+                original_ans = ans
+                with span("translate_out"):
+                    ans = translate_from_english(ans, lang)
+                # Fallback to LLM if standard translation failed, unless the
+                # answer is already in the user's script
+                needs_llm = ans == original_ans and not is_in_language(ans, lang)
+                if ans == original_ans:
+                    SKIP_METRICS.record("llm_translate_out", not needs_llm)
+                if needs_llm and rag and hasattr(rag, 'llm'):
+                    print(f"DEBUG: Translation fallback to LLM for output (en -> {lang})")
+                    with span("llm_translate_out") as s:
+                        try:
+                            lang_name = SUPPORTED_LANGUAGES.get(lang, lang)
+                            prompt = f"Translate the following text from English to {lang_name}. Output ONLY the translation, no extra text: {original_ans}"
+                            resp = rag.llm.invoke(prompt, template="translate_out")
+                            record_llm_usage(s, resp)
+                            ans = resp.content.strip()
+                        except Exception as e:
+                            print(f"LLM Output Translation Error: {e}")
+
+        result = {"reply": ans}
+        if debug:
+            result["trace"] = trace.to_dict()
+        return jsonify(result), 200
     except Exception as e:
         print("CHATBOT ERROR:", e)
         return jsonify({"error": "RAG search failed"}), 500
 
 
+@app.get("/api/debug/traces")
+def debug_traces():
+    """Recent chatbot traces, per-stage latency summary and translation skip rates."""
+    # Traces include user queries
+    if not DEBUG_TRACES_TOKEN:
+        return jsonify({"error": "Trace debugging is disabled"}), 403
+    if not hmac.compare_digest(request.headers.get("X-Debug-Token", ""), DEBUG_TRACES_TOKEN):
+        return jsonify({"error": "Invalid debug token"}), 401
+    try:
+        limit = min(max(int(request.args.get("limit", 20)), 0), DEBUG_TRACES_MAX_LIMIT)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    return jsonify({
+        "stages": TRACE_COLLECTOR.stage_summary(),
+        "translation_skips": SKIP_METRICS.snapshot(),
+        "traces": TRACE_COLLECTOR.recent(limit),
+    }), 200
+
+
 @app.post("/transcribe")
 def transcribe_audio():
     global WHISPER_MODEL, WHISPER_MODEL_ERROR
@@ -0,0 +1,311 @@
+"""
+Buyer/seller chat storage: MongoDB "messages" collection plus hot-room cache.
+
+Every message is written to Mongo, so chats survive restarts and are shared
+by all workers; the (room, timestamp) index serves history reads and the
+TTL index on created_at expires messages after CHAT_TTL_DAYS (see
+src/db_indexes.py). Recently used rooms are cached in memory as bounded
+ring buffers (the last CHAT_RING_SIZE messages, at most CHAT_HOT_ROOMS rooms,
+least recently used evicted first):
+
+- send() is one insert plus an O(1) append to the room's ring;
+- history() of a cached room is served from the ring when it holds the
+  whole room, otherwise it is one indexed query for that room only.
+
+Each room has a monotonic sequence number (a $inc counter document in
+"chat_rooms", so it is shared by workers); every message carries its seq.
+history(room, since=...) returns only newer messages. Every read first
+checks the room's counter (one point read on "chat_rooms"): a cached room
+whose seq matches it is served from the ring, so "nothing new" never reads
+the messages collection; a cached room behind it (a send through another
+worker) is dropped and the room re-read from Mongo.
+
+A seq is allocated before its message is inserted, so a reader can see
+seq N+1 while N is still in flight. Results therefore stop at the first
+gap in the sequence, and the client's since only moves past N once N is
+visible. A gap is skipped once the message after it is older than
+CHAT_SEQ_GAP_GRACE_S (a send that failed after allocating its seq, or
+messages removed by the TTL).
+
+delete_rooms() removes the messages and then bumps each room's counter,
+recording the bumped seq as "cleared": other workers see the seq move and
+drop their cached copy. No message ever carries the cleared seq, so seqs
+stay monotonic for clients and a since from before the delete is read as
+the cleared seq instead of waiting out a gap.
+
+CHAT_CACHE_MAX_AGE_S additionally re-reads cached rooms after that many
+seconds (0, the default, relies on the counter check alone).
+"""
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+
+from pymongo import ReturnDocument
+
+CHAT_RING_SIZE = int(os.getenv("CHAT_RING_SIZE", "200"))
+CHAT_HOT_ROOMS = int(os.getenv("CHAT_HOT_ROOMS", "1000"))
+CHAT_TTL_DAYS = int(os.getenv("CHAT_TTL_DAYS", "180"))
+CHAT_CACHE_MAX_AGE_S = float(os.getenv("CHAT_CACHE_MAX_AGE_S", "0"))
+CHAT_SEQ_GAP_GRACE_S = float(os.getenv("CHAT_SEQ_GAP_GRACE_S", "10"))
+
+# Fields never returned to clients
+_HIDDEN = {"_id": 0, "created_at": 0}
+# Messages from before sequence numbers existed have no seq and sort first
+_ORDER = [("seq", 1), ("timestamp", 1), ("_id", 1)]
+_TIMESTAMP_RE = re.compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$")
+
+
+class _Room:
+    __slots__ = ("ring", "complete", "loaded_at", "seq")
+
+    def __init__(self, messages: list, ring_size: int, complete: bool):
+        self.ring = deque(messages, maxlen=ring_size)
+        # True while the ring holds every message of the room
+        self.complete = complete
+        self.loaded_at = time.monotonic()
+        # Latest seq of the room as far as this process knows
+        self.seq = self.ring[-1].get("seq", 0) if self.ring else 0
+
+
+class ChatStore:
+    def __init__(self, collection, counters, ring_size: int = CHAT_RING_SIZE,
+                 max_rooms: int = CHAT_HOT_ROOMS, max_age_s: float = CHAT_CACHE_MAX_AGE_S,
+                 gap_grace_s: float = CHAT_SEQ_GAP_GRACE_S):
+        self.collection = collection
+        self.counters = counters
+        self.ring_size = ring_size
+        self.max_rooms = max_rooms
+        self.max_age_s = max_age_s
+        self.gap_grace_s = gap_grace_s
+        self._rooms = OrderedDict()
+        self._lock = threading.Lock()
+        # Send generations: _send_gen counts sends in this process, _room_gen
+        # keeps the generation of each room's last send (bounded; evicted
+        # rooms are covered by _evicted_gen). _load uses them to detect a
+        # send that raced with its read.
+        self._send_gen = 0
+        self._room_gen = OrderedDict()
+        self._evicted_gen = 0
+        self.hits = 0
+        self.misses = 0
+
+    # ---- cache ----
+
+    def _cached(self, room: str):
+        """Cached room entry (marked recently used), or None if absent or stale."""
+        entry = self._rooms.get(room)
+        if entry is None:
+            return None
+        if self.max_age_s and time.monotonic() - entry.loaded_at > self.max_age_s:
+            del self._rooms[room]
+            return None
+        self._rooms.move_to_end(room)
+        return entry
+
+    def _record_send(self, room: str):
+        """Called under the lock after every send."""
+        self._send_gen += 1
+        self._room_gen[room] = self._send_gen
+        self._room_gen.move_to_end(room)
+        while len(self._room_gen) > 4 * self.max_rooms:
+            _, gen = self._room_gen.popitem(last=False)
+            self._evicted_gen = max(self._evicted_gen, gen)
+
+    def _load(self, room: str):
+        """
+        Read the room's newest messages and cache them. Returns the entry, or
+        None if a send to the room landed while reading (the snapshot may
+        miss it, so it is neither cached nor served).
+        """
+        with self._lock:
+            gen_before = self._send_gen
+        # Newest ring_size + 1 messages: the extra one tells whether the ring is the whole room
+        cursor = (self.collection.find({"room": room}, _HIDDEN)
+                  .sort([(field, -1) for field, _ in _ORDER])
+                  .limit(self.ring_size + 1))
+        newest = list(cursor)
+        complete = len(newest) <= self.ring_size
+        entry = _Room(reversed(newest[:self.ring_size]), self.ring_size, complete)
+        with self._lock:
+            if self._room_gen.get(room, self._evicted_gen) > gen_before:
+                return None
+            self._rooms[room] = entry
+            self._rooms.move_to_end(room)
+            while len(self._rooms) > self.max_rooms:
+                self._rooms.popitem(last=False)
+        return entry
+
+    def _next_seq(self, room: str) -> int:
+        counter = self.counters.find_one_and_update(
+            {"_id": room}, {"$inc": {"seq": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        return counter["seq"]
+
+    def _room_counter(self, room: str):
+        """(latest allocated seq, seq of the last delete) of the room, across all workers."""
+        counter = self.counters.find_one({"_id": room}, {"seq": 1, "cleared": 1})
+        if not counter:
+            return 0, 0
+        return counter.get("seq", 0), counter.get("cleared", 0)
+
+    def _gap_expired(self, msg: dict, now: datetime) -> bool:
+        try:
+            sent = datetime.strptime(msg["timestamp"], "%Y-%m-%d %H:%M:%S")
+        except (KeyError, ValueError):
+            return True
+        return (now - sent).total_seconds() > self.gap_grace_s
+
+    def _contiguous(self, msgs: list, since) -> list:
+        """msgs cut at the first seq gap that may still be an in-flight send."""
+        now = datetime.now()
+        expected = since + 1 if isinstance(since, int) else None
+        out = []
+        for m in msgs:
+            seq = m.get("seq", 0)
+            if not seq:
+                # Messages from before sequence numbers existed
+                out.append(m)
+                continue
+            if expected is not None and seq > expected and not self._gap_expired(m, now):
+                break
+            out.append(m)
+            expected = seq + 1
+        return out
+
+    def _query(self, room: str, since) -> list:
+        q = {"room": room}
+        if isinstance(since, int):
+            q["seq"] = {"$gt": since}
+        elif since is not None:
+            q["timestamp"] = {"$gt": since}
+        return list(self.collection.find(q, _HIDDEN).sort(_ORDER))
+
+    def _resolve_since(self, room: str, since):
+        """since as a seq (int), a timestamp string, or None for a message id that no longer exists."""
+        if since is None or isinstance(since, int):
+            return since
+        since = str(since).strip()
+        if since.isdigit():
+            return int(since)
+        if _TIMESTAMP_RE.match(since):
+            return since
+        # A message id: use its seq
+        with self._lock:
+            entry = self._rooms.get(room)
+            for m in (entry.ring if entry is not None else ()):
+                if m.get("id") == since:
+                    return m.get("seq", 0)
+        doc = self.collection.find_one({"room": room, "id": since}, {"seq": 1})
+        return doc.get("seq", 0) if doc else None
+
+    # ---- API ----
+
+    def send(self, sender, receiver, text: str, room: str) -> dict:
+        msg = {
+            "seq": self._next_seq(room),
+            "id": str(uuid.uuid4()),
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "sender": str(sender),
+            "receiver": str(receiver),
+            "text": text,
+            "room": room,
+        }
+        self.collection.insert_one({**msg, "created_at": datetime.utcnow()})
+        with self._lock:
+            self._record_send(room)
+            entry = self._cached(room)
+            if entry is not None:
+                if msg["seq"] != entry.seq + 1:
+                    # Another worker wrote in between; reload on next read
+                    del self._rooms[room]
+                else:
+                    if len(entry.ring) == self.ring_size:
+                        entry.complete = False
+                    entry.ring.append(msg)
+                    entry.seq = msg["seq"]
+        return msg
+
+    def _from_ring(self, entry: _Room, since):
+        """Messages after since from the ring, or None if the ring may not cover them."""
+        if since is None:
+            return list(entry.ring) if entry.complete else None
+        if isinstance(since, int):
+            if since >= entry.seq:
+                return []
+            newer = [m for m in entry.ring if m.get("seq", 0) > since]
+            covered = entry.complete or (entry.ring and entry.ring[0].get("seq", 0) <= since + 1)
+        else:
+            newer = [m for m in entry.ring if m["timestamp"] > since]
+            covered = entry.complete or (entry.ring and entry.ring[0]["timestamp"] <= since)
+        return newer if covered else None
+
+    def history(self, room: str, since=None) -> list:
+        """
+        Messages of a room, oldest first. since limits the result to newer
+        messages: a seq (int or digit string), a "%Y-%m-%d %H:%M:%S"
+        timestamp, or a message id. An unknown message id returns everything.
+        """
+        since = self._resolve_since(room, since)
+        latest, cleared = self._room_counter(room)
+        if isinstance(since, int) and since < cleared:
+            # Everything up to the last delete is gone
+            since = cleared
+        with self._lock:
+            entry = self._cached(room)
+            if entry is not None and entry.seq < latest:
+                # Sends through another worker (or still in flight here)
+                del self._rooms[room]
+                entry = None
+            if entry is not None:
+                msgs = self._from_ring(entry, since)
+                if msgs is not None:
+                    self.hits += 1
+                    return self._contiguous(msgs, since)
+            self.misses += 1
+        if entry is None:
+            entry = self._load(room)
+            if entry is not None:
+                with self._lock:
+                    if entry.complete and entry.seq < cleared:
+                        # The delete's seq has no message; without this the room reloads on every read
+                        entry.seq = cleared
+                    msgs = self._from_ring(entry, since)
+                if msgs is not None:
+                    return self._contiguous(msgs, since)
+        # Not covered by the ring: one indexed read of this room
+        return self._contiguous(self._query(room, since), since)
+
+    def delete_rooms(self, rooms: list) -> int:
+        """
+        Delete the rooms' messages and bump their counters so every worker
+        drops its cached copy. Counters are bumped after the delete, so a
+        reload triggered by the bump cannot see the old messages.
+        """
+        rooms = list(rooms)
+        result = self.collection.delete_many({"room": {"$in": rooms}})
+        for room in rooms:
+            self.counters.update_one(
+                {"_id": room},
+                [
+                    {"$set": {"seq": {"$add": [{"$ifNull": ["$seq", 0]}, 1]}}},
+                    {"$set": {"cleared": "$seq"}},
+                ],
+                upsert=True,
+            )
+        with self._lock:
+            for room in rooms:
+                self._rooms.pop(room, None)
+        return result.deleted_count
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hot_rooms": len(self._rooms),
+                "cached_messages": sum(len(e.ring) for e in self._rooms.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
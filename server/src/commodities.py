@@ -0,0 +1,166 @@
+"""
+Commodity normalization and the commodity -> seller inverted index.
+
+Seller commodity lists are free text typed at sign-up ("Paddy", "potatoes",
+"Aloo, Onion"). normalize_commodity() maps them to one canonical vocabulary
+(lower case, singular, local names and synonyms folded by COMMODITY_ALIASES),
+and CommodityIndex keeps a sorted posting list of seller rows per canonical
+commodity, so crop filters resolve by posting-list union/intersection
+instead of scanning every seller.
+
+Registry entries are often compound ("Paddy and Vegetable", "Nolen gur and
+Scented rice"), so lists are split on commas, "and", "&", "/" and ";", and
+a crop also matches the vocabulary entries that contain it ("rice" ->
+"scented rice"). The result is a superset of the old substring match of
+the crop against the seller's commodity text.
+"""
+import re
+
+import numpy as np
+
+# Alias -> canonical name. Keys are already lower-case and singular.
+COMMODITY_ALIASES = {
+    "paddy": "rice",
+    "dhan": "rice",
+    "chawal": "rice",
+    "gehu": "wheat",
+    "gehun": "wheat",
+    "aloo": "potato",
+    "alu": "potato",
+    "pyaz": "onion",
+    "pyaaz": "onion",
+    "tamatar": "tomato",
+    "makka": "maize",
+    "makkai": "maize",
+    "corn": "maize",
+    "sarson": "mustard",
+    "rapeseed": "mustard",
+    "pat": "jute",
+    "haldi": "turmeric",
+    "adrak": "ginger",
+    "aam": "mango",
+    "kela": "banana",
+    "masoor": "lentil",
+    "dal": "lentil",
+    "vegetable": "vegetables",
+    "veggie": "vegetables",
+    "sabzi": "vegetables",
+    "dairy": "milk",
+    "chilly": "chilli",
+    "chili": "chilli",
+    "mirch": "chilli",
+    "green chilly": "green chilli",
+}
+
+# Words whose trailing "s" is not a plural
+_NOT_PLURAL = {"vegetables", "citrus", "hibiscus", "asparagus"}
+
+_CLEAN_RE = re.compile(r"[^a-z0-9 ]+")
+# Separators inside one commodity cell; shared with src/fpc_import.py
+COMMODITY_SPLIT_RE = re.compile(r",|;|/|&|\band\b", re.IGNORECASE)
+# Cached crop -> matching vocabulary entries per index
+_MATCH_CACHE_SIZE = 4096
+
+
+def _singular(word: str) -> str:
+    if word in _NOT_PLURAL or len(word) <= 3:
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith("oes"):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def _clean(text) -> str:
+    return " ".join(_CLEAN_RE.sub(" ", str(text or "").lower()).split())
+
+
+def normalize_commodity(text) -> str:
+    """Canonical commodity name: lower case, singular, aliases folded ("Paddy" -> "rice")."""
+    t = _clean(text)
+    if not t:
+        return ""
+    if t in COMMODITY_ALIASES:
+        return COMMODITY_ALIASES[t]
+    words = t.split()
+    words[-1] = _singular(words[-1])
+    t = " ".join(words)
+    return COMMODITY_ALIASES.get(t, t)
+
+
+def parse_commodities(value) -> list:
+    """
+    Canonical commodity names from a list or a string, deduplicated. Entries
+    are split on COMMODITY_SPLIT_RE: "Paddy and Vegetable" -> [rice, vegetables].
+    """
+    items = value if isinstance(value, list) else [value]
+    out = []
+    for item in items:
+        for part in COMMODITY_SPLIT_RE.split(str(item or "")):
+            name = normalize_commodity(part)
+            if name and name not in out:
+                out.append(name)
+    return out
+
+
+class CommodityIndex:
+    """Canonical commodity -> sorted array of seller rows."""
+
+    def __init__(self, commodity_lists: list):
+        postings = {}
+        for row, names in enumerate(commodity_lists):
+            for name in names:
+                postings.setdefault(name, []).append(row)
+        self.postings = {name: np.asarray(rows, dtype=np.int64) for name, rows in postings.items()}
+        self.vocabulary = sorted(self.postings)
+        self._matches = {}
+
+    def _vocabulary_matches(self, crop: str) -> list:
+        """
+        Vocabulary entries a crop matches: the entries containing its
+        canonical name, the text as typed, or an alias of the name ("paddy"
+        -> "rice", "scented rice", "paddy seed"). Aliases only match whole
+        words ("pat" is jute, "patato" is not). Scans the vocabulary, not the
+        sellers, and is cached per crop.
+        """
+        raw = _clean(crop)
+        matched = self._matches.get(raw)
+        if matched is not None:
+            return matched
+        name = normalize_commodity(raw)
+        terms = [t for t in {name, raw} if t]
+        aliases = [f" {alias} " for alias, canonical in COMMODITY_ALIASES.items() if canonical == name]
+        matched = [v for v in self.vocabulary
+                   if any(t in v for t in terms) or any(a in f" {v} " for a in aliases)]
+        if len(self._matches) >= _MATCH_CACHE_SIZE:
+            self._matches.clear()
+        self._matches[raw] = matched
+        return matched
+
+    def rows_for(self, crop: str) -> np.ndarray:
+        """Rows carrying a crop: the union of the postings of its vocabulary matches."""
+        lists = [self.postings[v] for v in self._vocabulary_matches(crop)]
+        if not lists:
+            return np.empty(0, dtype=np.int64)
+        if len(lists) == 1:
+            return lists[0]
+        return np.unique(np.concatenate(lists))
+
+    def match(self, crops: list, mode: str = "any"):
+        """
+        Resolve a multi-crop query. Returns (rows, counts): the matching rows
+        (sorted) and how many of the query crops each carries. mode="any" is
+        the posting-list union, mode="all" the intersection.
+        """
+        lists = [self.rows_for(c) for c in crops]
+        lists = [l for l in lists if l.size] if mode == "any" else lists
+        if not lists:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        rows, counts = np.unique(np.concatenate(lists), return_counts=True)
+        if mode == "all":
+            keep = counts == len(crops)
+            rows, counts = rows[keep], counts[keep]
+        return rows, counts
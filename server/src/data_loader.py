@@ -1,17 +1,138 @@
+import codecs
+import os
 from pathlib import Path
 from typing import List, Any
+
+import pandas as pd
+from langchain_core.documents import Document
 from langchain_community.document_loaders import PyPDFLoader, TextLoader, CSVLoader
 from langchain_community.document_loaders import Docx2txtLoader
 from langchain_community.document_loaders.excel import UnstructuredExcelLoader
 from langchain_community.document_loaders import JSONLoader
 
-def load_all_documents(data_dir: str) -> List[Any]:
+# "grouped" packs related CSV/Excel rows into chunk-size documents; "rows" keeps
+# the old one-Document-per-row loaders
+TABULAR_MODE = os.getenv("TABULAR_MODE", "grouped")
+TABULAR_CHUNK_CHARS = int(os.getenv("TABULAR_CHUNK_CHARS", "1000"))
+TABULAR_READ_ROWS = 5000
+
+# Per-file column selection and grouping key. Files not listed keep every
+# column and are packed in file order.
+TABULAR_LAYOUTS = {
+    "new_allschemes.csv": {
+        "columns": ["scheme_name", "state_ministry", "description", "tags", "scheme_link"],
+        "group_by": "state_ministry",
+    },
+    "FPC_sample_alipurduar.csv": {
+        "columns": ["FPC_Name", "District", "Address", "Contact_Person", "Contact_Role",
+                    "Contact_Phone", "Registered_Under", "Commodities"],
+        "group_by": "District",
+    },
+}
+
+_EMPTY_VALUES = {"", "nan", "none", "-", "- - -"}
+
+
+def _row_text(row: dict, columns: List[str]) -> str:
+    parts = []
+    for col in columns:
+        value = str(row.get(col, "")).strip()
+        if value.lower() not in _EMPTY_VALUES:
+            parts.append(f"{col}: {value}")
+    return "; ".join(parts)
+
+
+def _csv_encoding(path: Path) -> str:
+    # Some government exports are Windows-1252 rather than UTF-8. Decide
+    # before reading: falling back mid-file would re-yield earlier rows.
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                decoder.decode(block)
+            decoder.decode(b"", final=True)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "cp1252"
+
+
+def _read_csv_chunks(path: Path):
+    yield from pd.read_csv(path, chunksize=TABULAR_READ_ROWS, dtype=str, keep_default_na=False,
+                           encoding=_csv_encoding(path), encoding_errors="replace")
+
+
+def _read_excel_frames(path: Path):
+    for sheet, frame in pd.read_excel(path, sheet_name=None, dtype=str).items():
+        yield sheet, frame.fillna("")
+
+
+def _group_rows(frames, source: str, layout: dict, chunk_chars: int) -> List[Any]:
+    """
+    Pack rows into documents of up to chunk_chars characters. Rows sharing the
+    layout's group_by value (and sheet) are packed together; metadata keeps
+    the 0-based data row ids for citation.
+    """
+    group_by = layout.get("group_by")
+    documents = []
+    open_groups = {}
+
+    def flush(key):
+        lines, row_ids = open_groups.pop(key)
+        sheet, group = key
+        meta = {"source": source, "row_ids": row_ids, "row_start": row_ids[0], "row_end": row_ids[-1]}
+        if sheet is not None:
+            meta["sheet"] = sheet
+        if group_by:
+            meta[group_by] = group
+        documents.append(Document(page_content="\n".join(lines), metadata=meta))
+
+    for sheet, frame, offset in frames:
+        columns = layout.get("columns") or list(frame.columns)
+        columns = [c for c in columns if c in frame.columns]
+        for i, row in enumerate(frame.to_dict("records")):
+            text = _row_text(row, columns)
+            if not text:
+                continue
+            key = (sheet, str(row.get(group_by, "")).strip() if group_by else None)
+            lines, row_ids = open_groups.setdefault(key, ([], []))
+            if lines and sum(len(l) + 1 for l in lines) + len(text) > chunk_chars:
+                flush(key)
+                lines, row_ids = open_groups.setdefault(key, ([], []))
+            lines.append(text)
+            row_ids.append(offset + i)
+
+    for key in list(open_groups):
+        flush(key)
+    return documents
+
+
+def load_tabular_grouped(path, chunk_chars: int = TABULAR_CHUNK_CHARS) -> List[Any]:
+    """Columnar CSV/Excel ingestion: read with pandas, emit row-grouped documents."""
+    path = Path(path)
+    layout = TABULAR_LAYOUTS.get(path.name, {})
+
+    if path.suffix.lower() == ".csv":
+        def frames():
+            offset = 0
+            for frame in _read_csv_chunks(path):
+                yield None, frame, offset
+                offset += len(frame)
+    else:
+        def frames():
+            for sheet, frame in _read_excel_frames(path):
+                yield sheet, frame, 0
+
+    return _group_rows(frames(), str(path), layout, chunk_chars)
+
+
+def load_all_documents(data_dir: str, recursive: bool = True) -> List[Any]:
     data_path = Path(data_dir).resolve()
+    prefix = '**/' if recursive else ''
     print(f"[DEBUG] Data path: {data_path}")
     documents = []
 
     # PDF 
-    pdf_files = list(data_path.glob('**/*.pdf'))
+    pdf_files = list(data_path.glob(f'{prefix}*.pdf'))
     print(f"[DEBUG] Found {len(pdf_files)} PDF files: {[str(f) for f in pdf_files]}")
     for pdf_file in pdf_files:
         print(f"[DEBUG] Loading PDF: {pdf_file}")
@@ -24,7 +145,7 @@ def load_all_documents(data_dir: str) -> List[Any]:
             print(f"[ERROR] Failed to load PDF {pdf_file}: {e}")
 
     # TXT 
-    txt_files = list(data_path.glob('**/*.txt'))
+    txt_files = list(data_path.glob(f'{prefix}*.txt'))
     print(f"[DEBUG] Found {len(txt_files)} TXT files: {[str(f) for f in txt_files]}")
     for txt_file in txt_files:
         print(f"[DEBUG] Loading TXT: {txt_file}")
@@ -37,33 +158,41 @@ def load_all_documents(data_dir: str) -> List[Any]:
             print(f"[ERROR] Failed to load TXT {txt_file}: {e}")
 
     # CSV files
-    csv_files = list(data_path.glob('**/*.csv'))
+    csv_files = list(data_path.glob(f'{prefix}*.csv'))
     print(f"[DEBUG] Found {len(csv_files)} CSV files: {[str(f) for f in csv_files]}")
     for csv_file in csv_files:
         print(f"[DEBUG] Loading CSV: {csv_file}")
         try:
-            loader = CSVLoader(str(csv_file))
-            loaded = loader.load()
+            if TABULAR_MODE == "grouped":
+                loaded = load_tabular_grouped(csv_file)
+            else:
+                loaded = CSVLoader(str(csv_file)).load()
             print(f"[DEBUG] Loaded {len(loaded)} CSV docs from {csv_file}")
             documents.extend(loaded)
         except Exception as e:
             print(f"[ERROR] Failed to load CSV {csv_file}: {e}")
 
     # Excel files
-    xlsx_files = list(data_path.glob('**/*.xlsx'))
+    xlsx_files = list(data_path.glob(f'{prefix}*.xlsx'))
     print(f"[DEBUG] Found {len(xlsx_files)} Excel files: {[str(f) for f in xlsx_files]}")
     for xlsx_file in xlsx_files:
         print(f"[DEBUG] Loading Excel: {xlsx_file}")
         try:
-            loader = UnstructuredExcelLoader(str(xlsx_file))
-            loaded = loader.load()
+            if TABULAR_MODE == "grouped":
+                try:
+                    loaded = load_tabular_grouped(xlsx_file)
+                except ImportError:
+                    # pandas needs openpyxl for .xlsx
+                    loaded = UnstructuredExcelLoader(str(xlsx_file)).load()
+            else:
+                loaded = UnstructuredExcelLoader(str(xlsx_file)).load()
             print(f"[DEBUG] Loaded {len(loaded)} Excel docs from {xlsx_file}")
             documents.extend(loaded)
         except Exception as e:
             print(f"[ERROR] Failed to load Excel {xlsx_file}: {e}")
 
     # Word files
-    docx_files = list(data_path.glob('**/*.docx'))
+    docx_files = list(data_path.glob(f'{prefix}*.docx'))
     print(f"[DEBUG] Found {len(docx_files)} Word files: {[str(f) for f in docx_files]}")
     for docx_file in docx_files:
         print(f"[DEBUG] Loading Word: {docx_file}")
@@ -76,7 +205,7 @@ def load_all_documents(data_dir: str) -> List[Any]:
             print(f"[ERROR] Failed to load Word {docx_file}: {e}")
 
     # JSON files
-    json_files = list(data_path.glob('**/*.json'))
+    json_files = list(data_path.glob(f'{prefix}*.json'))
     print(f"[DEBUG] Found {len(json_files)} JSON files: {[str(f) for f in json_files]}")
     for json_file in json_files:
         print(f"[DEBUG] Loading JSON: {json_file}")
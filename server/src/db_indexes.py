@@ -0,0 +1,268 @@
+"""
+MongoDB index bootstrap for the query shapes server.py uses.
+
+INDEXES declares one index per query shape (equality fields first, then the
+sort/range field). ensure_indexes() creates any that are missing; it runs
+at server startup and is idempotent, and drops the LEGACY_INDEXES that
+the current ones replaced. HOT_QUERIES are representative versions of the
+hot request-path queries; verify_indexes() runs explain("executionStats")
+on each and reports the winning plan, flagging any that fall back to a
+collection scan or that examine far more index keys / documents than they
+return (an index used only for its sort, or a whole-index scan).
+
+Name lookups go through the normalized *_key fields (src/name_keys.py);
+the explicit fuzzy (regex) fallbacks are not index-backed and not listed.
+Each index is created on its own, so one conflicting index (e.g. an
+existing index with other options) does not prevent the rest. Startup
+first pings MongoDB with a short timeout (MONGO_STARTUP_TIMEOUT_S) and
+skips the bootstrap when it is unreachable; losing the connection midway
+aborts it instead of waiting out a server-selection timeout per index.
+
+Usage (from the server directory):
+    python -m src.db_indexes ensure
+    python -m src.db_indexes verify      # exit code 1 if a hot query does a COLLSCAN or wide scan
+"""
+import argparse
+import json
+import os
+import sys
+
+import pymongo
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import ConnectionFailure, OperationFailure, PyMongoError
+
+from src.chat_store import CHAT_TTL_DAYS
+
+MONGO_ENSURE_INDEXES = os.getenv("MONGO_ENSURE_INDEXES", "1") == "1"
+MONGO_VERIFY_INDEXES = os.getenv("MONGO_VERIFY_INDEXES", "0") == "1"
+MONGO_STARTUP_TIMEOUT_S = float(os.getenv("MONGO_STARTUP_TIMEOUT_S", "2"))
+# A plan is a wide scan when it examines more than WIDE_SCAN_FACTOR keys or
+# documents per returned document, and more than WIDE_SCAN_MIN_EXAMINED overall
+WIDE_SCAN_FACTOR = 10
+WIDE_SCAN_MIN_EXAMINED = 100
+INDEX_NOT_FOUND = 27
+
+# collection -> indexes; _id is indexed by MongoDB itself
+INDEXES = {
+    "users": [
+        # /signUp duplicate check
+        IndexModel([("email", ASCENDING)], name="email_1"),
+        # /api/sellers keyset pages; the seller index load filters on role
+        IndexModel([("role_key", ASCENDING), ("state", ASCENDING), ("_id", ASCENDING)], name="role_key_1_state_1__id_1"),
+        # /api/request seller lookup by name
+        IndexModel([("fpcName_key", ASCENDING)], name="fpcName_key_1"),
+    ],
+    "crops": [
+        # /api/crops/get, /api/scheme/auto latest crop
+        IndexModel([("userID", ASCENDING), ("date", DESCENDING)], name="userID_1_date_-1"),
+    ],
+    "crop_history": [
+        # /api/crops/history
+        IndexModel([("userID", ASCENDING), ("date", DESCENDING)], name="userID_1_date_-1"),
+    ],
+    "requests": [
+        # accept/reject/delete by request id
+        IndexModel([("id", ASCENDING)], name="id_1"),
+        # /api/requests?farmer_id= and ?fpc_id=
+        IndexModel([("farmer_id", ASCENDING)], name="farmer_id_1"),
+        IndexModel([("fpc_id", ASCENDING)], name="fpc_id_1"),
+        # /api/requests?fpc_name=
+        IndexModel([("fpc_name_key", ASCENDING)], name="fpc_name_key_1"),
+    ],
+    "notifications": [
+        # marked read / deleted together with their request
+        IndexModel([("request_id", ASCENDING)], name="request_id_1"),
+        # /api/notifications?fpc_name=
+        IndexModel([("to_key", ASCENDING), ("timestamp", DESCENDING)], name="to_key_1_timestamp_-1"),
+    ],
+    "messages": [
+        # chat history per room, and ?since=<seq>
+        IndexModel([("room", ASCENDING), ("seq", ASCENDING), ("timestamp", ASCENDING), ("_id", ASCENDING)],
+                   name="room_1_seq_1_timestamp_1__id_1"),
+        # ?since=<timestamp>
+        IndexModel([("room", ASCENDING), ("timestamp", ASCENDING), ("_id", ASCENDING)],
+                   name="room_1_timestamp_1__id_1"),
+        # ?since=<message id>
+        IndexModel([("room", ASCENDING), ("id", ASCENDING)], name="room_1_id_1"),
+    ],
+}
+if CHAT_TTL_DAYS > 0:
+    # Chat messages expire CHAT_TTL_DAYS after they were sent
+    INDEXES["messages"].append(
+        IndexModel([("created_at", ASCENDING)], name="created_at_ttl",
+                   expireAfterSeconds=CHAT_TTL_DAYS * 86400)
+    )
+
+# Indexes replaced by the *_key ones above; dropped by ensure_indexes()
+LEGACY_INDEXES = {
+    "users": ["role_1_state_1__id_1", "fpcName_1"],
+    "notifications": ["to_1_timestamp_-1"],
+}
+
+# (collection, filter, sort) with placeholder values, one per hot query shape
+HOT_QUERIES = [
+    ("users", {"email": "probe@example.com"}, None),
+    ("users", {"role_key": "seller", "state": "West Bengal", "_id": {"$gt": ""}}, [("_id", ASCENDING)]),
+    ("users", {"role_key": "seller"}, None),
+    ("users", {"fpcName_key": "probe"}, None),
+    ("crops", {"userID": "probe"}, [("date", DESCENDING)]),
+    ("crop_history", {"userID": "probe"}, [("date", DESCENDING)]),
+    ("requests", {"id": "probe"}, None),
+    ("requests", {"farmer_id": "probe"}, None),
+    ("requests", {"fpc_id": "probe"}, None),
+    ("requests", {"fpc_name_key": "probe"}, None),
+    ("notifications", {"request_id": "probe"}, None),
+    ("notifications", {"to_key": "probe"}, [("timestamp", DESCENDING)]),
+    ("messages", {"room": "probe"}, [("seq", ASCENDING), ("timestamp", ASCENDING), ("_id", ASCENDING)]),
+    ("messages", {"room": "probe", "seq": {"$gt": 0}}, [("seq", ASCENDING), ("timestamp", ASCENDING), ("_id", ASCENDING)]),
+]
+
+
+def mongo_reachable(db, timeout_s: float = MONGO_STARTUP_TIMEOUT_S) -> bool:
+    """One ping bounded by timeout_s (server selection included)."""
+    try:
+        with pymongo.timeout(timeout_s):
+            db.command("ping")
+        return True
+    except PyMongoError as e:
+        print(f"[WARN] MongoDB unreachable: {e}")
+        return False
+
+
+def ensure_indexes(db) -> dict:
+    """
+    Create the declared indexes (no-op for existing ones), one at a time,
+    then drop the legacy ones they replace. Returns {"created": {collection:
+    [names]}, "dropped": {collection: [names]}, "failed": {index: error}}.
+    Raises ConnectionFailure as soon as MongoDB cannot be reached.
+    """
+    created, dropped, failed = {}, {}, {}
+    for name, models in INDEXES.items():
+        for model in models:
+            try:
+                created.setdefault(name, []).extend(db[name].create_indexes([model]))
+            except ConnectionFailure:
+                raise
+            except Exception as e:
+                failed[f"{name}.{model.document['name']}"] = str(e)
+    # After creation, so the replacement exists before the old index goes
+    for name, indexes in LEGACY_INDEXES.items():
+        for index in indexes:
+            try:
+                db[name].drop_index(index)
+                dropped.setdefault(name, []).append(index)
+            except OperationFailure as e:
+                if e.code != INDEX_NOT_FOUND and "index not found" not in str(e):
+                    failed[f"{name}.{index}"] = str(e)
+            except ConnectionFailure:
+                raise
+            except Exception as e:
+                failed[f"{name}.{index}"] = str(e)
+    return {"created": created, "dropped": dropped, "failed": failed}
+
+
+def _plan_stages(plan: dict) -> list:
+    """Stage names of a winning plan, outermost first."""
+    stages = []
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, dict):
+            continue
+        if "stage" in node:
+            stages.append(node["stage"])
+        # Classic engine: inputStage(s); SBE (5.x+): queryPlan wrapper
+        for key in ("queryPlan", "inputStage"):
+            if key in node:
+                stack.append(node[key])
+        stack.extend(node.get("inputStages", []))
+    return stages
+
+
+def explain_query(db, collection: str, query: dict, sort=None) -> dict:
+    cmd = {"find": collection, "filter": query}
+    if sort:
+        cmd["sort"] = dict(sort)
+    explained = db.command("explain", cmd, verbosity="executionStats")
+    stages = _plan_stages(explained["queryPlanner"]["winningPlan"])
+    stats = explained.get("executionStats", {})
+    returned = stats.get("nReturned", 0)
+    examined = max(stats.get("totalKeysExamined", 0), stats.get("totalDocsExamined", 0))
+    return {
+        "collection": collection,
+        "filter": json.dumps(query, default=str),
+        "sort": sort,
+        "stages": stages,
+        "returned": returned,
+        "keys_examined": stats.get("totalKeysExamined", 0),
+        "docs_examined": stats.get("totalDocsExamined", 0),
+        "collscan": "COLLSCAN" in stages,
+        "wide_scan": examined > WIDE_SCAN_MIN_EXAMINED and examined > WIDE_SCAN_FACTOR * max(returned, 1),
+    }
+
+
+def verify_indexes(db) -> list:
+    """explain("executionStats") every HOT_QUERIES entry."""
+    return [explain_query(db, c, q, s) for c, q, s in HOT_QUERIES]
+
+
+def bootstrap(db, verify: bool = MONGO_VERIFY_INDEXES) -> bool:
+    """
+    Startup hook: ensure indexes and optionally log collection / wide scans.
+    Never raises; returns False when MongoDB is unreachable.
+    """
+    if not mongo_reachable(db):
+        print("[WARN] Skipping MongoDB index bootstrap")
+        return False
+    try:
+        result = ensure_indexes(db)
+        for index, error in result["failed"].items():
+            print(f"[WARN] Could not create/drop index {index}: {error}")
+        for name, indexes in result["dropped"].items():
+            print(f"[INFO] Dropped legacy indexes on {name}: {', '.join(indexes)}")
+        print("[INFO] MongoDB indexes ensured")
+    except ConnectionFailure as e:
+        print(f"[WARN] Lost MongoDB connection, index bootstrap aborted: {e}")
+        return False
+    except Exception as e:
+        print(f"[WARN] Could not ensure MongoDB indexes: {e}")
+    if not verify:
+        return True
+    try:
+        for r in verify_indexes(db):
+            if r["collscan"]:
+                print(f"[WARN] COLLSCAN on {r['collection']} {r['filter']}")
+            elif r["wide_scan"]:
+                print(f"[WARN] Wide scan on {r['collection']} {r['filter']}: "
+                      f"{r['keys_examined']} keys / {r['docs_examined']} docs for {r['returned']} results")
+    except Exception as e:
+        print(f"[WARN] Index verification failed: {e}")
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MongoDB index bootstrap")
+    parser.add_argument("cmd", choices=["ensure", "verify"])
+    parser.add_argument("--mongo-uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017/krishiMitra"))
+    args = parser.parse_args(argv)
+
+    from pymongo import MongoClient
+
+    db = MongoClient(args.mongo_uri).get_default_database("krishiMitra")
+    if args.cmd == "ensure":
+        print(json.dumps(ensure_indexes(db), indent=2))
+        return 0
+
+    failed = ensure_indexes(db)["failed"]
+    for index, error in failed.items():
+        print(f"[WARN] Could not create/drop index {index}: {error}")
+    results = verify_indexes(db)
+    for r in results:
+        flag = "COLLSCAN" if r["collscan"] else "WIDE" if r["wide_scan"] else "ok"
+        print(f"{flag:>8}  {r['collection']:<14} {r['filter']}  {' <- '.join(r['stages'])}"
+              f"  ({r['keys_examined']} keys, {r['docs_examined']} docs, {r['returned']} returned)")
+    return 1 if any(r["collscan"] or r["wide_scan"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""
+Offline per-chunk digests for the FAISS stores.
+
+A digest is a short, query-independent summary of one indexed chunk,
+generated once at index build time and saved as digests.pkl next to
+metadata.pkl. At query time RAGSearch feeds digests straight into the final
+prompt instead of summarizing every retrieved chunk with an LLM call.
+
+digests.pkl also stores a hash of the chunk texts it was built from; a
+store whose chunks changed since (a rebuild) ignores the old digests.
+
+    python -m src.digests build --store faiss_store
+    python -m src.digests build --sharded faiss_shards --summarizer llm
+"""
+import hashlib
+import os
+import pickle
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+DIGESTS_FILE = "digests.pkl"
+
+_STOPWORDS = set("""
+a an and are as at be by for from has have in is it its of on or that the this to was were will with
+which who what when where how can may also such these those their they them than then there into
+per not no all any each other more most some only over under about up out so if but do does did
+""".split())
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?।])\s+|\n+")
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_RE.split(text or "") if s and s.strip()]
+
+
+class ExtractiveSummarizer:
+    """
+    Local summarizer: keeps the highest-scoring sentences by content-word
+    frequency, in their original order. Needs no network or model.
+    """
+
+    name = "extractive"
+
+    def __init__(self, max_sentences: int = 2, max_chars: int = 320):
+        self.max_sentences = max_sentences
+        self.max_chars = max_chars
+
+    def summarize(self, text: str) -> str:
+        sentences = split_sentences(text)
+        if not sentences:
+            return ""
+        if len(sentences) <= self.max_sentences:
+            return " ".join(sentences)[:self.max_chars]
+
+        words = [w for w in re.findall(r"[a-z0-9]+", text.lower()) if w not in _STOPWORDS and len(w) > 2]
+        freq = Counter(words)
+        if not freq:
+            return " ".join(sentences[:self.max_sentences])[:self.max_chars]
+        top = freq.most_common(1)[0][1]
+
+        scored = []
+        for i, sent in enumerate(sentences):
+            toks = [w for w in re.findall(r"[a-z0-9]+", sent.lower()) if w in freq]
+            if not toks:
+                continue
+            score = sum(freq[w] / top for w in toks) / (len(toks) ** 0.5)
+            scored.append((score, i))
+
+        keep = sorted(i for _, i in sorted(scored, reverse=True)[:self.max_sentences])
+        digest = " ".join(sentences[i] for i in keep)
+        return digest[:self.max_chars]
+
+
+class LLMSummarizer:
+    """Query-independent LLM digest; goes through the persistent response cache."""
+
+    name = "llm"
+
+    def __init__(self, llm=None, model_name: str = "llama-3.1-8b-instant"):
+        from src.llm_cache import CachedLLM, get_default_cache
+
+        if llm is None:
+            from langchain_groq import ChatGroq
+            llm = ChatGroq(groq_api_key=os.getenv("GROQ_API_KEY"), model_name=model_name)
+        self.llm = CachedLLM(llm, model_name, get_default_cache())
+
+    def summarize(self, text: str) -> str:
+        prompt = (
+            "You are an agricultural summarizer.\n"
+            f"Text Chunk:\n{text}\n\n"
+            "Summarize this chunk in 1–2 concise sentences, keeping crop names, quantities, "
+            "scheme names, eligibility and dates."
+        )
+        try:
+            resp = self.llm.invoke([prompt], template="chunk_digest")
+            return resp.content.strip()
+        except Exception as e:
+            print(f"[WARN] LLM digest failed: {e}")
+            return ""
+
+
+def get_summarizer(name: str = "extractive"):
+    if name == "llm":
+        return LLMSummarizer()
+    return ExtractiveSummarizer()
+
+
+def build_digests(texts: List[str], summarizer, workers: int = 1) -> List[str]:
+    """Digest every chunk text; failures become empty digests."""
+    print(f"[INFO] Building {summarizer.name} digests for {len(texts)} chunks...")
+
+    def one(text):
+        try:
+            return summarizer.summarize(text) if text and text.strip() else ""
+        except Exception as e:
+            print(f"[WARN] Digest failed: {e}")
+            return ""
+
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(one, texts))
+    return [one(t) for t in texts]
+
+
+def texts_hash(texts: List[str]) -> str:
+    h = hashlib.sha256()
+    for text in texts:
+        data = (text or "").encode("utf-8")
+        # Length prefix so chunk boundaries are part of the hash
+        h.update(len(data).to_bytes(8, "little"))
+        h.update(data)
+    return h.hexdigest()
+
+
+def save_digests(persist_dir: str, digests: List[str], texts: List[str]):
+    """Save digests together with the hash of the chunk texts they summarize."""
+    with open(os.path.join(persist_dir, DIGESTS_FILE), "wb") as f:
+        pickle.dump({"texts_hash": texts_hash(texts), "digests": digests}, f)
+    print(f"[INFO] Saved {len(digests)} digests to {persist_dir}")
+
+
+def load_digests(persist_dir: str, texts: List[str]):
+    """Digests of persist_dir, or None if there are none or they were built from other chunk texts."""
+    path = os.path.join(persist_dir, DIGESTS_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        data = pickle.load(f)
+    # Files from before the hash was stored are a bare list and cannot be checked
+    if not isinstance(data, dict) or data.get("texts_hash") != texts_hash(texts):
+        print(f"[WARN] Ignoring stale digests in {persist_dir}; rebuild them with 'python -m src.digests build'")
+        return None
+    return data["digests"]
+
+
+def delete_digests(persist_dir: str):
+    path = os.path.join(persist_dir, DIGESTS_FILE)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def build_for_store_dir(persist_dir: str, summarizer, workers: int = 1):
+    """Digest an already persisted store directory in place."""
+    with open(os.path.join(persist_dir, "metadata.pkl"), "rb") as f:
+        metadata = pickle.load(f)
+    texts = [(m or {}).get("text", "") for m in metadata]
+    save_digests(persist_dir, build_digests(texts, summarizer, workers), texts)
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Precompute per-chunk digests for the FAISS stores")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_build = sub.add_parser("build")
+    group = p_build.add_mutually_exclusive_group()
+    group.add_argument("--store", default="faiss_store", help="single store directory")
+    group.add_argument("--sharded", help="sharded store root (digests every shard)")
+    p_build.add_argument("--summarizer", choices=["extractive", "llm"], default="extractive")
+    p_build.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    summarizer = get_summarizer(args.summarizer)
+    if args.sharded:
+        with open(os.path.join(args.sharded, "shards.json"), "r", encoding="utf-8") as f:
+            shard_names = list(json.load(f))
+        for name in shard_names:
+            build_for_store_dir(os.path.join(args.sharded, name), summarizer, args.workers)
+    else:
+        build_for_store_dir(args.store, summarizer, args.workers)
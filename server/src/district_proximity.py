@@ -0,0 +1,252 @@
+"""
+Precomputed district-to-district proximity for the recommender's district term.
+
+geo/district_centroids.csv lists one centroid (lat, lon) per district. The
+build step turns it into a dense float16 matrix of proximity scores indexed by
+district code,
+
+    proximity = 0.3 + 0.7 * exp(-distance_km / DISTRICT_PROXIMITY_SCALE_KM)
+
+so the same district scores 1.0, a neighbour a little less, and a district
+across the country falls to the old 0.3 floor. Scoring a request is then one
+row lookup plus a gather over the seller district codes.
+
+The matrix is cached in cache/district_proximity.npz together with a hash of
+the centroid file and rebuilt automatically when the file changes; it can
+also be built ahead of time:
+
+    python -m src.district_proximity build
+    python -m src.district_proximity lookup Malda "Uttar Dinajpur"
+"""
+import argparse
+import hashlib
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DISTRICT_CENTROIDS_PATH = os.getenv("DISTRICT_CENTROIDS_PATH", os.path.join(BASE_DIR, "geo", "district_centroids.csv"))
+DISTRICT_PROXIMITY_PATH = os.getenv("DISTRICT_PROXIMITY_PATH", os.path.join(BASE_DIR, "cache", "district_proximity.npz"))
+DISTRICT_PROXIMITY_SCALE_KM = float(os.getenv("DISTRICT_PROXIMITY_SCALE_KM", "100"))
+DISTRICT_PROXIMITY_ENABLED = os.getenv("DISTRICT_PROXIMITY_ENABLED", "1") == "1"
+
+# Score for districts that are far apart (and the old "different district" value)
+PROXIMITY_FLOOR = 0.3
+EARTH_RADIUS_KM = 6371.0
+
+# Alternative spellings and old names -> name used in the centroid file (normalized)
+DISTRICT_ALIASES = {
+    "coochbehar": "cooch behar",
+    "koch bihar": "cooch behar",
+    "darjiling": "darjeeling",
+    "hugli": "hooghly",
+    "haora": "howrah",
+    "maldah": "malda",
+    "bardhaman": "purba bardhaman",
+    "burdwan": "purba bardhaman",
+    "medinipur": "paschim medinipur",
+    "midnapore": "paschim medinipur",
+    "east midnapore": "purba medinipur",
+    "west midnapore": "paschim medinipur",
+    "24 parganas north": "north 24 parganas",
+    "24 parganas south": "south 24 parganas",
+    "north twenty four parganas": "north 24 parganas",
+    "south twenty four parganas": "south 24 parganas",
+    "alipurdwar": "alipurduar",
+    "calcutta": "kolkata",
+    "purnea": "purnia",
+    "allahabad": "prayagraj",
+    "gurgaon": "gurugram",
+    "aurangabad maharashtra": "chhatrapati sambhajinagar",
+    "bangalore": "bengaluru urban",
+    "bengaluru": "bengaluru urban",
+    "mysore": "mysuru",
+    "belgaum": "belagavi",
+    "gulbarga": "kalaburagi",
+    "shimoga": "shivamogga",
+    "bellary": "ballari",
+    "tumkur": "tumakuru",
+    "mangalore": "dakshina kannada",
+    "trivandrum": "thiruvananthapuram",
+    "cochin": "ernakulam",
+    "kochi": "ernakulam",
+    "calicut": "kozhikode",
+    "trichy": "tiruchirappalli",
+    "madras": "chennai",
+    "bombay": "mumbai city",
+    "mumbai": "mumbai city",
+    "delhi": "new delhi",
+    "guwahati": "kamrup metropolitan",
+    "bhubaneswar": "khordha",
+    "jamshedpur": "east singhbhum",
+    "gangtok": "east sikkim",
+}
+
+_CLEAN_RE = re.compile(r"[^a-z0-9 ]+")
+
+
+def normalize_district(text) -> str:
+    """Lower case, punctuation dropped, trailing "district" removed, aliases folded."""
+    t = _CLEAN_RE.sub(" ", str(text or "").lower())
+    t = " ".join(t.split())
+    if t.endswith(" district"):
+        t = t[: -len(" district")]
+    return DISTRICT_ALIASES.get(t, t)
+
+
+def _file_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_centroids(path: str = DISTRICT_CENTROIDS_PATH) -> pd.DataFrame:
+    df = pd.read_csv(path)
+    df["district"] = df["district"].astype(str).str.strip()
+    df["state"] = df["state"].astype(str).str.strip()
+    return df.dropna(subset=["lat", "lon"]).reset_index(drop=True)
+
+
+def distance_matrix_km(lat, lon) -> np.ndarray:
+    """Pairwise haversine distances (km) between centroids."""
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def proximity_from_distance(dist_km: np.ndarray, scale_km: float = DISTRICT_PROXIMITY_SCALE_KM) -> np.ndarray:
+    return PROXIMITY_FLOOR + (1.0 - PROXIMITY_FLOOR) * np.exp(-dist_km / scale_km)
+
+
+class DistrictProximity:
+    """District names/states and their dense float16 proximity matrix."""
+
+    def __init__(self, districts: list, states: list, matrix: np.ndarray):
+        self.districts = list(districts)
+        self.states = list(states)
+        self.matrix = matrix
+        # normalized name -> codes (a name can exist in several states)
+        self._codes = {}
+        for code, name in enumerate(self.districts):
+            self._codes.setdefault(normalize_district(name), []).append(code)
+
+    def __len__(self):
+        return len(self.districts)
+
+    @classmethod
+    def empty(cls):
+        """No known districts: every lookup misses and callers fall back to name matching."""
+        return cls([], [], np.zeros((0, 0), dtype=np.float16))
+
+    @classmethod
+    def build(cls, centroids: pd.DataFrame, scale_km: float = DISTRICT_PROXIMITY_SCALE_KM):
+        dist = distance_matrix_km(centroids["lat"].to_numpy(), centroids["lon"].to_numpy())
+        matrix = proximity_from_distance(dist, scale_km).astype(np.float16)
+        return cls(centroids["district"].tolist(), centroids["state"].tolist(), matrix)
+
+    def save(self, path: str, source_hash: str = ""):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez_compressed(
+            path,
+            districts=np.array(self.districts),
+            states=np.array(self.states),
+            matrix=self.matrix,
+            source_hash=np.array(source_hash),
+        )
+
+    @classmethod
+    def load(cls, path: str):
+        data = np.load(path, allow_pickle=False)
+        obj = cls(data["districts"].tolist(), data["states"].tolist(), data["matrix"])
+        return obj, str(data["source_hash"])
+
+    def code(self, district, state=None) -> int:
+        """Matrix code of a district, or -1 if unknown. state disambiguates repeated names."""
+        codes = self._codes.get(normalize_district(district))
+        if not codes:
+            return -1
+        if len(codes) > 1 and state:
+            state_l = str(state).lower().strip()
+            for c in codes:
+                if self.states[c].lower() == state_l:
+                    return c
+        return codes[0]
+
+    def row(self, code: int) -> np.ndarray:
+        return self.matrix[code]
+
+
+_PROXIMITY = None
+_PROXIMITY_LOCK = threading.Lock()
+
+
+def load_or_build(centroids_path: str = DISTRICT_CENTROIDS_PATH,
+                  cache_path: str = DISTRICT_PROXIMITY_PATH) -> DistrictProximity:
+    """Cached matrix if it was built from the current centroid file, else rebuild and cache it."""
+    source_hash = _file_hash(centroids_path)
+    if os.path.exists(cache_path):
+        try:
+            prox, cached_hash = DistrictProximity.load(cache_path)
+            if cached_hash == source_hash:
+                return prox
+        except Exception as e:
+            print(f"[WARN] Could not read district proximity cache: {e}")
+    prox = DistrictProximity.build(load_centroids(centroids_path))
+    try:
+        prox.save(cache_path, source_hash)
+    except OSError as e:
+        print(f"[WARN] Could not write district proximity cache: {e}")
+    return prox
+
+
+def get_proximity() -> DistrictProximity:
+    """Process-wide DistrictProximity; empty when disabled or the centroid file is missing."""
+    global _PROXIMITY
+    if _PROXIMITY is None:
+        with _PROXIMITY_LOCK:
+            if _PROXIMITY is None:
+                if not DISTRICT_PROXIMITY_ENABLED or not os.path.exists(DISTRICT_CENTROIDS_PATH):
+                    _PROXIMITY = DistrictProximity.empty()
+                else:
+                    try:
+                        _PROXIMITY = load_or_build()
+                    except Exception as e:
+                        print(f"[WARN] District proximity unavailable: {e}")
+                        _PROXIMITY = DistrictProximity.empty()
+    return _PROXIMITY
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="District proximity matrix")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_build = sub.add_parser("build", help="build the matrix from the centroid file")
+    p_build.add_argument("--centroids", default=DISTRICT_CENTROIDS_PATH)
+    p_build.add_argument("--out", default=DISTRICT_PROXIMITY_PATH)
+    p_build.add_argument("--scale-km", type=float, default=DISTRICT_PROXIMITY_SCALE_KM)
+
+    p_lookup = sub.add_parser("lookup", help="proximity between two districts")
+    p_lookup.add_argument("a")
+    p_lookup.add_argument("b")
+
+    args = parser.parse_args(argv)
+    if args.cmd == "build":
+        prox = DistrictProximity.build(load_centroids(args.centroids), args.scale_km)
+        prox.save(args.out, _file_hash(args.centroids))
+        print(f"{len(prox)} districts, {prox.matrix.nbytes / 1024:.1f} KiB -> {args.out}")
+    else:
+        prox = get_proximity()
+        a, b = prox.code(args.a), prox.code(args.b)
+        if a < 0 or b < 0:
+            print("unknown district:", args.a if a < 0 else args.b)
+        else:
+            print(f"{prox.districts[a]} -> {prox.districts[b]}: {float(prox.matrix[a, b]):.3f}")
+
+
+if __name__ == "__main__":
+    main()
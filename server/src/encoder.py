@@ -0,0 +1,202 @@
+"""
+Sentence encoder loading with selectable CPU inference backends.
+
+All embedding in the RAG pipeline (vector store queries, index builds and the
+agriculture classifier) goes through load_encoder(), which returns one shared
+instance per (model, backend). The backend is chosen with EMBEDDING_BACKEND:
+
+    torch       eager PyTorch fp32 (default)
+    torch-int8  PyTorch with dynamic int8 quantization of the Linear layers
+    onnx        exported ONNX graph with dynamic int8 quantization
+
+The ONNX backend needs the packages in requirements-onnx.txt and a
+one-time export:
+    python -m src.encoder export --model all-MiniLM-L6-v2
+and can be checked against the fp32 model with:
+    python -m src.encoder parity --backend onnx
+"""
+import os
+import sys
+import threading
+import time
+
+from sentence_transformers import SentenceTransformer
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", os.path.join(BASE_DIR, "models", "onnx"))
+# One of: arm64, avx2, avx512, avx512_vnni
+ONNX_QUANTIZATION = os.getenv("ONNX_QUANTIZATION", "avx2")
+
+BACKENDS = ("torch", "torch-int8", "onnx")
+
+# Used by the single-pass multilingual chatbot mode: native-language queries are
+# embedded directly, so its stores must be built with the same model.
+MULTILINGUAL_EMBEDDING_MODEL = os.getenv("MULTILINGUAL_EMBEDDING_MODEL", "paraphrase-multilingual-MiniLM-L12-v2")
+
+_ENCODERS = {}
+_lock = threading.Lock()
+
+
+def onnx_export_dir(model_name: str) -> str:
+    return os.path.join(ONNX_MODEL_DIR, model_name.replace("/", "__"))
+
+
+def _onnx_file_name(quantization: str) -> str:
+    return f"onnx/model_qint8_{quantization}.onnx"
+
+
+def _load_torch_int8(model_name: str):
+    import torch
+
+    model = SentenceTransformer(model_name, device="cpu")
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _load_onnx(model_name: str):
+    export_dir = onnx_export_dir(model_name)
+    file_name = _onnx_file_name(ONNX_QUANTIZATION)
+    if not os.path.exists(os.path.join(export_dir, file_name)):
+        raise FileNotFoundError(
+            f"{os.path.join(export_dir, file_name)} not found. "
+            f"Run: python -m src.encoder export --model {model_name}"
+        )
+    return SentenceTransformer(
+        export_dir,
+        backend="onnx",
+        device="cpu",
+        model_kwargs={"file_name": file_name},
+    )
+
+
+def _load(model_name: str, backend: str):
+    if backend == "torch-int8":
+        return _load_torch_int8(model_name)
+    if backend == "onnx":
+        return _load_onnx(model_name)
+    return SentenceTransformer(model_name)
+
+
+def load_encoder(model_name: str = "all-MiniLM-L6-v2", backend: str = None):
+    """
+    Return a shared encoder for model_name using the requested backend.
+
+    Args:
+        model_name: SentenceTransformer model name or path
+        backend: 'torch', 'torch-int8' or 'onnx' (default: EMBEDDING_BACKEND)
+
+    Returns:
+        An object with the SentenceTransformer.encode API. Falls back to the
+        fp32 torch model if the requested backend cannot be loaded.
+    """
+    backend = backend or EMBEDDING_BACKEND
+    if backend not in BACKENDS:
+        print(f"[WARN] Unknown EMBEDDING_BACKEND '{backend}', using torch")
+        backend = "torch"
+
+    key = (model_name, backend)
+    with _lock:
+        if key in _ENCODERS:
+            return _ENCODERS[key]
+        try:
+            encoder = _load(model_name, backend)
+            print(f"[INFO] Loaded encoder {model_name} ({backend} backend)")
+        except Exception as e:
+            if backend == "torch":
+                raise
+            print(f"[WARN] Failed to load {backend} encoder for {model_name}: {e}. Falling back to torch.")
+            encoder = _ENCODERS.get((model_name, "torch")) or SentenceTransformer(model_name)
+            _ENCODERS[(model_name, "torch")] = encoder
+        _ENCODERS[key] = encoder
+        return encoder
+
+
+def export_onnx(model_name: str, quantization: str = ONNX_QUANTIZATION) -> str:
+    """Export model_name to ONNX and write a dynamically int8-quantized copy."""
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    export_dir = onnx_export_dir(model_name)
+    os.makedirs(export_dir, exist_ok=True)
+    print(f"[INFO] Exporting {model_name} to ONNX in {export_dir}...")
+    model = SentenceTransformer(model_name, backend="onnx", device="cpu")
+    model.save(export_dir)
+    export_dynamic_quantized_onnx_model(model, quantization, export_dir)
+    print(f"[INFO] Wrote {os.path.join(export_dir, _onnx_file_name(quantization))}")
+    return export_dir
+
+
+def _time_encode(encoder, texts, batch: bool) -> float:
+    start = time.perf_counter()
+    if batch:
+        encoder.encode(texts, batch_size=32)
+    else:
+        for t in texts:
+            encoder.encode(t)
+    return time.perf_counter() - start
+
+
+def check_parity(model_name: str, backend: str, min_cosine: float = 0.98) -> bool:
+    """
+    Compare a backend with the fp32 torch model on cosine similarity, and
+    report per-query and batch encode latency for both.
+    """
+    import numpy as np
+    from src.utils import AGRI_REFERENCE_TEXTS
+
+    texts = AGRI_REFERENCE_TEXTS + [
+        "How much urea should I apply to paddy per acre?",
+        "Which scheme gives subsidy for drip irrigation in West Bengal?",
+        "How do I control late blight in potato?",
+        "What is the minimum support price for wheat this year?",
+        "Who won the cricket match yesterday?",
+    ]
+
+    baseline = SentenceTransformer(model_name, device="cpu")
+    candidate = _load(model_name, backend)
+
+    ref = baseline.encode(texts, normalize_embeddings=True)
+    got = candidate.encode(texts, normalize_embeddings=True)
+    cos = np.sum(ref * got, axis=1)
+
+    # Ranking parity: nearest reference text for each query
+    ref_rank = np.argmax(ref[len(AGRI_REFERENCE_TEXTS):] @ ref[:len(AGRI_REFERENCE_TEXTS)].T, axis=1)
+    got_rank = np.argmax(got[len(AGRI_REFERENCE_TEXTS):] @ got[:len(AGRI_REFERENCE_TEXTS)].T, axis=1)
+
+    corpus = texts * 20
+    for enc in (baseline, candidate):
+        enc.encode(texts[:2])  # warm up
+
+    print(f"[INFO] Parity {backend} vs torch fp32 on {len(texts)} texts")
+    print(f"  cosine min={cos.min():.4f} mean={cos.mean():.4f}")
+    print(f"  nearest-reference agreement: {int((ref_rank == got_rank).sum())}/{len(ref_rank)}")
+    for name, enc in (("torch", baseline), (backend, candidate)):
+        per_query = _time_encode(enc, texts, batch=False) / len(texts) * 1000
+        batch = _time_encode(enc, corpus, batch=True)
+        print(f"  {name:>10}: {per_query:.2f} ms/query, {len(corpus) / batch:.1f} texts/s batched")
+
+    ok = bool(cos.min() >= min_cosine)
+    print(f"[{'INFO' if ok else 'ERROR'}] Parity {'passed' if ok else 'FAILED'} (threshold {min_cosine})")
+    return ok
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Encoder backend export and parity check")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_export = sub.add_parser("export", help="export an int8-quantized ONNX model")
+    p_export.add_argument("--model", default="all-MiniLM-L6-v2")
+    p_export.add_argument("--quantization", default=ONNX_QUANTIZATION)
+
+    p_parity = sub.add_parser("parity", help="compare a backend with fp32 torch")
+    p_parity.add_argument("--model", default="all-MiniLM-L6-v2")
+    p_parity.add_argument("--backend", choices=BACKENDS, default="onnx")
+    p_parity.add_argument("--min-cosine", type=float, default=0.98)
+
+    args = parser.parse_args()
+    if args.command == "export":
+        export_onnx(args.model, args.quantization)
+    else:
+        sys.exit(0 if check_parity(args.model, args.backend, args.min_cosine) else 1)
@@ -0,0 +1,244 @@
+"""
+Bulk import of FPC registries (e.g. data/FPC_sample_alipurduar.csv) as sellers.
+
+The CSV is streamed in chunks; each row is normalized into the users seller
+schema that /signUp writes (fpcName, district, commodities, contact_phone,
+...) and upserted with unordered bulk_write batches keyed on a stable _id
+(the registration number, else name + district), so re-importing a registry
+updates rows instead of duplicating them. Fields a seller edits themselves
+(rating, experience) are only set on first insert. Rows without a name or
+district are rejected and counted per reason. A row whose _id repeats an
+earlier row of the same file is rejected as "duplicate_in_file" (the first
+row wins) and the repeated ids are listed in the report.
+
+Only documents the importer created (source "fpc_import") are ever
+updated: a row whose _id belongs to a registered account is rejected as
+"id_taken" rather than overwriting that account.
+
+Imported sellers have no password. They show up in recommendations and
+can receive requests, but cannot log in.
+
+Usage (from the server directory):
+    python -m src.fpc_import data/FPC_sample_alipurduar.csv --state "West Bengal"
+    python -m src.fpc_import registry.csv --state Bihar --batch-size 2000 --dry-run
+"""
+import argparse
+import codecs
+import json
+import os
+import re
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from src.commodities import COMMODITY_SPLIT_RE
+from src.name_keys import with_keys
+
+FPC_IMPORT_BATCH_SIZE = int(os.getenv("FPC_IMPORT_BATCH_SIZE", "1000"))
+FPC_IMPORT_READ_ROWS = 5000
+# Bytes of an uploaded stream inspected to choose its encoding
+FPC_IMPORT_SNIFF_BYTES = 1 << 16
+DUPLICATE_KEY = 11000
+# Repeated ids listed in the import report; the reject count covers all of them
+FPC_IMPORT_MAX_LISTED_DUPLICATES = 50
+
+# Registry placeholders for "no value"
+_EMPTY_VALUES = {"", "-", "- - -", "--", "na", "n/a", "nil", "none", "null", "nan"}
+_NON_DIGIT_RE = re.compile(r"\D+")
+
+
+def _clean(value) -> str:
+    t = " ".join(str(value if value is not None else "").split())
+    return "" if t.lower() in _EMPTY_VALUES else t
+
+
+def _id_part(text: str) -> str:
+    return "".join(c for c in text.lower() if c.isalnum())
+
+
+def normalize_phone(value) -> str:
+    """10-digit Indian mobile number, or "" if the value is not one."""
+    digits = _NON_DIGIT_RE.sub("", str(value or ""))
+    if len(digits) == 12 and digits.startswith("91"):
+        digits = digits[2:]
+    elif len(digits) == 11 and digits.startswith("0"):
+        digits = digits[1:]
+    return digits if len(digits) == 10 and digits[0] in "6789" else ""
+
+
+def split_commodities(value) -> list:
+    """Split a registry commodity cell: "Paddy and Vegetable, Potato" -> [Paddy, Vegetable, Potato]."""
+    out = []
+    for part in COMMODITY_SPLIT_RE.split(_clean(value)):
+        name = _clean(part).strip(".").strip()
+        if name and name.lower() not in (c.lower() for c in out):
+            out.append(name.title() if name.islower() or name.isupper() else name)
+    return out
+
+
+def seller_doc_from_row(row: dict, state: str):
+    """
+    (doc, None) for a valid registry row, (None, reason) otherwise. doc is the
+    users document minus the insert-only fields.
+    """
+    name = _clean(row.get("FPC_Name"))
+    district = _clean(row.get("District"))
+    if not name:
+        return None, "missing_name"
+    if not district:
+        return None, "missing_district"
+
+    reg_no = _clean(row.get("Registration_No"))
+    uid = f"fpc{_id_part(reg_no)}" if reg_no else f"fpc{_id_part(name)}{_id_part(district)}"
+
+    doc = {
+        "_id": uid,
+        "role": "seller",
+        "state": state,
+        "fpcName": name,
+        "district": district.title() if district.islower() or district.isupper() else district,
+        "commodities": split_commodities(row.get("Commodities")),
+        "contact_phone": normalize_phone(row.get("Contact_Phone")) or normalize_phone(row.get("Office_Phone")),
+        "address": _clean(row.get("Address")),
+        "source": "fpc_import",
+    }
+    with_keys("users", doc)
+    if reg_no:
+        doc["registration_no"] = reg_no
+    person = _clean(row.get("Contact_Person"))
+    if person:
+        doc["contact_person"] = re.sub(r"^contact details\s*", "", person, flags=re.IGNORECASE)
+    return doc, None
+
+
+def detect_encoding(source) -> str:
+    """
+    utf-8 unless the file does not decode as such (government exports are
+    often cp1252). source is a path, checked in full, or a seekable binary
+    stream, of which the first FPC_IMPORT_SNIFF_BYTES are checked and the
+    position restored.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        if isinstance(source, str):
+            with open(source, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    decoder.decode(block)
+                decoder.decode(b"", final=True)
+        else:
+            pos = source.tell()
+            # Not final: the sample may end inside a multi-byte character
+            decoder.decode(source.read(FPC_IMPORT_SNIFF_BYTES))
+            source.seek(pos)
+        return "utf-8"
+    except UnicodeDecodeError:
+        if not isinstance(source, str):
+            source.seek(pos)
+        return "cp1252"
+
+
+def iter_rows(path_or_buffer, encoding: str = None):
+    """Stream CSV rows (from a path or file object) as dicts of strings."""
+    if encoding is None:
+        encoding = detect_encoding(path_or_buffer)
+    for frame in pd.read_csv(path_or_buffer, chunksize=FPC_IMPORT_READ_ROWS, dtype=str,
+                             keep_default_na=False, encoding=encoding, encoding_errors="replace"):
+        yield from frame.to_dict("records")
+
+
+def import_sellers(rows, collection, state: str, batch_size: int = FPC_IMPORT_BATCH_SIZE,
+                   seller_index=None, dry_run: bool = False) -> dict:
+    """
+    Upsert normalized registry rows into the users collection and return a
+    report (rows, inserted, updated, rejected per reason, duplicate_ids,
+    rows_per_s).
+    seller_index, if given, is reloaded once after the last batch.
+    """
+    started = time.perf_counter()
+    now = datetime.now(timezone.utc).isoformat()
+    report = {"rows": 0, "valid": 0, "inserted": 0, "updated": 0, "unchanged": 0,
+              "rejected": {}, "duplicate_ids": [], "batches": 0, "dry_run": dry_run}
+    batch = []
+    seen_ids = set()
+
+    def flush():
+        if not batch:
+            return
+        report["batches"] += 1
+        if not dry_run:
+            try:
+                result = collection.bulk_write(batch, ordered=False).bulk_api_result
+            except BulkWriteError as e:
+                result = e.details
+                errors = result.get("writeErrors", [])
+                if any(err.get("code") != DUPLICATE_KEY for err in errors):
+                    raise
+                # Upsert hit an existing account that the importer does not own
+                report["rejected"]["id_taken"] = report["rejected"].get("id_taken", 0) + len(errors)
+                report["valid"] -= len(errors)
+            report["inserted"] += result["nUpserted"]
+            report["updated"] += result["nModified"]
+            report["unchanged"] += result["nMatched"] - result["nModified"]
+        batch.clear()
+
+    for row in rows:
+        report["rows"] += 1
+        doc, reason = seller_doc_from_row(row, state)
+        if doc is None:
+            report["rejected"][reason] = report["rejected"].get(reason, 0) + 1
+            continue
+        uid = doc.pop("_id")
+        if uid in seen_ids:
+            # Same registration number (or name + district) twice in one file
+            report["rejected"]["duplicate_in_file"] = report["rejected"].get("duplicate_in_file", 0) + 1
+            if len(report["duplicate_ids"]) < FPC_IMPORT_MAX_LISTED_DUPLICATES and uid not in report["duplicate_ids"]:
+                report["duplicate_ids"].append(uid)
+            continue
+        seen_ids.add(uid)
+        report["valid"] += 1
+        batch.append(UpdateOne(
+            # Never match (and overwrite) an account the importer did not create
+            {"_id": uid, "source": "fpc_import"},
+            {
+                "$set": {**doc, "imported_at": now},
+                "$setOnInsert": {"rating": 5.0, "experience": 5, "created_at": now},
+            },
+            upsert=True,
+        ))
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+
+    if seller_index is not None and not dry_run:
+        seller_index.load()
+
+    elapsed = time.perf_counter() - started
+    report["rejected_total"] = sum(report["rejected"].values())
+    report["seconds"] = round(elapsed, 3)
+    report["rows_per_s"] = round(report["rows"] / elapsed, 1) if elapsed > 0 else None
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import an FPC registry CSV as sellers")
+    parser.add_argument("csv")
+    parser.add_argument("--state", required=True, help="state the registry belongs to")
+    parser.add_argument("--mongo-uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017/krishiMitra"))
+    parser.add_argument("--batch-size", type=int, default=FPC_IMPORT_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="normalize and count only, write nothing")
+    args = parser.parse_args(argv)
+
+    from pymongo import MongoClient
+
+    client = MongoClient(args.mongo_uri)
+    collection = client.get_default_database("krishiMitra").users
+    report = import_sellers(iter_rows(args.csv), collection, args.state,
+                            batch_size=args.batch_size, dry_run=args.dry_run)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+"""
+Local agriculture-intent classifier over MiniLM sentence embeddings.
+
+RAGSearch.is_agriculture_query uses it for queries whose similarity to the
+agriculture reference texts falls between the low and high thresholds, and
+only asks the LLM when the classifier's confidence is below the margin.
+Every LLM decision is appended to a JSONL log so it can be fed back in.
+
+The classifier is a setup artifact, not a committed file: the first time
+RAGSearch loads its embedding model and finds no classifier trained on it,
+one is trained from the seed examples plus logged LLM decisions and saved
+(models/agri_intent.pkl for all-MiniLM-L6-v2, a sibling file per other
+model). To train or retrain ahead of time, e.g. after the LLM log grew:
+    python -m src.intent_classifier train
+
+The low/high similarity thresholds depend on the embedding model. A model
+without configured thresholds is calibrated from the labelled examples
+(plus the native-script ones in agri_intent_examples_multilingual.csv for
+the multilingual model) the first time RAGSearch loads it, and the result
+is saved to models/agri_thresholds.json. To calibrate ahead of time:
+    python -m src.intent_classifier calibrate --model paraphrase-multilingual-MiniLM-L12-v2 --write
+"""
+import csv
+import json
+import os
+import pickle
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODEL_NAME = "all-MiniLM-L6-v2"
+MODEL_PATH = os.getenv("AGRI_INTENT_MODEL", os.path.join(BASE_DIR, "models", "agri_intent.pkl"))
+SEED_EXAMPLES_PATH = os.path.join(BASE_DIR, "training", "agri_intent_examples.csv")
+MULTILINGUAL_EXAMPLES_PATH = os.path.join(BASE_DIR, "training", "agri_intent_examples_multilingual.csv")
+THRESHOLDS_PATH = os.getenv("AGRI_SIM_THRESHOLDS_PATH", os.path.join(BASE_DIR, "models", "agri_thresholds.json"))
+LLM_DECISIONS_LOG = os.getenv("AGRI_LLM_DECISIONS_LOG", os.path.join(BASE_DIR, "logs", "agri_llm_decisions.jsonl"))
+# Minimum max(p, 1 - p) before the local decision is trusted
+MIN_CONFIDENCE = float(os.getenv("AGRI_INTENT_MIN_CONFIDENCE", "0.8"))
+
+# Hand-tuned (low, high) similarity thresholds per embedding model. Other
+# models use their calibration in THRESHOLDS_PATH; without one they get
+# (None, None): no similarity shortcut, the classifier / LLM decides.
+SIMILARITY_THRESHOLDS = {
+    "all-MiniLM-L6-v2": (0.28, 0.40),
+}
+
+_log_lock = threading.Lock()
+
+
+class AgriIntentClassifier:
+    def __init__(self, model, model_name: str = DEFAULT_MODEL_NAME, min_confidence: float = MIN_CONFIDENCE):
+        self.model = model
+        self.model_name = model_name
+        self.min_confidence = min_confidence
+
+    @classmethod
+    def load(cls, path: str = MODEL_PATH):
+        """Load a trained classifier, or return None if none has been trained."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                payload = pickle.load(f)
+            print(f"[INFO] Loaded agriculture intent classifier from {path}")
+            return cls(payload["model"], payload.get("model_name", DEFAULT_MODEL_NAME))
+        except Exception as e:
+            print(f"[WARN] Failed to load intent classifier {path}: {e}")
+            return None
+
+    def save(self, path: str = MODEL_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            pickle.dump({"model": self.model, "model_name": self.model_name}, f)
+        print(f"[INFO] Saved agriculture intent classifier to {path}")
+
+    def predict_proba(self, embedding) -> float:
+        """Probability that a single query embedding is agricultural."""
+        x = _to_matrix(embedding)
+        return float(self.model.predict_proba(x)[0, 1])
+
+    def decide(self, embedding) -> Tuple[Optional[bool], float]:
+        """
+        Returns (decision, probability). decision is None when the classifier
+        is not confident enough and the caller should fall back to the LLM.
+        """
+        p = self.predict_proba(embedding)
+        if max(p, 1.0 - p) < self.min_confidence:
+            return None, p
+        return p >= 0.5, p
+
+
+def _is_multilingual(model_name: str) -> bool:
+    from src.encoder import MULTILINGUAL_EMBEDDING_MODEL
+
+    return model_name == MULTILINGUAL_EMBEDDING_MODEL
+
+
+def _thresholds_env(model_name: str) -> str:
+    return "AGRI_SIM_THRESHOLDS_MULTILINGUAL" if _is_multilingual(model_name) else "AGRI_SIM_THRESHOLDS"
+
+
+def _load_calibrations(path: str = THRESHOLDS_PATH) -> dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[WARN] Could not read {path}: {e}")
+        return {}
+
+
+def similarity_thresholds(model_name: str, path: str = THRESHOLDS_PATH) -> Tuple[Optional[float], Optional[float]]:
+    """
+    (low, high) for a model: "low,high" from its env variable, else its
+    calibration in path, else SIMILARITY_THRESHOLDS, else (None, None).
+    """
+    value = os.getenv(_thresholds_env(model_name))
+    if value:
+        low, high = (float(v) for v in value.split(","))
+        return low, high
+    saved = _load_calibrations(path).get(model_name)
+    if saved:
+        return saved["low"], saved["high"]
+    return SIMILARITY_THRESHOLDS.get(model_name, (None, None))
+
+
+def save_thresholds(model_name: str, low, high, examples: int, path: str = THRESHOLDS_PATH):
+    calibrations = _load_calibrations(path)
+    calibrations[model_name] = {"low": low, "high": high, "examples": examples}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(calibrations, f, indent=2, sort_keys=True)
+    print(f"[INFO] Saved similarity thresholds for {model_name} to {path}")
+
+
+def classifier_path(model_name: str) -> str:
+    """MODEL_PATH for the default embedding model, a sibling file per other model."""
+    if model_name == DEFAULT_MODEL_NAME:
+        return MODEL_PATH
+    root, ext = os.path.splitext(MODEL_PATH)
+    return f"{root}.{''.join(c if c.isalnum() or c in '-_.' else '_' for c in model_name)}{ext}"
+
+
+def _to_matrix(embedding) -> np.ndarray:
+    if hasattr(embedding, "detach"):
+        embedding = embedding.detach().cpu().numpy()
+    x = np.asarray(embedding, dtype="float32")
+    if x.ndim == 1:
+        x = x.reshape(1, -1)
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    return x / np.maximum(norms, 1e-12)
+
+
+def log_llm_decision(text: str, is_agri: bool, path: str = LLM_DECISIONS_LOG):
+    """Append an LLM classification to the training log."""
+    if not path:
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        line = json.dumps({"text": text, "label": int(bool(is_agri))}, ensure_ascii=False)
+        with _log_lock, open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except Exception as e:
+        print(f"[WARN] Failed to log LLM decision: {e}")
+
+
+def load_training_examples(seed_path: str = SEED_EXAMPLES_PATH,
+                           log_path: str = LLM_DECISIONS_LOG, extra_paths=()) -> Tuple[List[str], List[int]]:
+    """
+    Seed examples (text,label CSV) and any extra_paths CSVs plus logged LLM
+    decisions; later labels win on duplicates.
+    """
+    examples = {}
+    for path in [seed_path, *extra_paths]:
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    text = (row.get("text") or "").strip()
+                    if text:
+                        examples[text.lower()] = (text, int(row["label"]))
+    if log_path and os.path.exists(log_path):
+        with open(log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                text = (rec.get("text") or "").strip()
+                if text:
+                    examples[text.lower()] = (text, int(rec["label"]))
+    texts = [t for t, _ in examples.values()]
+    labels = [l for _, l in examples.values()]
+    return texts, labels
+
+
+def calibrate_thresholds(encoder, reference_texts: List[str], texts: List[str], labels: List[int],
+                         precision: float = 0.95) -> Tuple[Optional[float], Optional[float]]:
+    """
+    (low, high) similarity thresholds for an encoder: at or above high at
+    least `precision` of the labelled examples are agricultural, at or below
+    low at least `precision` are not. None where no threshold reaches it.
+    """
+    from sentence_transformers import util
+
+    refs = encoder.encode(reference_texts, convert_to_tensor=True)
+    embs = encoder.encode(texts, convert_to_tensor=True, batch_size=64)
+    sims = util.cos_sim(embs, refs).max(dim=1).values.cpu().numpy()
+    order = np.argsort(sims)
+    s, y = sims[order], np.asarray(labels)[order]
+
+    high = None
+    # Scan from the top down, keeping the lowest cut whose upper side is still precise
+    agri = 0
+    for n, i in enumerate(range(len(s) - 1, -1, -1), start=1):
+        agri += y[i]
+        if agri / n >= precision:
+            high = float(s[i])
+    low = None
+    other = 0
+    for n, i in enumerate(range(len(s)), start=1):
+        other += 1 - y[i]
+        if other / n >= precision:
+            low = float(s[i])
+    return low, high
+
+
+def calibration_examples(model_name: str, seed_path: str = SEED_EXAMPLES_PATH,
+                         log_path: str = LLM_DECISIONS_LOG) -> Tuple[List[str], List[int]]:
+    """Labelled examples for calibrating or training on a model; native-script ones too for the multilingual model."""
+    extra = [MULTILINGUAL_EXAMPLES_PATH] if _is_multilingual(model_name) else []
+    return load_training_examples(seed_path, log_path, extra)
+
+
+def ensure_thresholds(encoder, model_name: str, reference_texts: List[str],
+                      path: str = THRESHOLDS_PATH) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Startup check: similarity_thresholds() of a model, calibrating and
+    saving them first if the model has none.
+    """
+    low, high = similarity_thresholds(model_name, path)
+    if low is not None or high is not None:
+        return low, high
+    texts, labels = calibration_examples(model_name)
+    if len(set(labels)) < 2:
+        return None, None
+    print(f"[INFO] Calibrating similarity thresholds for {model_name} on {len(texts)} examples...")
+    low, high = calibrate_thresholds(encoder, reference_texts, texts, labels)
+    if low is not None and high is not None and low >= high:
+        print(f"[WARN] Calibration of {model_name} did not separate the examples (low={low:.3f}, high={high:.3f})")
+        low = high = None
+    try:
+        save_thresholds(model_name, low, high, len(texts), path)
+    except OSError as e:
+        print(f"[WARN] Could not save similarity thresholds: {e}")
+    return low, high
+
+
+def ensure_classifier(encoder, model_name: str, path: str = None) -> Optional[AgriIntentClassifier]:
+    """
+    Startup check: the classifier saved for a model, training and saving it
+    first if there is none or the saved one was trained on another model.
+    None if there are not enough labelled examples.
+    """
+    path = path or classifier_path(model_name)
+    classifier = AgriIntentClassifier.load(path)
+    if classifier is not None and classifier.model_name == model_name:
+        return classifier
+    texts, labels = calibration_examples(model_name)
+    if len(set(labels)) < 2:
+        print(f"[WARN] No intent classifier for {model_name}: need both positive and negative examples")
+        return None
+    print(f"[INFO] Training agriculture intent classifier for {model_name} on {len(texts)} examples...")
+    classifier = train(encoder, texts, labels, model_name)
+    try:
+        classifier.save(path)
+    except OSError as e:
+        print(f"[WARN] Could not save intent classifier: {e}")
+    return classifier
+
+
+def train(encoder, texts: List[str], labels: List[int], model_name: str = DEFAULT_MODEL_NAME) -> AgriIntentClassifier:
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.model_selection import cross_val_score
+
+    x = _to_matrix(encoder.encode(texts, batch_size=64))
+    y = np.asarray(labels)
+    clf = LogisticRegression(C=4.0, class_weight="balanced", max_iter=2000)
+
+    folds = min(5, int(np.bincount(y).min())) if len(set(labels)) > 1 else 0
+    if folds >= 2:
+        scores = cross_val_score(clf, x, y, cv=folds)
+        print(f"[INFO] {folds}-fold CV accuracy: {scores.mean():.3f} (+/- {scores.std():.3f})")
+    clf.fit(x, y)
+    return AgriIntentClassifier(clf, model_name)
+
+
+if __name__ == "__main__":
+    import argparse
+    from src.encoder import load_encoder
+
+    parser = argparse.ArgumentParser(description="Train the local agriculture intent classifier")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_train = sub.add_parser("train")
+    p_train.add_argument("--seed", default=SEED_EXAMPLES_PATH)
+    p_train.add_argument("--llm-log", default=LLM_DECISIONS_LOG)
+    p_train.add_argument("--model", default=DEFAULT_MODEL_NAME)
+    p_train.add_argument("--out", help="default: the model's classifier path")
+    p_calibrate = sub.add_parser("calibrate", help="calibrate similarity thresholds for a model")
+    p_calibrate.add_argument("--seed", default=SEED_EXAMPLES_PATH)
+    p_calibrate.add_argument("--llm-log", default=LLM_DECISIONS_LOG)
+    p_calibrate.add_argument("--model", default=DEFAULT_MODEL_NAME)
+    p_calibrate.add_argument("--precision", type=float, default=0.95)
+    p_calibrate.add_argument("--write", action="store_true", help=f"save the result to {THRESHOLDS_PATH}")
+    p_predict = sub.add_parser("predict")
+    p_predict.add_argument("text")
+    p_predict.add_argument("--path", default=MODEL_PATH)
+    args = parser.parse_args()
+
+    if args.command == "train":
+        texts, labels = calibration_examples(args.model, args.seed, args.llm_log)
+        print(f"[INFO] Training on {len(texts)} examples ({sum(labels)} agriculture)")
+        if len(set(labels)) < 2:
+            raise SystemExit("[ERROR] Need both positive and negative examples")
+        classifier = train(load_encoder(args.model), texts, labels, args.model)
+        classifier.save(args.out or classifier_path(args.model))
+    elif args.command == "calibrate":
+        from src.utils import AGRI_REFERENCE_TEXTS
+
+        texts, labels = calibration_examples(args.model, args.seed, args.llm_log)
+        low, high = calibrate_thresholds(load_encoder(args.model), AGRI_REFERENCE_TEXTS, texts, labels,
+                                         args.precision)
+        print(f"[INFO] {args.model} on {len(texts)} examples: low={low} high={high}")
+        if low is not None and high is not None and low < high:
+            print(f"{_thresholds_env(args.model)}=\"{low:.3f},{high:.3f}\"")
+            if args.write:
+                save_thresholds(args.model, low, high, len(texts))
+    else:
+        classifier = AgriIntentClassifier.load(args.path)
+        if classifier is None:
+            raise SystemExit(f"[ERROR] No classifier at {args.path}")
+        emb = load_encoder(classifier.model_name).encode(args.text)
+        decision, p = classifier.decide(emb)
+        print(f"p(agriculture)={p:.3f} decision={decision}")
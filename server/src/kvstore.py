@@ -0,0 +1,204 @@
+"""
+Small SQLite-backed key/value store shared by all worker processes on a host.
+
+The database runs in WAL mode so readers never block the single writer, and
+each thread keeps its own connection. Entries are evicted least-recently-used
+once the table grows past max_entries, and optionally expire after a TTL.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+# Access times are only rewritten when older than this, to keep hits read-mostly
+_TOUCH_INTERVAL = 60.0
+
+
+class SqliteKVStore:
+    def __init__(self, path: str, table: str = "kv", max_entries: int = 50000,
+                 ttl_seconds: float = None, evict_check_every: int = 200):
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.evict_check_every = evict_check_every
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes_since_check = 0
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "expired": 0}
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_accessed ON {self.table}(accessed)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _bump(self, name: str, n: int = 1):
+        with self._lock:
+            self._stats[name] += n
+
+    def get(self, key: str):
+        try:
+            conn = self._conn()
+            row = conn.execute(
+                f"SELECT value, created, accessed FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"[WARN] KV store read failed ({self.path}): {e}")
+            return None
+
+        if row is None:
+            self._bump("misses")
+            return None
+
+        value, created, accessed = row
+        now = time.time()
+        if self.ttl_seconds and now - created > self.ttl_seconds:
+            self.delete(key)
+            self._bump("expired")
+            self._bump("misses")
+            return None
+
+        if now - accessed > _TOUCH_INTERVAL:
+            try:
+                conn.execute(f"UPDATE {self.table} SET accessed = ? WHERE key = ?", (now, key))
+                conn.commit()
+            except sqlite3.Error:
+                pass
+        self._bump("hits")
+        return value
+
+    def get_many(self, keys) -> dict:
+        """
+        Look up several keys in one query; returns {key: value} for the hits.
+        Stale access times on the hits are refreshed in one UPDATE, as get() does.
+        """
+        keys = list(keys)
+        found = {}
+        for i in range(0, len(keys), 500):
+            batch = keys[i:i + 500]
+            try:
+                conn = self._conn()
+                rows = conn.execute(
+                    f"SELECT key, value, created, accessed FROM {self.table} "
+                    f"WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+            except sqlite3.Error as e:
+                print(f"[WARN] KV store read failed ({self.path}): {e}")
+                continue
+            now = time.time()
+            touch = []
+            for key, value, created, accessed in rows:
+                if self.ttl_seconds and now - created > self.ttl_seconds:
+                    self._bump("expired")
+                    continue
+                found[key] = value
+                if now - accessed > _TOUCH_INTERVAL:
+                    touch.append(key)
+            if touch:
+                try:
+                    conn.execute(
+                        f"UPDATE {self.table} SET accessed = ? WHERE key IN ({','.join('?' * len(touch))})",
+                        [now, *touch],
+                    )
+                    conn.commit()
+                except sqlite3.Error:
+                    pass
+        self._bump("hits", len(found))
+        self._bump("misses", len(keys) - len(found))
+        return found
+
+    def set(self, key: str, value: str):
+        self.set_many([(key, value)])
+
+    def set_many(self, items):
+        items = list(items)
+        if not items:
+            return
+        now = time.time()
+        try:
+            conn = self._conn()
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                [(k, v, now, now) for k, v in items],
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"[WARN] KV store write failed ({self.path}): {e}")
+            return
+
+        self._bump("writes", len(items))
+        with self._lock:
+            self._writes_since_check += len(items)
+            due = self._writes_since_check >= self.evict_check_every
+            if due:
+                self._writes_since_check = 0
+        if due:
+            self.evict()
+
+    def delete(self, key: str):
+        try:
+            conn = self._conn()
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            conn.commit()
+        except sqlite3.Error:
+            pass
+
+    def evict(self):
+        """Drop expired entries, then the least recently used ones above max_entries."""
+        try:
+            conn = self._conn()
+            removed = 0
+            if self.ttl_seconds:
+                cur = conn.execute(f"DELETE FROM {self.table} WHERE created < ?", (time.time() - self.ttl_seconds,))
+                self._bump("expired", cur.rowcount)
+            count = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+            if count > self.max_entries:
+                # Trim to 90% so eviction does not run on every write
+                excess = count - int(self.max_entries * 0.9)
+                cur = conn.execute(
+                    f"DELETE FROM {self.table} WHERE key IN "
+                    f"(SELECT key FROM {self.table} ORDER BY accessed ASC LIMIT ?)",
+                    (excess,),
+                )
+                removed = cur.rowcount
+            conn.commit()
+            self._bump("evictions", removed)
+        except sqlite3.Error as e:
+            print(f"[WARN] KV store eviction failed ({self.path}): {e}")
+
+    def __len__(self) -> int:
+        try:
+            return self._conn().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["entries"] = len(self)
+        stats["max_entries"] = self.max_entries
+        stats["ttl_seconds"] = self.ttl_seconds
+        return stats
+
+    def clear(self):
+        try:
+            conn = self._conn()
+            conn.execute(f"DELETE FROM {self.table}")
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"[WARN] KV store clear failed ({self.path}): {e}")
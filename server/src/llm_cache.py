@@ -0,0 +1,111 @@
+"""
+Persistent, content-addressed cache for LLM responses.
+
+Keys are a SHA-256 of (model name, prompt template name and version, full
+prompt), so identical prompts are answered from disk by any worker on the
+host. Bump a template's version in PROMPT_TEMPLATE_VERSIONS whenever its
+prompt text changes to invalidate the old entries.
+"""
+import hashlib
+import os
+
+from src.kvstore import SqliteKVStore
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(BASE_DIR, "cache", "llm_cache.sqlite3"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))
+
+# Bump a version when the corresponding prompt text changes
+PROMPT_TEMPLATE_VERSIONS = {
+    "agri_classify": 1,
+    "chunk_summary": 1,
+    "chunk_digest": 1,
+    "final_answer": 1,
+    "fallback_answer": 1,
+    "translate_in": 1,
+    "translate_out": 1,
+}
+
+
+def _prompt_text(prompt) -> str:
+    if isinstance(prompt, str):
+        return prompt
+    parts = []
+    for m in prompt:
+        parts.append(m if isinstance(m, str) else f"{getattr(m, 'type', '')}:{getattr(m, 'content', m)}")
+    return "\n".join(parts)
+
+
+def cache_key(model_name: str, template: str, prompt) -> str:
+    version = PROMPT_TEMPLATE_VERSIONS.get(template, 1)
+    h = hashlib.sha256()
+    for part in (model_name, f"{template}@{version}", _prompt_text(prompt)):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class CachedResponse:
+    """Minimal stand-in for an AIMessage served from the cache."""
+
+    def __init__(self, content: str):
+        self.content = content
+        self.usage_metadata = {}
+        self.response_metadata = {"cache_hit": True}
+
+
+class LLMResponseCache(SqliteKVStore):
+    def __init__(self, path: str = LLM_CACHE_PATH, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        super().__init__(path, table="llm_responses", max_entries=max_entries)
+
+
+class CachedLLM:
+    """
+    Wraps a chat model so invoke() is served from the response cache.
+
+    Call sites name their prompt template (invoke(prompt, template="chunk_summary"))
+    so edits to one prompt only invalidate that template's entries. Errors and
+    empty responses are never cached.
+    """
+
+    def __init__(self, llm, model_name: str, cache: LLMResponseCache = None):
+        self.llm = llm
+        self.model_name = model_name
+        self.cache = cache
+
+    def invoke(self, prompt, template: str = "default", **kwargs):
+        if self.cache is None:
+            return self.llm.invoke(prompt, **kwargs)
+
+        key = cache_key(self.model_name, template, prompt)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return CachedResponse(cached)
+
+        resp = self.llm.invoke(prompt, **kwargs)
+        content = getattr(resp, "content", None)
+        if isinstance(content, str) and content.strip():
+            self.cache.set(key, content)
+        return resp
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    """Process-wide cache at LLM_CACHE_PATH, or None when disabled."""
+    global _default_cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    if _default_cache is None:
+        try:
+            _default_cache = LLMResponseCache()
+        except Exception as e:
+            print(f"[WARN] LLM response cache unavailable: {e}")
+            return None
+    return _default_cache
@@ -0,0 +1,105 @@
+"""
+Normalized lookup keys for case-insensitive name matching.
+
+Names such as users.fpcName or notifications.to used to be matched with
+case-insensitive regexes, which cannot use an index. Every document now also
+carries a lower-case, whitespace-collapsed copy of those fields (KEY_FIELDS),
+written at insert time through with_keys(), so lookups are exact equality on
+an indexed field. migrate_keys() backfills documents written before the
+keys existed; it is idempotent. The server calls ensure_keys() at startup,
+independently of index creation, and refuses to start while any document
+still lacks its key (such documents would silently drop out of lookups).
+The check is skipped when the startup ping (src/db_indexes.py) found
+MongoDB unreachable.
+
+Usage (from the server directory):
+    python -m src.name_keys migrate
+"""
+import argparse
+import json
+import os
+
+from pymongo import UpdateOne
+
+KEY_MIGRATION_BATCH_SIZE = 1000
+MONGO_MIGRATE_KEYS = os.getenv("MONGO_MIGRATE_KEYS", "1") == "1"
+
+# collection -> {source field: key field}
+KEY_FIELDS = {
+    "users": {"fpcName": "fpcName_key", "role": "role_key"},
+    "requests": {"fpc_name": "fpc_name_key"},
+    "notifications": {"to": "to_key"},
+}
+
+
+def name_key(value) -> str:
+    """Lower case with whitespace collapsed: " Tapsikhata  FPC Ltd" -> "tapsikhata fpc ltd"."""
+    return " ".join(str(value or "").split()).lower()
+
+
+def with_keys(collection: str, doc: dict) -> dict:
+    """doc with the key fields of its collection filled in (modified in place)."""
+    for field, key in KEY_FIELDS.get(collection, {}).items():
+        if doc.get(field) is not None:
+            doc[key] = name_key(doc[field])
+    return doc
+
+
+def migrate_keys(db, batch_size: int = KEY_MIGRATION_BATCH_SIZE) -> dict:
+    """Backfill missing key fields. Returns collection -> number of documents updated."""
+    updated = {}
+    for collection, fields in KEY_FIELDS.items():
+        count = 0
+        for field, key in fields.items():
+            # {key: None} also matches a missing field and can use the key's index
+            cursor = db[collection].find({key: None, field: {"$type": "string"}}, {field: 1})
+            ops = []
+            for doc in cursor:
+                ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {key: name_key(doc[field])}}))
+                if len(ops) >= batch_size:
+                    count += db[collection].bulk_write(ops, ordered=False).modified_count
+                    ops = []
+            if ops:
+                count += db[collection].bulk_write(ops, ordered=False).modified_count
+        updated[collection] = count
+    return updated
+
+
+def missing_keys(db) -> dict:
+    """collection -> key fields that some document is still missing."""
+    missing = {}
+    for collection, fields in KEY_FIELDS.items():
+        for field, key in fields.items():
+            if db[collection].find_one({key: None, field: {"$type": "string"}}, {"_id": 1}):
+                missing.setdefault(collection, []).append(key)
+    return missing
+
+
+def ensure_keys(db, migrate: bool = MONGO_MIGRATE_KEYS) -> dict:
+    """
+    Startup check: backfill keys (unless migrate=False), then raise
+    RuntimeError if any document still lacks one.
+    """
+    updated = migrate_keys(db) if migrate else {}
+    missing = missing_keys(db)
+    if missing:
+        raise RuntimeError(
+            f"Documents without lookup keys {missing}; run 'python -m src.name_keys migrate'"
+        )
+    return updated
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill normalized lookup keys")
+    parser.add_argument("cmd", choices=["migrate"])
+    parser.add_argument("--mongo-uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017/krishiMitra"))
+    args = parser.parse_args(argv)
+
+    from pymongo import MongoClient
+
+    db = MongoClient(args.mongo_uri).get_default_database("krishiMitra")
+    print(json.dumps(migrate_keys(db), indent=2))
+
+
+if __name__ == "__main__":
+    main()
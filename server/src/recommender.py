@@ -0,0 +1,149 @@
+"""
+Vectorized scoring for the marketplace recommender (/api/recommend).
+
+SellerColumns holds the seller features as column arrays aligned by row:
+rating, experience and district codes, plus a commodity inverted index
+(src/commodities.py) for the crop filter. The district term comes from the
+precomputed proximity matrix (src/district_proximity.py); districts missing
+from it keep the old exact/substring match (1.0 / 0.7 / 0.3). Filtering, normalization and the
+weighted final score are single NumPy passes over those arrays, followed by
+an argpartition top-k. The scoring rules are the ones /api/recommend has
+always used:
+
+    final = 0.40 * rating_norm + 0.25 * district + 0.20 * commodity
+          + 0.10 * experience_norm + 0.05 * bm25_norm
+"""
+import numpy as np
+
+from src.commodities import CommodityIndex, parse_commodities
+from src.district_proximity import get_proximity
+
+WEIGHTS = {
+    "rating": 0.40,
+    "district": 0.25,
+    "commodity": 0.20,
+    "experience": 0.10,
+    "bm25": 0.05,
+}
+
+
+class SellerColumns:
+    """Column-oriented, read-only view of a list of seller dicts."""
+
+    def __init__(self, sellers: list, proximity=None):
+        self.sellers = sellers
+        self.proximity = proximity if proximity is not None else get_proximity()
+        self.ids = [s.get("_id") for s in sellers]
+        self.row_of = {sid: i for i, sid in enumerate(self.ids)}
+        n = len(sellers)
+
+        self.rating = np.fromiter((s.get("rating", 5.0) for s in sellers), dtype=np.float64, count=n)
+        self.experience = np.fromiter((s.get("years_of_experience", 5.0) for s in sellers), dtype=np.float64, count=n)
+
+        # District codes; code 0 is reserved for an empty district.
+        # proximity_codes maps each code to its proximity-matrix row (-1: unknown).
+        self.districts = [""]
+        prox_codes = [-1]
+        district_code = {("", ""): 0}
+        codes = np.empty(n, dtype=np.int32)
+        for i, s in enumerate(sellers):
+            d = str(s.get("district", "") or "").lower().strip()
+            st = str(s.get("state", "") or "").lower().strip()
+            if (d, st) not in district_code:
+                district_code[(d, st)] = len(self.districts)
+                self.districts.append(d)
+                prox_codes.append(self.proximity.code(d, st) if d else -1)
+            codes[i] = district_code[(d, st)]
+        self.district_codes = codes
+        self.proximity_codes = np.asarray(prox_codes, dtype=np.int64)
+
+        # Canonical commodity -> rows posting lists
+        self.commodity_index = CommodityIndex([parse_commodities(s.get("commodities", "")) for s in sellers])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def district_scores(self, farmer_district: str, farmer_state: str = "") -> np.ndarray:
+        """
+        District score for every row. When the farmer's district is in the
+        proximity matrix, known seller districts take their score from its
+        row; the rest fall back to exact/substring name matching.
+        """
+        farmer = str(farmer_district or "").lower().strip()
+        per_code = np.full(len(self.districts), 0.3)
+        if not farmer:
+            return per_code[self.district_codes]
+
+        fallback = range(len(self.districts))
+        farmer_code = self.proximity.code(farmer, farmer_state)
+        if farmer_code >= 0:
+            known = self.proximity_codes >= 0
+            per_code[known] = self.proximity.row(farmer_code)[self.proximity_codes[known]]
+            fallback = np.flatnonzero(~known)
+
+        for code in fallback:
+            d = self.districts[code]
+            if not d:
+                continue
+            if d == farmer:
+                per_code[code] = 1.0
+            elif farmer in d or d in farmer:
+                per_code[code] = 0.7
+        return per_code[self.district_codes]
+
+
+def _normalize(values: np.ndarray) -> np.ndarray:
+    lo, hi = values.min(), values.max()
+    if hi == lo:
+        return np.full(values.shape, 0.5)
+    return (values - lo) / (hi - lo)
+
+
+def rank_sellers(columns: SellerColumns, crop_input: str, district_input: str,
+                 bm25_scores: dict, top_k: int = None, crop_match: str = "any",
+                 state_input: str = ""):
+    """
+    Score the sellers matching crop_input and return (rows, final_scores) of
+    the best top_k (all matches when top_k is None), best first. Ties keep
+    index order. crop_match="any" keeps sellers carrying any query crop,
+    "all" only those carrying every one. state_input only disambiguates
+    district names shared by several states.
+    """
+    n = len(columns)
+    if n == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+
+    crops = parse_commodities(crop_input)
+    if crops:
+        rows, counts = columns.commodity_index.match(crops, crop_match)
+        commodity = counts / len(crops)
+    else:
+        rows = np.arange(n)
+        commodity = np.full(n, 0.5)
+    if rows.size == 0:
+        return rows, np.empty(0)
+
+    bm25 = np.zeros(n)
+    for sid, score in bm25_scores.items():
+        row = columns.row_of.get(sid)
+        if row is not None:
+            bm25[row] = score
+    bm25 = bm25[rows]
+    max_b = bm25.max()
+    bm25_norm = bm25 / (max_b if max_b > 0 else 1.0)
+
+    final = (
+        _normalize(columns.rating[rows]) * WEIGHTS["rating"] +
+        columns.district_scores(district_input, state_input)[rows] * WEIGHTS["district"] +
+        commodity * WEIGHTS["commodity"] +
+        _normalize(columns.experience[rows]) * WEIGHTS["experience"] +
+        bm25_norm * WEIGHTS["bm25"]
+    )
+
+    if top_k is not None and 0 < top_k < rows.size:
+        part = np.argpartition(-final, top_k - 1)[:top_k]
+        # Stable order within the top-k (best first, then index order)
+        order = part[np.lexsort((part, -final[part]))]
+    else:
+        order = np.argsort(-final, kind="stable")
+    return rows[order], final[order]
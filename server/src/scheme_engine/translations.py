@@ -0,0 +1,163 @@
+"""
+Pre-translated scheme catalog.
+
+The scheme fields shown to users (scheme_name, state_ministry, description)
+come from the static new_allschemes.csv, so they are translated offline into
+every language in SUPPORTED_LANGUAGES and stored in a side table,
+scheme_translations.csv (lang, source, translated), loaded alongside the
+scheme snapshot. localize_scheme() serves responses from that table and only
+falls back to live translation for strings it does not cover.
+
+Build or resume the table (from the server directory):
+    python -m src.scheme_engine.translations build --workers 4 --rate 5
+"""
+import csv
+import os
+import threading
+
+from src.translation_client import RateLimiter, get_client
+from src.translator import SUPPORTED_LANGUAGES, translate_dict_fields, translate_many
+
+TRANSLATIONS_PATH = os.path.join(os.getcwd(), "scheme_translations.csv")
+TRANSLATED_FIELDS = ["scheme_name", "state_ministry", "description"]
+FIELDNAMES = ["lang", "source", "translated"]
+
+
+def load_scheme_translations(path: str = TRANSLATIONS_PATH) -> dict:
+    """Return {(lang, english text): translated text} from the side table."""
+    table = {}
+    if not os.path.exists(path):
+        return table
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            if row.get("translated"):
+                table[(row["lang"], row["source"])] = row["translated"]
+    return table
+
+
+SCHEME_TRANSLATIONS = load_scheme_translations()
+
+
+def localize_scheme(scheme: dict, fields: list, lang: str) -> dict:
+    """
+    Translate the given fields of a scheme dict, from the pre-translated table
+    where possible. Strings missing from the table are translated live in one batch.
+    """
+    if lang == "en":
+        return scheme
+
+    result = scheme.copy()
+    missing = []
+    for field in fields:
+        value = result.get(field)
+        if not isinstance(value, str):
+            continue
+        translated = SCHEME_TRANSLATIONS.get((lang, value))
+        if translated is not None:
+            result[field] = translated
+        else:
+            missing.append(field)
+
+    if missing:
+        result = translate_dict_fields(result, missing, lang)
+    return result
+
+
+def build_translations(scheme_df, langs: list, path: str = TRANSLATIONS_PATH,
+                       workers: int = 4, rate: float = 5.0, batch_size: int = 20):
+    """
+    Translate every distinct catalog string into each language and append the
+    results to the side table.
+
+    Resumable: (lang, source) pairs already in the table are skipped, and each
+    finished batch is flushed to disk immediately. Strings that come back
+    unchanged (failed or untranslatable) are not written, so a re-run retries them.
+
+    rate caps backend requests per second: the limiter is installed on the
+    shared translation client, so it also paces the per-segment fallback
+    requests translate_many makes inside a batch.
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    sources = []
+    seen = set()
+    for field in TRANSLATED_FIELDS:
+        for value in scheme_df[field].fillna("").astype(str):
+            value = value.strip()
+            if value and value not in seen:
+                seen.add(value)
+                sources.append(value)
+
+    done = load_scheme_translations(path)
+    jobs = []
+    for lang in langs:
+        todo = [s for s in sources if (lang, s) not in done]
+        for i in range(0, len(todo), batch_size):
+            jobs.append((lang, todo[i:i + batch_size]))
+
+    total = sum(len(batch) for _, batch in jobs)
+    print(f"[INFO] {len(sources)} catalog strings, {total} translations to do in {len(jobs)} batches")
+    if not jobs:
+        return
+
+    client = get_client()
+    previous_limiter = client.set_rate_limiter(RateLimiter(rate))
+    write_lock = threading.Lock()
+    new_file = not os.path.exists(path)
+    f = open(path, "a", encoding="utf-8", newline="")
+    writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+    if new_file:
+        writer.writeheader()
+
+    def run(lang, batch):
+        translated = translate_many(batch, lang)
+        rows = [
+            {"lang": lang, "source": src, "translated": out}
+            for src, out in zip(batch, translated)
+            if out and out != src
+        ]
+        with write_lock:
+            writer.writerows(rows)
+            f.flush()
+        return len(rows)
+
+    written = 0
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(run, lang, batch) for lang, batch in jobs]
+            for n, fut in enumerate(as_completed(futures), 1):
+                try:
+                    written += fut.result()
+                except Exception as e:
+                    print(f"[WARN] Translation batch failed: {e}")
+                if n % 20 == 0 or n == len(futures):
+                    print(f"[INFO] {n}/{len(futures)} batches, {written} translations written")
+    finally:
+        f.close()
+        client.set_rate_limiter(previous_limiter)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pre-translate the scheme catalog")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_build = sub.add_parser("build")
+    p_build.add_argument("--langs", default=",".join(l for l in SUPPORTED_LANGUAGES if l != "en"),
+                         help="comma-separated language codes")
+    p_build.add_argument("--out", default=TRANSLATIONS_PATH)
+    p_build.add_argument("--workers", type=int, default=4)
+    p_build.add_argument("--rate", type=float, default=5.0, help="max translation requests per second")
+    p_build.add_argument("--batch-size", type=int, default=20)
+    args = parser.parse_args()
+
+    from src.scheme_engine.engine import df as SCHEME_DF
+
+    build_translations(
+        SCHEME_DF,
+        [l.strip() for l in args.langs.split(",") if l.strip()],
+        path=args.out,
+        workers=args.workers,
+        rate=args.rate,
+        batch_size=args.batch_size,
+    )
@@ -0,0 +1,130 @@
+"""
+Fast local script/language detection from Unicode block statistics.
+
+Used to skip translation round trips that cannot change anything: a reply
+already written in the target script does not need translate_from_english,
+and an English message sent with lang="hi" does not need translate_to_english
+or the LLM translation fallback. Skip counts are kept in SKIP_METRICS.
+"""
+import re
+import threading
+
+# (first code point, last code point, script)
+SCRIPT_RANGES = [
+    (0x0041, 0x005A, "latin"),
+    (0x0061, 0x007A, "latin"),
+    (0x00C0, 0x024F, "latin"),
+    (0x0900, 0x097F, "devanagari"),
+    (0x0980, 0x09FF, "bengali"),
+    (0x0A00, 0x0A7F, "gurmukhi"),
+    (0x0A80, 0x0AFF, "gujarati"),
+    (0x0B80, 0x0BFF, "tamil"),
+    (0x0C00, 0x0C7F, "telugu"),
+    (0x0C80, 0x0CFF, "kannada"),
+    (0x0D00, 0x0D7F, "malayalam"),
+]
+
+LANG_SCRIPTS = {
+    "en": "latin",
+    "hi": "devanagari",
+    "mr": "devanagari",
+    "bn": "bengali",
+    "pa": "gurmukhi",
+    "gu": "gujarati",
+    "ta": "tamil",
+    "te": "telugu",
+    "kn": "kannada",
+    "ml": "malayalam",
+}
+
+# Frequent words of romanized Hindi/Bengali/Tamil/Telugu ("Hinglish" etc.);
+# Latin-script text containing them is not treated as English
+ROMANIZED_MARKERS = set("""
+hai hain ka ki ke kya kaise kyun kab kahan kitna kitne mujhe mera meri hum aap tum nahi nahin aur mein
+ko se kar karna karein chahiye wala wali raha rahi bhi abhi yeh woh kuch sab bahut accha theek
+ami tumi apni kemon ache koto kothay keno
+enna eppadi enga evlo illai
+ela emiti enti ekkada undi ledu
+""".split())
+
+_WORD_RE = re.compile(r"[a-z]+")
+
+
+def _script_of(ch: str):
+    cp = ord(ch)
+    for lo, hi, script in SCRIPT_RANGES:
+        if lo <= cp <= hi:
+            return script
+    return None
+
+
+def script_counts(text: str) -> dict:
+    """Count characters per script; digits, punctuation and spaces are ignored."""
+    counts = {}
+    for ch in text or "":
+        script = _script_of(ch)
+        if script:
+            counts[script] = counts.get(script, 0) + 1
+    return counts
+
+
+def detect_script(text: str, min_share: float = 0.6):
+    """Dominant script of the text, or None if it has no letters or is mixed."""
+    counts = script_counts(text)
+    total = sum(counts.values())
+    if not total:
+        return None
+    script, n = max(counts.items(), key=lambda kv: kv[1])
+    return script if n / total >= min_share else None
+
+
+def looks_english(text: str) -> bool:
+    """Latin-script text without romanized Indian-language marker words."""
+    if detect_script(text, min_share=0.9) != "latin":
+        return False
+    words = _WORD_RE.findall(text.lower())
+    if not words:
+        return False
+    markers = sum(1 for w in words if w in ROMANIZED_MARKERS)
+    return markers / len(words) < 0.15
+
+
+def is_in_language(text: str, lang: str) -> bool:
+    """
+    True when the text is already written in lang. Script-level for Indian
+    languages (Hindi and Marathi share Devanagari); English also rules out
+    romanized Indian-language text.
+    """
+    if lang == "en":
+        return looks_english(text)
+    script = LANG_SCRIPTS.get(lang)
+    return script is not None and detect_script(text) == script
+
+
+class SkipMetrics:
+    """Per-stage counters of how often a translation step was skipped."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def record(self, stage: str, skipped: bool):
+        with self._lock:
+            st = self._stages.setdefault(stage, {"checked": 0, "skipped": 0})
+            st["checked"] += 1
+            if skipped:
+                st["skipped"] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            out = {k: dict(v) for k, v in self._stages.items()}
+        for st in out.values():
+            st["skip_rate"] = round(st["skipped"] / st["checked"], 4) if st["checked"] else 0.0
+        return out
+
+    def clear(self):
+        with self._lock:
+            self._stages.clear()
+
+
+SKIP_METRICS = SkipMetrics()
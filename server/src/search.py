@@ -1,15 +1,26 @@
 # src/search.py
 import os
-import time
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import util
 from langchain_groq import ChatGroq
 
 from src.vectorstore import FaissVectorStore
+from src.encoder import load_encoder
+from src.intent_classifier import (
+    AgriIntentClassifier, ensure_classifier, ensure_thresholds, log_llm_decision, similarity_thresholds,
+)
 from src.utils import AGRI_REFERENCE_TEXTS
+from src.tracing import start_trace, span, record_llm_usage
+from src.llm_cache import CachedLLM, get_default_cache
+from src.translator import SUPPORTED_LANGUAGES
 
 load_dotenv()
 
+OUT_OF_SCOPE_REPLY = (
+    "This assistant specializes in agricultural and farm-related topics only. "
+    "Please ask questions about crops, soil, weather, fertilizers, or other farming-related subjects."
+)
+
 
 class RAGSearch:
     def __init__(
@@ -19,15 +30,29 @@ class RAGSearch:
         llm_model_name: str = "llama-3.1-8b-instant",
         vector_store=None,
         embedding_classifier_name: str = "all-MiniLM-L6-v2",
+        llm=None,
+        classifier_model=None,
+        intent_classifier=None,
+        llm_cache=None,
     ):
-        
+
         self.groq_api_key = os.getenv("GROQ_API_KEY", None)
         if not self.groq_api_key:
             print("[WARN] GROQ_API_KEY not set in environment. Set it in your .env file.")
 
         self.llm_model_name = llm_model_name
-        self.llm = ChatGroq(groq_api_key=self.groq_api_key, model_name=self.llm_model_name)
-        print(f"[INFO] Groq LLM initialized: {llm_model_name}")
+        if llm is not None:
+            print("[INFO] Using existing LLM instance")
+        else:
+            llm = ChatGroq(groq_api_key=self.groq_api_key, model_name=self.llm_model_name)
+            print(f"[INFO] Groq LLM initialized: {llm_model_name}")
+
+        # All prompts go through the persistent response cache (llm_cache=False disables it)
+        if llm_cache is None:
+            llm_cache = get_default_cache()
+        elif llm_cache is False:
+            llm_cache = None
+        self.llm = CachedLLM(llm, self.llm_model_name, llm_cache)
 
         if vector_store is not None:
             self.vectorstore = vector_store
@@ -46,13 +71,41 @@ class RAGSearch:
             print("[INFO] Loading FAISS index from disk...")
             self.vectorstore.load()
 
-        print("[INFO] Loading local embedding classifier model...")
-        self.classifier_model = SentenceTransformer(embedding_classifier_name)
+        if classifier_model is not None:
+            self.classifier_model = classifier_model
+        else:
+            print("[INFO] Loading local embedding classifier model...")
+            self.classifier_model = load_encoder(embedding_classifier_name)
+
+        # Reference embeddings are fixed, encode them once
+        self.ref_embs = self.classifier_model.encode(AGRI_REFERENCE_TEXTS, convert_to_tensor=True)
+
+        # Logistic regression over the same embeddings. A model loaded here
+        # gets one trained on first use (or retrained if the saved one is
+        # for another model); with an injected model only a saved one is used.
+        if intent_classifier is not None:
+            self.intent_classifier = intent_classifier
+        elif classifier_model is None:
+            self.intent_classifier = ensure_classifier(self.classifier_model, embedding_classifier_name)
+        else:
+            self.intent_classifier = AgriIntentClassifier.load()
+
+        # Use digests precomputed at index build time when the store has them
+        self.use_digests = os.getenv("RAG_USE_DIGESTS", "1") == "1"
 
         self.class_cache = {}
 
-        self.high_threshold = 0.40
-        self.low_threshold = 0.28
+        # Similarity scales differ between embedding models. A model loaded
+        # here is calibrated on first use; an injected one (tests,
+        # benchmarks) only uses configured thresholds.
+        if classifier_model is None:
+            self.low_threshold, self.high_threshold = ensure_thresholds(
+                self.classifier_model, embedding_classifier_name, AGRI_REFERENCE_TEXTS)
+        else:
+            self.low_threshold, self.high_threshold = similarity_thresholds(embedding_classifier_name)
+        if self.high_threshold is None:
+            print(f"[WARN] No similarity thresholds for {embedding_classifier_name}; every query not matched "
+                  f"by keyword goes to the intent classifier / LLM")
 
         self.quick_positive_keywords = [
             "crop", "soil", "fertilizer", "pest", "disease", "harvest", "irrigation", "yield",
@@ -64,88 +117,158 @@ class RAGSearch:
         q = query.lower()
         return any(kw in q for kw in self.quick_positive_keywords)
 
-    def _embedding_similarity_check(self, query: str) -> float:
+    def _embedding_similarity_check(self, query: str):
+        """Returns (max similarity to the reference texts, query embedding)."""
         q_emb = self.classifier_model.encode(query, convert_to_tensor=True)
-        ref_embs = self.classifier_model.encode(AGRI_REFERENCE_TEXTS, convert_to_tensor=True)
-        scores = util.cos_sim(q_emb, ref_embs)
-        return float(scores.max().item())
+        scores = util.cos_sim(q_emb, self.ref_embs)
+        return float(scores.max().item()), q_emb
 
-    def _llm_classify_agriculture(self, query: str) -> bool:
+    def _llm_classify_agriculture(self, query: str, log_text: str = None) -> bool:
+        """
+        LLM yes/no decision on query. The decision is logged for training the
+        local classifier against log_text, the text that was embedded.
+        """
         prompt = (
             "You are a precise classifier. Decide if the following question is related to "
             "agriculture, crops, soil, farming, irrigation, fertilizers, or livestock.\n\n"
             f"Question: {query}\n\n"
             "Respond with only one word: YES or NO."
         )
-        try:
-            resp = self.llm.invoke([prompt])
-            return resp.content.strip().upper() == "YES"
-        except Exception as e:
-            print(f"[WARN] LLM classifier failed: {e}")
-            return True
+        with span("llm_classify") as s:
+            try:
+                resp = self.llm.invoke([prompt], template="agri_classify")
+                record_llm_usage(s, resp)
+                is_agri = resp.content.strip().upper() == "YES"
+                s.set(result=is_agri)
+                log_llm_decision(query if log_text is None else log_text, is_agri)
+                return is_agri
+            except Exception as e:
+                print(f"[WARN] LLM classifier failed: {e}")
+                s.set(error=str(e))
+                return True
 
     def is_agriculture_query(self, query: str, chat_context: str = "") -> bool:
         q_key = query.lower().strip()
         combined_text = (chat_context + " " + q_key).lower()
 
-        if any(kw in combined_text for kw in self.quick_positive_keywords):
-            self.class_cache[q_key] = True
-            return True
-
-        if any(kw in chat_context.lower() for kw in self.quick_positive_keywords):
+        with span("keyword_check") as s:
+            keyword_hit = any(kw in combined_text for kw in self.quick_positive_keywords)
+            s.set(result=keyword_hit)
+        if keyword_hit:
             self.class_cache[q_key] = True
             return True
 
         if q_key in self.class_cache:
             return self.class_cache[q_key]
 
-        max_sim = self._embedding_similarity_check(combined_text)
-        if max_sim >= self.high_threshold:
+        with span("embedding_classify") as s:
+            max_sim, q_emb = self._embedding_similarity_check(combined_text)
+            s.set(max_similarity=round(max_sim, 4))
+        if self.high_threshold is not None and max_sim >= self.high_threshold:
             self.class_cache[q_key] = True
             return True
-        if max_sim <= self.low_threshold:
+        if self.low_threshold is not None and max_sim <= self.low_threshold:
             self.class_cache[q_key] = False
             return False
 
-        is_agri = self._llm_classify_agriculture(query)
+        if self.intent_classifier is not None:
+            with span("local_classify") as s:
+                decision, p = self.intent_classifier.decide(q_emb)
+                s.set(probability=round(p, 4), result=decision)
+            if decision is not None:
+                self.class_cache[q_key] = decision
+                return decision
+
+        # Last resort: the local classifier is missing or not confident enough
+        is_agri = self._llm_classify_agriculture(query, log_text=combined_text)
         self.class_cache[q_key] = is_agri
         return is_agri
 
 
-    def search_and_summarize(self, query: str, top_k: int = 5, chat_context: str = "") -> str:
+    def _out_of_scope_reply(self, answer_lang: str) -> str:
+        """
+        OUT_OF_SCOPE_REPLY in answer_lang, written by the LLM like every other
+        multilingual answer. The prompt is fixed per language, so it is served
+        from the response cache after the first time.
+        """
+        lang_name = SUPPORTED_LANGUAGES.get(answer_lang, answer_lang).title()
+        prompt = (
+            f"Translate the following text from English to {lang_name}. "
+            f"Output ONLY the translation, no extra text: {OUT_OF_SCOPE_REPLY}"
+        )
+        with span("out_of_scope_reply", lang=answer_lang) as s:
+            try:
+                resp = self.llm.invoke([prompt], template="out_of_scope")
+                record_llm_usage(s, resp)
+                return resp.content.strip() or OUT_OF_SCOPE_REPLY
+            except Exception as e:
+                print(f"[WARN] Out-of-scope reply in {lang_name} failed: {e}")
+                s.set(error=str(e))
+                return OUT_OF_SCOPE_REPLY
+
+    def search_and_summarize(self, query: str, top_k: int = 5, chat_context: str = "", filters: dict = None,
+                             answer_lang: str = None) -> str:
+        """
+        Answer a query with retrieval-augmented generation.
+
+        answer_lang makes the final LLM prompt answer directly in that language
+        (single-pass multilingual mode), so no translation round trips are needed.
+        """
+        with start_trace("rag", query_chars=len(query)):
+            return self._search_and_summarize(query, top_k=top_k, chat_context=chat_context, filters=filters,
+                                              answer_lang=answer_lang)
+
+    def _search_and_summarize(self, query: str, top_k: int, chat_context: str, filters: dict = None,
+                              answer_lang: str = None) -> str:
 
         print(f"[INFO] Received query: '{query}'")
 
+        lang_rule = ""
+        if answer_lang and answer_lang != "en":
+            lang_name = SUPPORTED_LANGUAGES.get(answer_lang, answer_lang).title()
+            lang_rule = f"Write the final answer in {lang_name} only, in natural {lang_name} script.\n"
+
         if not self.is_agriculture_query(query, chat_context=chat_context):
-            return (
-                "This assistant specializes in agricultural and farm-related topics only. "
-                "Please ask questions about crops, soil, weather, fertilizers, or other farming-related subjects."
-            )
+            if lang_rule:
+                return self._out_of_scope_reply(answer_lang)
+            return OUT_OF_SCOPE_REPLY
 
         print("[INFO] Classified as agriculture query. Searching FAISS index...")
-        start = time.time()
-        results = self.vectorstore.query(query, top_k=top_k)
-        print(f"[DEBUG] FAISS search took {time.time() - start:.2f}s, retrieved {len(results)} docs.")
+        with span("retrieval", top_k=top_k) as s:
+            if filters:
+                # Only the sharded store understands metadata filters
+                results = self.vectorstore.query(query, top_k=top_k, filters=filters)
+            else:
+                results = self.vectorstore.query(query, top_k=top_k)
+            s.set(results=len(results))
+        print(f"[DEBUG] FAISS search took {s.duration_ms / 1000:.2f}s, retrieved {len(results)} docs.")
 
-        texts = [r.get("metadata", {}).get("text", "") for r in results if r.get("metadata")]
-        texts = [t for t in texts if t.strip()]
+        hits = [r for r in results if r.get("metadata") and r["metadata"].get("text", "").strip()]
 
-        if texts:
+        if hits:
             chunk_summaries = []
-            for i, chunk in enumerate(texts):
+            for i, hit in enumerate(hits):
+                # Precomputed digests replace the per-chunk LLM map step
+                if self.use_digests and hit.get("digest"):
+                    chunk_summaries.append(hit["digest"])
+                    continue
+                chunk = hit["metadata"]["text"]
                 sub_prompt = (
                     f"You are an agricultural summarizer.\n"
                     f"User Question: {query}\n\n"
                     f"Relevant Text Chunk:\n{chunk}\n\n"
                     "Summarize this chunk in 1–2 concise sentences focusing on relevant details."
                 )
-                try:
-                    resp = self.llm.invoke([sub_prompt])
-                    summary = resp.content.strip()
-                    if summary:
-                        chunk_summaries.append(summary)
-                except Exception as e:
-                    print(f"[WARN] Chunk summarization failed for chunk {i}: {e}")
+                with span("chunk_summary", chunk=i, chunk_chars=len(chunk)) as s:
+                    try:
+                        resp = self.llm.invoke([sub_prompt], template="chunk_summary")
+                        record_llm_usage(s, resp)
+                        summary = resp.content.strip()
+                        if summary:
+                            chunk_summaries.append(summary)
+                    except Exception as e:
+                        print(f"[WARN] Chunk summarization failed for chunk {i}: {e}")
+                        s.set(error=str(e))
 
             combined_summary = "\n".join(chunk_summaries)
             final_prompt = (
@@ -154,29 +277,37 @@ class RAGSearch:
                 "Do NOT add any disclaimers such as checking other sources, websites, portals, or external updates.\n"
                 "Do NOT refer the user to external information. Always give the final answer directly.\n"
                 "If the user asks for detailed or long explanation, provide 4–6 sentences.\n"
-                "Otherwise, ALWAYS give a short, precise answer of 1–2 sentences.\n\n"
+                "Otherwise, ALWAYS give a short, precise answer of 1–2 sentences.\n"
+                f"{lang_rule}\n"
                 f"Conversation History:\n{chat_context}\n\n"
                 f"Retrieved Context Summaries:\n{combined_summary}\n\n"
                 f"User Question: {query}\n\n"
                 "Now produce the final answer following the rules above:"
             )
-            try:
-                final_resp = self.llm.invoke([final_prompt])
-                return final_resp.content.strip()
-            except Exception as e:
-                print(f"[ERROR] Final summarization failed: {e}")
-                return "Error generating final summary from data."
+            with span("final_answer", digests=sum(1 for h in hits if self.use_digests and h.get("digest"))) as s:
+                try:
+                    final_resp = self.llm.invoke([final_prompt], template="final_answer")
+                    record_llm_usage(s, final_resp)
+                    return final_resp.content.strip()
+                except Exception as e:
+                    print(f"[ERROR] Final summarization failed: {e}")
+                    s.set(error=str(e))
+                    return "Error generating final summary from data."
 
         print("[INFO] No relevant FAISS documents found. Using general agricultural knowledge.")
         fallback_prompt = (
             "You are an agricultural expert assistant. Use your own knowledge and previous conversation to answer.\n\n"
             f"Previous conversation:\n{chat_context}\n\n"
             f"User Question: {query}\n\n"
+            f"{lang_rule}"
             "Answer helpfully in 3–5 sentences:"
         )
-        try:
-            fallback_resp = self.llm.invoke([fallback_prompt])
-            return fallback_resp.content.strip()
-        except Exception as e:
-            print(f"[ERROR] General fallback failed: {e}")
-            return "Sorry, I couldn’t generate an answer right now."
+        with span("final_answer", fallback=True) as s:
+            try:
+                fallback_resp = self.llm.invoke([fallback_prompt], template="fallback_answer")
+                record_llm_usage(s, fallback_resp)
+                return fallback_resp.content.strip()
+            except Exception as e:
+                print(f"[ERROR] General fallback failed: {e}")
+                s.set(error=str(e))
+                return "Sorry, I couldn’t generate an answer right now."
@@ -0,0 +1,311 @@
+"""
+Long-lived, incrementally maintained seller index for /api/recommend.
+
+SellerIndex keeps every seller (users with role "seller") in memory together
+with a BM25 index over "fpcName district commodities address". It is loaded
+once, then kept current by:
+
+- upsert() from the request handlers that write sellers (/signUp);
+- a MongoDB change stream on the users collection, when the deployment
+  supports one (replica set / Atlas), otherwise periodic polling.
+
+IncrementalBM25 scores exactly like rank_bm25.BM25Okapi but supports adding
+and removing documents; only the idf table is refreshed lazily after a
+change, and queries only touch the postings of their own terms. The column
+arrays used for vectorized scoring (src/recommender.py) are likewise rebuilt
+lazily, on the first read after a change.
+"""
+import math
+import os
+import re
+import threading
+from collections import Counter
+
+from src.recommender import SellerColumns
+
+SELLER_INDEX_POLL_S = float(os.getenv("SELLER_INDEX_POLL_S", "60"))
+SELLER_INDEX_CHANGE_STREAM = os.getenv("SELLER_INDEX_CHANGE_STREAM", "1") == "1"
+
+
+def preprocess_text_for_bm25(text):
+    t = str(text or "").lower()
+    t = re.sub(r'[^a-z0-9\s]', ' ', t)
+    return [tok for tok in t.split() if tok]
+
+
+def is_seller(user: dict) -> bool:
+    return str(user.get("role") or "").lower() == "seller"
+
+
+def seller_from_user(s: dict) -> dict:
+    """Flatten a users document into the seller dict used by the recommender."""
+    seller = {
+        "_id": s.get("_id"),
+        "fpcName": s.get("fpcName") or s.get("fpc_name") or s.get("_id"),
+        "district": s.get("district", ""),
+        "state": s.get("state", ""),
+        "address": s.get("address", "") or s.get("Address", ""),
+        "contact_phone": s.get("contact_phone", "") or s.get("Contact_Phone", "")
+    }
+
+    comms = s.get("commodities", [])
+    if isinstance(comms, list):
+        seller["commodities"] = ", ".join([str(x) for x in comms if x])
+    else:
+        seller["commodities"] = str(comms)
+
+    try:
+        rating_value = s.get("rating") or s.get("Rating") or 5
+        seller["rating"] = float(rating_value)
+    except (TypeError, ValueError):
+        seller["rating"] = 5.0
+
+    try:
+        exp_value = s.get("experience") or s.get("years_of_experience") or 5
+        seller["years_of_experience"] = float(exp_value)
+    except (TypeError, ValueError):
+        seller["years_of_experience"] = 5.0
+
+    return seller
+
+
+def seller_tokens(seller: dict) -> list:
+    doc_text = (
+        f"{seller['fpcName']} {seller['district']} "
+        f"{seller['commodities']} {seller['address']}"
+    )
+    return preprocess_text_for_bm25(doc_text)
+
+
+class IncrementalBM25:
+    """BM25Okapi (k1=1.5, b=0.75, epsilon=0.25) over an inverted index with add/remove."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25):
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self.doc_freqs = {}
+        self.doc_len = {}
+        self.postings = {}
+        self.total_len = 0
+        self._idf = {}
+        self._idf_dirty = False
+
+    def __len__(self):
+        return len(self.doc_len)
+
+    def add(self, doc_id, tokens: list):
+        if doc_id in self.doc_len:
+            self.remove(doc_id)
+        freqs = Counter(tokens)
+        self.doc_freqs[doc_id] = freqs
+        self.doc_len[doc_id] = len(tokens)
+        self.total_len += len(tokens)
+        for term in freqs:
+            self.postings.setdefault(term, set()).add(doc_id)
+        self._idf_dirty = True
+
+    def remove(self, doc_id):
+        freqs = self.doc_freqs.pop(doc_id, None)
+        if freqs is None:
+            return
+        self.total_len -= self.doc_len.pop(doc_id)
+        for term in freqs:
+            docs = self.postings.get(term)
+            if docs is not None:
+                docs.discard(doc_id)
+                if not docs:
+                    del self.postings[term]
+        self._idf_dirty = True
+
+    def _refresh_idf(self):
+        n = len(self.doc_len)
+        idf = {}
+        idf_sum = 0.0
+        negative = []
+        for term, docs in self.postings.items():
+            value = math.log(n - len(docs) + 0.5) - math.log(len(docs) + 0.5)
+            idf[term] = value
+            idf_sum += value
+            if value < 0:
+                negative.append(term)
+        if idf:
+            eps = self.epsilon * (idf_sum / len(idf))
+            for term in negative:
+                idf[term] = eps
+        self._idf = idf
+        self._idf_dirty = False
+
+    def get_scores(self, query: list) -> dict:
+        """Scores for the documents containing at least one query term; others score 0."""
+        if not self.doc_len:
+            return {}
+        if self._idf_dirty:
+            self._refresh_idf()
+        avgdl = self.total_len / len(self.doc_len) or 1.0
+        scores = {}
+        for q in query:
+            idf = self._idf.get(q)
+            if not idf:
+                continue
+            for doc_id in self.postings.get(q, ()):
+                tf = self.doc_freqs[doc_id][q]
+                dl = self.doc_len[doc_id]
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * (
+                    tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * dl / avgdl))
+                )
+        return scores
+
+
+class SellerIndex:
+    """
+    In-memory sellers plus their BM25 index, shared by all request threads.
+    Reads take a consistent snapshot under a lock; writers are the request
+    handlers and the background sync thread.
+    """
+
+    def __init__(self, collection, poll_interval: float = SELLER_INDEX_POLL_S,
+                 use_change_stream: bool = SELLER_INDEX_CHANGE_STREAM):
+        self.collection = collection
+        self.poll_interval = poll_interval
+        self.use_change_stream = use_change_stream
+        self._lock = threading.RLock()
+        self._sellers = {}
+        self._bm25 = IncrementalBM25()
+        self._version = 0
+        self._columns = None
+        self._columns_version = -1
+        self._loaded = False
+        self._thread = None
+        self._stop = threading.Event()
+        self.sync_mode = None
+
+    # ---- writes ----
+
+    def upsert(self, user: dict):
+        """Apply a users document: index it if it is a seller, drop it otherwise."""
+        uid = user.get("_id")
+        if uid is None:
+            return
+        if not is_seller(user):
+            self.remove(uid)
+            return
+        seller = seller_from_user(user)
+        with self._lock:
+            self._sellers[uid] = seller
+            self._bm25.add(uid, seller_tokens(seller))
+            self._version += 1
+
+    def remove(self, uid):
+        with self._lock:
+            if self._sellers.pop(uid, None) is not None:
+                self._bm25.remove(uid)
+                self._version += 1
+
+    def load(self):
+        """Full (re)load from Mongo; also used by the polling fallback."""
+        users = list(self.collection.find({"role_key": "seller"}))
+        fresh = {u.get("_id"): u for u in users if u.get("_id") is not None}
+        with self._lock:
+            for uid in list(self._sellers):
+                if uid not in fresh:
+                    self.remove(uid)
+            for uid, user in fresh.items():
+                seller = seller_from_user(user)
+                if self._sellers.get(uid) != seller:
+                    self._sellers[uid] = seller
+                    self._bm25.add(uid, seller_tokens(seller))
+                    self._version += 1
+            self._loaded = True
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self.load()
+
+    # ---- reads ----
+
+    def sellers(self) -> list:
+        """Snapshot of all sellers (shared dicts; copy before mutating)."""
+        self._ensure_loaded()
+        with self._lock:
+            return list(self._sellers.values())
+
+    def columns(self) -> SellerColumns:
+        """Column arrays for vectorized scoring, rebuilt only after a change."""
+        self._ensure_loaded()
+        with self._lock:
+            if self._columns_version != self._version:
+                self._columns = SellerColumns(list(self._sellers.values()))
+                self._columns_version = self._version
+            return self._columns
+
+    def bm25_scores(self, tokens: list) -> dict:
+        self._ensure_loaded()
+        with self._lock:
+            return self._bm25.get_scores(tokens)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sellers)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sellers": len(self._sellers),
+                "terms": len(self._bm25.postings),
+                "loaded": self._loaded,
+                "sync_mode": self.sync_mode,
+            }
+
+    # ---- background sync ----
+
+    def start(self):
+        """Start the background sync thread (change stream, else polling)."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="seller-index-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        try:
+            self._ensure_loaded()
+        except Exception as e:
+            print(f"[WARN] Seller index initial load failed: {e}")
+
+        if self.use_change_stream and self._watch():
+            return
+        self._poll()
+
+    def _watch(self) -> bool:
+        """Follow the users change stream; returns False if streams are unsupported."""
+        try:
+            with self.collection.watch(full_document="updateLookup") as stream:
+                self.sync_mode = "change_stream"
+                print("[INFO] Seller index following users change stream")
+                # Catch writes that happened between the initial load and the watch
+                self.load()
+                for change in stream:
+                    if self._stop.is_set():
+                        return True
+                    op = change.get("operationType")
+                    if op in ("insert", "update", "replace") and change.get("fullDocument"):
+                        self.upsert(change["fullDocument"])
+                    elif op == "delete":
+                        self.remove(change.get("documentKey", {}).get("_id"))
+        except Exception as e:
+            print(f"[INFO] Seller index change stream unavailable ({e}); polling every {self.poll_interval}s")
+            return False
+        return True
+
+    def _poll(self):
+        self.sync_mode = "polling"
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.load()
+            except Exception as e:
+                print(f"[WARN] Seller index poll failed: {e}")
@@ -0,0 +1,219 @@
+"""
+Sharded vector store made of independent FAISS sub-indexes.
+
+Each shard is a regular FaissVectorStore persisted under
+<persist_dir>/<shard_name>/, and shards.json records the metadata used to
+route queries (e.g. {"state": "west bengal", "source": "wb_handbook"}).
+Queries are encoded once, fanned out to the selected shards in parallel and
+merged into a global top-k with a heap.
+
+Build every shard from the sub-directories of a data directory:
+    python -m src.sharded_store build --data-dir data
+Rebuild a single shard:
+    python -m src.sharded_store build --data-dir data --shard west_bengal
+
+A sub-directory may contain a shard.meta file (JSON) with the shard metadata; otherwise
+the directory name is used as the source. Files directly under the data
+directory go to a "common" shard that is never filtered out.
+"""
+import heapq
+import itertools
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import numpy as np
+
+from src.encoder import load_encoder
+from src.vectorstore import FaissVectorStore
+
+MANIFEST_FILE = "shards.json"
+COMMON_SHARD = "common"
+# Not .json, so the document loader does not index it
+SHARD_META_FILE = "shard.meta"
+
+
+class ShardedVectorStore:
+    def __init__(self, persist_dir: str = "faiss_shards", embedding_model: str = "all-MiniLM-L6-v2",
+                 chunk_size: int = 1000, chunk_overlap: int = 200, model=None, max_workers: int = None):
+        self.persist_dir = persist_dir
+        os.makedirs(self.persist_dir, exist_ok=True)
+        self.embedding_model = embedding_model
+        self.model = model if model is not None else load_encoder(embedding_model)
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.shards: Dict[str, FaissVectorStore] = {}
+        self.shard_meta: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers or min(8, (os.cpu_count() or 2)))
+
+    # ---------- persistence ----------
+    def _shard_dir(self, name: str) -> str:
+        return os.path.join(self.persist_dir, name)
+
+    def _new_shard(self, name: str) -> FaissVectorStore:
+        return FaissVectorStore(
+            self._shard_dir(name), self.embedding_model,
+            chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap, model=self.model,
+        )
+
+    def _read_manifest(self) -> dict:
+        path = os.path.join(self.persist_dir, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_manifest(self):
+        path = os.path.join(self.persist_dir, MANIFEST_FILE)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.shard_meta, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def build_shard(self, name: str, documents: List[Any], summarizer=None, **meta):
+        """Build (or rebuild) one shard from raw documents and persist it."""
+        shard = self._new_shard(name)
+        shard.build_from_documents(documents, summarizer=summarizer)
+        with self._lock:
+            self.shards[name] = shard
+            self.shard_meta[name] = {**meta, "vectors": int(shard.index.ntotal) if shard.index else 0}
+            self._write_manifest()
+        print(f"[INFO] Built shard '{name}' with {self.shard_meta[name]['vectors']} vectors")
+
+    def load_shard(self, name: str):
+        """Load or reload a single shard from disk without touching the others."""
+        manifest = self._read_manifest()
+        shard = self._new_shard(name)
+        shard.load()
+        with self._lock:
+            self.shards[name] = shard
+            self.shard_meta[name] = manifest.get(name, self.shard_meta.get(name, {}))
+        print(f"[INFO] Loaded shard '{name}'")
+
+    def drop_shard(self, name: str):
+        with self._lock:
+            self.shards.pop(name, None)
+            self.shard_meta.pop(name, None)
+            self._write_manifest()
+
+    def load(self):
+        manifest = self._read_manifest()
+        for name in manifest:
+            try:
+                self.load_shard(name)
+            except Exception as e:
+                print(f"[ERROR] Failed to load shard '{name}': {e}")
+        print(f"[INFO] Loaded {len(self.shards)} shards from {self.persist_dir}")
+
+    # ---------- search ----------
+    def select_shards(self, filters: dict = None) -> List[str]:
+        """
+        Names of the shards that can match filters. A shard is skipped only if
+        it declares a value for a filter key that differs from the requested one;
+        shards without that key (national or common content) are always kept.
+        """
+        with self._lock:
+            names = list(self.shards)
+            meta = dict(self.shard_meta)
+        if not filters:
+            return names
+
+        selected = []
+        for name in names:
+            m = meta.get(name, {})
+            ok = True
+            for key, wanted in filters.items():
+                if not wanted or key not in m:
+                    continue
+                have = m[key] if isinstance(m[key], list) else [m[key]]
+                if str(wanted).lower().strip() not in [str(h).lower().strip() for h in have]:
+                    ok = False
+                    break
+            if ok:
+                selected.append(name)
+        return selected
+
+    def _search_shard(self, name: str, query_embedding: np.ndarray, top_k: int):
+        shard = self.shards.get(name)
+        if shard is None or shard.index is None or shard.index.ntotal == 0:
+            return []
+        results = shard.search(query_embedding, top_k=top_k)
+        for r in results:
+            r["shard"] = name
+        return results
+
+    def search(self, query_embedding: np.ndarray, top_k: int = 5, filters: dict = None):
+        names = self.select_shards(filters)
+        if not names:
+            return []
+        if len(names) == 1:
+            partials = [self._search_shard(names[0], query_embedding, top_k)]
+        else:
+            futures = [self._pool.submit(self._search_shard, n, query_embedding, top_k) for n in names]
+            partials = [f.result() for f in futures]
+        # Each shard returns results sorted by distance, so a k-way heap merge suffices
+        merged = heapq.merge(*partials, key=lambda r: r["distance"])
+        return list(itertools.islice(merged, top_k))
+
+    def query(self, query_text: str, top_k: int = 5, filters: dict = None):
+        print(f"[INFO] Querying sharded vector store for: '{query_text}'")
+        query_emb = np.asarray(self.model.encode([query_text]), dtype="float32")
+        return self.search(query_emb, top_k=top_k, filters=filters)
+
+
+def discover_shards(data_dir: str) -> Dict[str, dict]:
+    """Map shard name -> (directory, metadata) for the sub-directories of data_dir."""
+    shards = {COMMON_SHARD: {"dir": data_dir, "recursive": False, "meta": {}}}
+    for entry in sorted(os.listdir(data_dir)):
+        path = os.path.join(data_dir, entry)
+        if not os.path.isdir(path):
+            continue
+        meta = {"source": entry}
+        meta_path = os.path.join(path, SHARD_META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta.update(json.load(f))
+        shards[entry] = {"dir": path, "recursive": True, "meta": meta}
+    return shards
+
+
+if __name__ == "__main__":
+    import argparse
+    from src.data_loader import load_all_documents
+
+    parser = argparse.ArgumentParser(description="Build or inspect the sharded vector store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_build = sub.add_parser("build")
+    p_build.add_argument("--data-dir", default="data")
+    p_build.add_argument("--persist-dir", default="faiss_shards")
+    p_build.add_argument("--shard", help="only (re)build this shard")
+    p_build.add_argument("--digests", choices=["extractive", "llm"], help="also precompute chunk digests")
+    p_query = sub.add_parser("query")
+    p_query.add_argument("text")
+    p_query.add_argument("--persist-dir", default="faiss_shards")
+    p_query.add_argument("--state")
+    p_query.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        from src.digests import get_summarizer
+        summarizer = get_summarizer(args.digests) if args.digests else None
+        store = ShardedVectorStore(args.persist_dir)
+        store.shard_meta = store._read_manifest()
+        for name, spec in discover_shards(args.data_dir).items():
+            if args.shard and name != args.shard:
+                continue
+            docs = load_all_documents(spec["dir"], recursive=spec["recursive"])
+            if not docs:
+                print(f"[INFO] Skipping empty shard '{name}'")
+                continue
+            store.build_shard(name, docs, summarizer=summarizer, **spec["meta"])
+    else:
+        store = ShardedVectorStore(args.persist_dir)
+        store.load()
+        filters = {"state": args.state} if args.state else None
+        for r in store.query(args.text, top_k=args.top_k, filters=filters):
+            print(r["shard"], round(float(r["distance"]), 4), (r["metadata"] or {}).get("text", "")[:120])
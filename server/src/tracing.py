@@ -0,0 +1,182 @@
+"""
+Per-stage latency tracing for the RAG chatbot pipeline.
+
+A trace groups the spans recorded while one chatbot request is processed.
+Spans carry their duration and, for LLM stages, token counts. Finished
+traces are kept in an in-process ring buffer (TRACE_COLLECTOR) so they can
+be inspected from the server or returned with a debug response.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+# Number of finished traces kept in memory
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "200"))
+
+_local = threading.local()
+
+
+class Span:
+    def __init__(self, name: str, attrs: dict = None):
+        self.name = name
+        self.attrs = dict(attrs or {})
+        self.start = time.perf_counter()
+        self.duration_ms = None
+
+    def set(self, **attrs):
+        """Attach extra attributes (token counts, sizes, decisions) to the span."""
+        self.attrs.update(attrs)
+
+    def finish(self):
+        self.duration_ms = (time.perf_counter() - self.start) * 1000.0
+
+    def to_dict(self, origin: float) -> dict:
+        return {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000.0, 3),
+            "duration_ms": round(self.duration_ms or 0.0, 3),
+            **self.attrs,
+        }
+
+
+class Trace:
+    def __init__(self, name: str, attrs: dict = None):
+        self.id = str(uuid.uuid4())
+        self.name = name
+        self.attrs = dict(attrs or {})
+        self.timestamp = time.time()
+        self.start = time.perf_counter()
+        self.duration_ms = None
+        self.spans = []
+
+    def finish(self):
+        self.duration_ms = (time.perf_counter() - self.start) * 1000.0
+
+    def to_dict(self) -> dict:
+        tokens = {"input_tokens": 0, "output_tokens": 0}
+        for s in self.spans:
+            tokens["input_tokens"] += s.attrs.get("input_tokens", 0) or 0
+            tokens["output_tokens"] += s.attrs.get("output_tokens", 0) or 0
+        duration = self.duration_ms
+        if duration is None:
+            duration = (time.perf_counter() - self.start) * 1000.0
+        return {
+            "id": self.id,
+            "name": self.name,
+            "timestamp": self.timestamp,
+            "duration_ms": round(duration, 3),
+            "llm_calls": sum(1 for s in self.spans if s.attrs.get("llm")),
+            **tokens,
+            **self.attrs,
+            "spans": [s.to_dict(self.start) for s in self.spans],
+        }
+
+
+class TraceCollector:
+    """Thread-safe ring buffer of finished traces."""
+
+    def __init__(self, maxlen: int = TRACE_BUFFER_SIZE):
+        self._traces = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def record(self, trace: Trace):
+        with self._lock:
+            self._traces.append(trace)
+
+    def recent(self, limit: int = 20) -> list:
+        with self._lock:
+            traces = list(self._traces)[-limit:] if limit > 0 else []
+        return [t.to_dict() for t in reversed(traces)]
+
+    def stage_summary(self) -> dict:
+        """Mean/max duration per span name over the buffered traces."""
+        with self._lock:
+            traces = list(self._traces)
+        stages = {}
+        for t in traces:
+            for s in t.spans:
+                st = stages.setdefault(s.name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+                d = s.duration_ms or 0.0
+                st["count"] += 1
+                st["total_ms"] += d
+                st["max_ms"] = max(st["max_ms"], d)
+        for st in stages.values():
+            st["mean_ms"] = round(st["total_ms"] / st["count"], 3)
+            st["total_ms"] = round(st["total_ms"], 3)
+            st["max_ms"] = round(st["max_ms"], 3)
+        return stages
+
+    def clear(self):
+        with self._lock:
+            self._traces.clear()
+
+
+TRACE_COLLECTOR = TraceCollector()
+
+
+def current_trace():
+    """Return the trace active on this thread, or None."""
+    return getattr(_local, "trace", None)
+
+
+@contextmanager
+def start_trace(name: str, **attrs):
+    """
+    Start a trace for the current thread.
+
+    If a trace is already active (e.g. /chatbot wraps search_and_summarize),
+    the existing trace is reused so all stages land in one place.
+    """
+    active = current_trace()
+    if active is not None:
+        yield active
+        return
+
+    trace = Trace(name, attrs)
+    _local.trace = trace
+    try:
+        yield trace
+    finally:
+        trace.finish()
+        _local.trace = None
+        TRACE_COLLECTOR.record(trace)
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    Time a pipeline stage. The span is attached to the active trace, if any;
+    outside a trace it is still timed but discarded.
+    """
+    s = Span(name, attrs)
+    try:
+        yield s
+    finally:
+        s.finish()
+        trace = current_trace()
+        if trace is not None:
+            trace.spans.append(s)
+
+
+def record_llm_usage(s: Span, resp):
+    """Copy token counts from a LangChain chat response onto a span."""
+    if (getattr(resp, "response_metadata", None) or {}).get("cache_hit"):
+        s.set(cache_hit=True)
+        return
+    s.set(llm=True)
+    usage = getattr(resp, "usage_metadata", None) or {}
+    if usage:
+        s.set(
+            input_tokens=usage.get("input_tokens", 0),
+            output_tokens=usage.get("output_tokens", 0),
+        )
+        return
+    meta = (getattr(resp, "response_metadata", None) or {}).get("token_usage") or {}
+    if meta:
+        s.set(
+            input_tokens=meta.get("prompt_tokens", 0),
+            output_tokens=meta.get("completion_tokens", 0),
+        )
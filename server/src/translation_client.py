@@ -0,0 +1,283 @@
+"""
+Translation backend client: connection reuse, per-call deadlines, bounded
+concurrency and a circuit breaker.
+
+src.translator goes through get_client() for every backend request. While
+the backend is failing, the breaker opens and calls fail immediately with
+CircuitOpenError, so callers fall back to the original text instead of
+stalling request threads on a dead upstream.
+
+TRANSLATION_BACKEND selects the backend: "google" (default) scrapes the same
+endpoint deep_translator uses, over pooled keep-alive connections; "local" is
+an offline stand-in for tests and benchmarks.
+"""
+import os
+import threading
+import time
+
+TRANSLATION_BACKEND = os.getenv("TRANSLATION_BACKEND", "google")
+TRANSLATION_TIMEOUT_S = float(os.getenv("TRANSLATION_TIMEOUT_S", "4"))
+TRANSLATION_MAX_CONCURRENCY = int(os.getenv("TRANSLATION_MAX_CONCURRENCY", "8"))
+TRANSLATION_BREAKER_FAILURES = int(os.getenv("TRANSLATION_BREAKER_FAILURES", "5"))
+TRANSLATION_BREAKER_RESET_S = float(os.getenv("TRANSLATION_BREAKER_RESET_S", "30"))
+
+GOOGLE_TRANSLATE_URL = "https://translate.google.com/m"
+
+
+class TranslationError(Exception):
+    pass
+
+
+class CircuitOpenError(TranslationError):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures. After reset_timeout
+    seconds one trial call is let through (half-open); its outcome closes
+    or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self.opened_count = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._trial_in_flight:
+                    self.opened_count += 1
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+def _language_code(lang: str) -> str:
+    """Accept either a code ('hi') or a deep_translator language name ('hindi')."""
+    from deep_translator.constants import GOOGLE_LANGUAGES_TO_CODES
+
+    return GOOGLE_LANGUAGES_TO_CODES.get(lang, lang)
+
+
+class GoogleBackend:
+    """Google Translate mobile endpoint over per-thread pooled sessions."""
+
+    name = "google"
+
+    def __init__(self, pool_size: int = TRANSLATION_MAX_CONCURRENCY):
+        self.pool_size = pool_size
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+            session.mount("https://", adapter)
+            self._local.session = session
+        return session
+
+    def translate(self, text: str, source: str, target: str, timeout: float) -> str:
+        from bs4 import BeautifulSoup
+
+        params = {"sl": _language_code(source), "tl": _language_code(target), "q": text.strip()}
+        try:
+            resp = self._session().get(GOOGLE_TRANSLATE_URL, params=params, timeout=timeout)
+        except Exception as e:
+            raise TranslationError(f"request failed: {e}") from e
+        if resp.status_code != 200:
+            raise TranslationError(f"HTTP {resp.status_code}")
+
+        soup = BeautifulSoup(resp.text, "html.parser")
+        element = soup.find("div", {"class": "t0"}) or soup.find("div", {"class": "result-container"})
+        if element is None:
+            raise TranslationError("translation not found in response")
+        return element.get_text(strip=True)
+
+
+class LocalBackend:
+    """
+    Offline stand-in backend. Texts found in `lookup` translate to the mapped
+    value; anything else is tagged "[target] text" line by line. `latency_ms`
+    simulates a slow upstream and `down=True` makes every call fail.
+    """
+
+    name = "local"
+
+    def __init__(self, latency_ms: float = 0.0, lookup: dict = None, down: bool = False):
+        self.latency_ms = latency_ms
+        self.lookup = dict(lookup or {})
+        self.down = down
+
+    def translate(self, text: str, source: str, target: str, timeout: float) -> str:
+        if self.latency_ms:
+            if self.latency_ms / 1000.0 > timeout:
+                time.sleep(timeout)
+                raise TranslationError("timed out")
+            time.sleep(self.latency_ms / 1000.0)
+        if self.down:
+            raise TranslationError("backend down")
+        if text in self.lookup:
+            return self.lookup[text]
+        code = _language_code(target)
+        return "\n".join(f"[{code}] {line}" if line.strip() else line for line in text.split("\n"))
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across all threads."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class TranslationClient:
+    """
+    Wraps a backend with a concurrency limit, per-call timeout and circuit
+    breaker. translate() raises TranslationError on any failure; callers
+    decide what to fall back to.
+
+    An optional RateLimiter paces every backend request (bulk jobs such as
+    the scheme catalog pre-translation); it is off for live traffic.
+    """
+
+    def __init__(self, backend, timeout: float = TRANSLATION_TIMEOUT_S,
+                 max_concurrency: int = TRANSLATION_MAX_CONCURRENCY, breaker: CircuitBreaker = None):
+        self.backend = backend
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker(TRANSLATION_BREAKER_FAILURES, TRANSLATION_BREAKER_RESET_S)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "failures": 0, "rejected_open": 0, "rejected_busy": 0}
+        self.rate_limiter = None
+
+    def _bump(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def set_rate_limiter(self, limiter):
+        """Install a RateLimiter (or None) for backend requests; returns the previous one."""
+        previous, self.rate_limiter = self.rate_limiter, limiter
+        return previous
+
+    def translate(self, text: str, source: str, target: str) -> str:
+        if not self.breaker.allow():
+            self._bump("rejected_open")
+            raise CircuitOpenError("translation backend circuit is open")
+
+        # Paced before taking a slot so a throttled caller does not hold one
+        limiter = self.rate_limiter
+        if limiter is not None:
+            limiter.wait()
+
+        # Waiting for a slot counts against the same deadline as the call itself
+        start = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            self._bump("rejected_busy")
+            self.breaker.record_failure()
+            raise TranslationError("no translation slot within the deadline")
+        try:
+            self._bump("calls")
+            remaining = max(self.timeout - (time.monotonic() - start), 0.1)
+            result = self.backend.translate(text, source, target, remaining)
+        except Exception as e:
+            self._bump("failures")
+            self.breaker.record_failure()
+            if isinstance(e, TranslationError):
+                raise
+            raise TranslationError(str(e)) from e
+        finally:
+            self._slots.release()
+
+        self.breaker.record_success()
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update({
+            "backend": self.backend.name,
+            "breaker": self.breaker.state,
+            "breaker_opened": self.breaker.opened_count,
+            "timeout_s": self.timeout,
+            "max_concurrency": self.max_concurrency,
+        })
+        return stats
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def make_backend(name: str = TRANSLATION_BACKEND):
+    if name == "local":
+        return LocalBackend()
+    return GoogleBackend()
+
+
+def get_client() -> TranslationClient:
+    """Process-wide client for the backend selected by TRANSLATION_BACKEND."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = TranslationClient(make_backend())
+    return _client
+
+
+def set_client(client: TranslationClient):
+    """Swap the process-wide client (tests and benchmarks)."""
+    global _client
+    with _client_lock:
+        _client = client
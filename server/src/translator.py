@@ -1,9 +1,22 @@
 """
-Translation utility with in-memory caching.
-Uses deep_translator (free Google Translate backend).
+Translation utility with a two-tier cache.
+Backend requests go through src.translation_client (Google Translate by
+default, with timeouts and a circuit breaker).
+
+Lookups go to a per-process LRU first, then to a SQLite store (WAL mode)
+shared by every worker on the host, so warm restarts and sibling workers
+reuse translations instead of calling Google Translate again. English to
+target translations are cached per sentence (see translate_many).
 """
-from functools import lru_cache
-from deep_translator import GoogleTranslator
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from src.kvstore import SqliteKVStore
+from src.script_detect import SKIP_METRICS, is_in_language
+from src.translation_client import CircuitOpenError, TranslationError, get_client
 
 # Supported languages
 SUPPORTED_LANGUAGES = {
@@ -19,30 +32,285 @@ SUPPORTED_LANGUAGES = {
     'pa': 'punjabi'
 }
 
-# Cache size limit
-CACHE_SIZE = 1000
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# In-process LRU size (per worker)
+CACHE_SIZE = int(os.getenv("TRANSLATION_MEMORY_CACHE_SIZE", "5000"))
+
+# Shared on-disk tier
+TRANSLATION_CACHE_ENABLED = os.getenv("TRANSLATION_CACHE_ENABLED", "1") == "1"
+TRANSLATION_CACHE_PATH = os.getenv("TRANSLATION_CACHE_PATH", os.path.join(BASE_DIR, "cache", "translations.sqlite3"))
+TRANSLATION_CACHE_MAX_ENTRIES = int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", "200000"))
+TRANSLATION_CACHE_TTL_DAYS = float(os.getenv("TRANSLATION_CACHE_TTL_DAYS", "30"))
+
+
+class _MemoryLRU:
+    """Thread-safe in-process LRU with hit/miss/eviction counters."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._data),
+                "max_entries": self.maxsize,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+_memory_cache = _MemoryLRU(CACHE_SIZE)
+_disk_cache = None
+_disk_cache_failed = False
+_disk_lock = threading.Lock()
+
+
+def _get_disk_cache():
+    global _disk_cache, _disk_cache_failed
+    if not TRANSLATION_CACHE_ENABLED or _disk_cache_failed:
+        return None
+    if _disk_cache is None:
+        with _disk_lock:
+            if _disk_cache is None and not _disk_cache_failed:
+                try:
+                    _disk_cache = SqliteKVStore(
+                        TRANSLATION_CACHE_PATH,
+                        table="translations",
+                        max_entries=TRANSLATION_CACHE_MAX_ENTRIES,
+                        ttl_seconds=TRANSLATION_CACHE_TTL_DAYS * 86400 if TRANSLATION_CACHE_TTL_DAYS > 0 else None,
+                    )
+                except Exception as e:
+                    print(f"[WARN] Translation cache unavailable: {e}")
+                    _disk_cache_failed = True
+    return _disk_cache
+
+
+def _cache_key(text: str, source: str, target: str) -> str:
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{source}:{target}:{digest}"
 
 
-@lru_cache(maxsize=CACHE_SIZE)
 def _cached_translate(text: str, source: str, target: str) -> str:
     """
     Internal cached translation function.
-    Cache key = (text, source, target)
+    Cache key = (sha256(text), source, target)
+
+    Failed translations (including timeouts and an open circuit) return the
+    input text and are not cached, so they are retried on a later request.
     """
     if not text or not text.strip():
         return text
     
     if source == target:
         return text
+
+    key = _cache_key(text, source, target)
+    cached = _memory_cache.get(key)
+    if cached is not None:
+        return cached
+
+    disk = _get_disk_cache()
+    if disk is not None:
+        cached = disk.get(key)
+        if cached is not None:
+            _memory_cache.set(key, cached)
+            return cached
     
     try:
-        translator = GoogleTranslator(source=source, target=target)
-        result = translator.translate(text)
-        return result if result else text
-    except Exception as e:
+        result = get_client().translate(text, source, target)
+    except CircuitOpenError:
+        return text
+    except TranslationError as e:
         print(f"Translation error: {e}")
         return text
 
+    if not result:
+        return text
+    _memory_cache.set(key, result)
+    if disk is not None:
+        disk.set(key, result)
+    return result
+
+
+# deep_translator rejects requests over 5000 characters
+BATCH_MAX_CHARS = 4500
+
+
+def _lookup_cached(keys: list) -> dict:
+    """Resolve keys from the memory tier, then the disk tier in one query."""
+    found = {}
+    missing = []
+    for key in keys:
+        value = _memory_cache.get(key)
+        if value is not None:
+            found[key] = value
+        else:
+            missing.append(key)
+
+    disk = _get_disk_cache()
+    if disk is not None and missing:
+        for key, value in disk.get_many(missing).items():
+            _memory_cache.set(key, value)
+            found[key] = value
+    return found
+
+
+def _translate_joined(texts: list, source: str, target: str) -> dict:
+    """
+    Translate single-line texts (sentence segments) in as few requests as
+    possible by joining them with newlines. Falls back to per-text requests for a group whose line
+    count does not survive the round trip.
+    """
+    results = {}
+    client = get_client()
+
+    groups, current, size = [], [], 0
+    for text in texts:
+        if current and size + len(text) + 1 > BATCH_MAX_CHARS:
+            groups.append(current)
+            current, size = [], 0
+        current.append(text)
+        size += len(text) + 1
+    if current:
+        groups.append(current)
+
+    for group in groups:
+        lines = None
+        try:
+            if len(group) > 1:
+                try:
+                    joined = client.translate("\n".join(group), source, target)
+                    lines = joined.split("\n") if joined else None
+                except CircuitOpenError:
+                    raise
+                except TranslationError as e:
+                    print(f"Translation error: {e}")
+            if lines is not None and len(lines) == len(group):
+                for text, line in zip(group, lines):
+                    if line.strip():
+                        results[text] = line.strip()
+                continue
+            for text in group:
+                try:
+                    result = client.translate(text, source, target)
+                except CircuitOpenError:
+                    raise
+                except TranslationError as e:
+                    print(f"Translation error: {e}")
+                    continue
+                if result:
+                    results[text] = result
+        except CircuitOpenError:
+            # Backend is down: return what we have, the rest stays untranslated
+            break
+    return results
+
+
+# Sentence boundary: terminator after a letter followed by a capital/quote,
+# a danda, or a line break. "1. " and "e.g. fertiliser" do not split.
+_BOUNDARY_RE = re.compile(r"(?<=[^\W\d_][.!?])[ \t]+(?=[A-Z\"'(\[])|(?<=[।॥])[ \t]+|[ \t]*\n\s*")
+
+
+def split_segments(text: str):
+    """
+    Split text into sentence segments and the separators between them, so
+    that text == seg0 + sep0 + seg1 + ... + segN.
+    """
+    segments, separators, pos = [], [], 0
+    for m in _BOUNDARY_RE.finditer(text):
+        segments.append(text[pos:m.start()])
+        separators.append(m.group(0))
+        pos = m.end()
+    segments.append(text[pos:])
+    return segments, separators
+
+
+def translate_many(texts: list, target_lang: str, source_lang: str = 'en') -> list:
+    """
+    Translate a list of strings, preserving order.
+
+    Each string is split into sentence segments, and the segments are what
+    get cached and translated, so boilerplate sentences shared across
+    answers and scheme descriptions are only translated once. Duplicate
+    segments are translated once, cached ones are served from the two-tier
+    cache, and the misses go to the backend batched into as few requests as
+    possible. A string with any segment that fails to translate is
+    returned unchanged as a whole (like translate_text on failure), never
+    as a mix of languages; the segments that did translate stay cached.
+    """
+    texts = list(texts)
+    if target_lang == source_lang or not texts:
+        return texts
+
+    target = SUPPORTED_LANGUAGES.get(target_lang, target_lang)
+    source = SUPPORTED_LANGUAGES.get(source_lang, source_lang)
+
+    split = {}
+    for t in texts:
+        if isinstance(t, str) and t.strip() and t not in split:
+            split[t] = split_segments(t)
+
+    unique = list(dict.fromkeys(
+        seg for segments, _ in split.values() for seg in segments if seg.strip()
+    ))
+    keys = {seg: _cache_key(seg, source, target) for seg in unique}
+    cached = _lookup_cached(list(keys.values()))
+    translated = {seg: cached[k] for seg, k in keys.items() if k in cached}
+
+    misses = [seg for seg in unique if seg not in translated]
+    if misses:
+        fresh = _translate_joined(misses, source, target)
+        new_items = []
+        for seg, result in fresh.items():
+            _memory_cache.set(keys[seg], result)
+            new_items.append((keys[seg], result))
+        disk = _get_disk_cache()
+        if disk is not None and new_items:
+            disk.set_many(new_items)
+        translated.update(fresh)
+
+    def reassemble(text):
+        segments, separators = split[text]
+        if any(seg.strip() and seg not in translated for seg in segments):
+            return text
+        parts = []
+        for i, seg in enumerate(segments):
+            parts.append(translated.get(seg, seg))
+            if i < len(separators):
+                parts.append(separators[i])
+        return "".join(parts)
+
+    return [reassemble(t) if t in split else t for t in texts]
+
 
 def translate_text(text: str, target_lang: str, source_lang: str = 'en') -> str:
     """
@@ -80,6 +348,12 @@ def translate_to_english(text: str, source_lang: str) -> str:
     """
     if not text or source_lang == 'en':
         return text
+
+    # Users often type English (Latin script) with a non-English UI language
+    already_english = is_in_language(text, 'en')
+    SKIP_METRICS.record("to_english", already_english)
+    if already_english:
+        return text
     
     source = SUPPORTED_LANGUAGES.get(source_lang, source_lang)
     return _cached_translate(text, source, 'english')
@@ -99,9 +373,14 @@ def translate_from_english(text: str, target_lang: str) -> str:
     """
     if not text or target_lang == 'en':
         return text
-    
-    target = SUPPORTED_LANGUAGES.get(target_lang, target_lang)
-    return _cached_translate(text, 'english', target)
+
+    already_target = is_in_language(text, target_lang)
+    SKIP_METRICS.record("from_english", already_target)
+    if already_target:
+        return text
+
+    # Sentence-segmented so long answers reuse cached sentences
+    return translate_many([text], target_lang)[0]
 
 
 def translate_dict_fields(data: dict, fields: list, target_lang: str) -> dict:
@@ -120,18 +399,28 @@ def translate_dict_fields(data: dict, fields: list, target_lang: str) -> dict:
         return data
     
     result = data.copy()
-    for field in fields:
-        if field in result and isinstance(result[field], str):
-            result[field] = translate_from_english(result[field], target_lang)
+    present = [f for f in fields if f in result and isinstance(result[f], str)]
+    translated = translate_many([result[f] for f in present], target_lang)
+    for field, value in zip(present, translated):
+        result[field] = value
     
     return result
 
 
-def get_cache_info():
-    """Get cache statistics."""
-    return _cached_translate.cache_info()
+def get_cache_info() -> dict:
+    """Get cache statistics for both tiers, plus backend client and breaker state."""
+    disk = _get_disk_cache()
+    return {
+        "memory": _memory_cache.stats(),
+        "disk": disk.stats() if disk is not None else None,
+        "backend": get_client().stats(),
+    }
 
 
-def clear_cache():
-    """Clear the translation cache."""
-    _cached_translate.cache_clear()
+def clear_cache(persistent: bool = False):
+    """Clear the in-process cache, and the shared on-disk cache if persistent=True."""
+    _memory_cache.clear()
+    if persistent:
+        disk = _get_disk_cache()
+        if disk is not None:
+            disk.clear()
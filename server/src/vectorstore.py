@@ -3,28 +3,36 @@ import faiss
 import numpy as np
 import pickle
 from typing import List, Any
-from sentence_transformers import SentenceTransformer
 from src.embedding import EmbeddingPipeline
+from src.encoder import load_encoder, MULTILINGUAL_EMBEDDING_MODEL
+from src.digests import build_digests, save_digests, load_digests, delete_digests
 
 class FaissVectorStore:
-    def __init__(self, persist_dir: str = "faiss_store", embedding_model: str = "all-MiniLM-L6-v2", chunk_size: int = 1000, chunk_overlap: int = 200):
+    def __init__(self, persist_dir: str = "faiss_store", embedding_model: str = "all-MiniLM-L6-v2", chunk_size: int = 1000, chunk_overlap: int = 200, model=None):
         self.persist_dir = persist_dir
         os.makedirs(self.persist_dir, exist_ok=True)
         self.index = None
         self.metadata = []
+        # Optional per-chunk digests aligned with metadata (see src/digests.py)
+        self.digests = None
         self.embedding_model = embedding_model
-        self.model = SentenceTransformer(embedding_model)
+        self.model = model if model is not None else load_encoder(embedding_model)
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         print(f"[INFO] Loaded embedding model: {embedding_model}")
 
-    def build_from_documents(self, documents: List[Any]):
+    def build_from_documents(self, documents: List[Any], summarizer=None):
         print(f"[INFO] Building vector store from {len(documents)} raw documents...")
-        emb_pipe = EmbeddingPipeline(model_name=self.embedding_model, chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap)
+        emb_pipe = EmbeddingPipeline(model_name=self.embedding_model, chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap, model=self.model)
         chunks = emb_pipe.chunk_documents(documents)
         embeddings = emb_pipe.embed_chunks(chunks)
-        metadatas = [{"text": chunk.page_content} for chunk in chunks]
+        # Keep loader metadata (source file, row ids) so answers can cite it
+        metadatas = [{**(chunk.metadata or {}), "text": chunk.page_content} for chunk in chunks]
         self.add_embeddings(np.array(embeddings).astype('float32'), metadatas)
+        # Digests of the previous chunks no longer apply
+        self.digests = None
+        if summarizer is not None:
+            self.digests = build_digests([m["text"] for m in self.metadata], summarizer)
         self.save()
         print(f"[INFO] Vector store built and saved to {self.persist_dir}")
 
@@ -43,6 +51,11 @@ class FaissVectorStore:
         faiss.write_index(self.index, faiss_path)
         with open(meta_path, "wb") as f:
             pickle.dump(self.metadata, f)
+        texts = [(m or {}).get("text", "") for m in self.metadata]
+        if self.digests is not None:
+            save_digests(self.persist_dir, self.digests, texts)
+        else:
+            delete_digests(self.persist_dir)
         print(f"[INFO] Saved Faiss index and metadata to {self.persist_dir}")
 
     def load(self):
@@ -51,14 +64,21 @@ class FaissVectorStore:
         self.index = faiss.read_index(faiss_path)
         with open(meta_path, "rb") as f:
             self.metadata = pickle.load(f)
+        self.digests = load_digests(self.persist_dir, [(m or {}).get("text", "") for m in self.metadata])
         print(f"[INFO] Loaded Faiss index and metadata from {self.persist_dir}")
 
     def search(self, query_embedding: np.ndarray, top_k: int = 5):
         D, I = self.index.search(query_embedding, top_k)
         results = []
         for idx, dist in zip(I[0], D[0]):
+            # FAISS pads with -1 when the index holds fewer than top_k vectors
+            if idx < 0:
+                continue
             meta = self.metadata[idx] if idx < len(self.metadata) else None
-            results.append({"index": idx, "distance": dist, "metadata": meta})
+            result = {"index": idx, "distance": dist, "metadata": meta}
+            if self.digests is not None and idx < len(self.digests) and self.digests[idx]:
+                result["digest"] = self.digests[idx]
+            results.append(result)
         return results
 
     def query(self, query_text: str, top_k: int = 5):
@@ -67,9 +87,23 @@ class FaissVectorStore:
         return self.search(query_emb, top_k=top_k)
 
 if __name__ == "__main__":
-    from data_loader import load_all_documents
-    docs = load_all_documents("data")
-    store = FaissVectorStore("faiss_store")
+    import argparse
+    from src.data_loader import load_all_documents
+
+    parser = argparse.ArgumentParser(description="Build the FAISS store from the data directory")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--persist-dir", default=None)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--multilingual", action="store_true",
+                        help="build faiss_store_multilingual with the multilingual embedding model")
+    args = parser.parse_args()
+
+    model_name, persist_dir = args.model, args.persist_dir or "faiss_store"
+    if args.multilingual:
+        model_name, persist_dir = MULTILINGUAL_EMBEDDING_MODEL, args.persist_dir or "faiss_store_multilingual"
+
+    docs = load_all_documents(args.data_dir)
+    store = FaissVectorStore(persist_dir, model_name)
     store.build_from_documents(docs)
     store.load()
-    print(store.query("What is attention mechanism?", top_k=3))
+    print(store.query("How much urea should I apply to paddy?", top_k=3))
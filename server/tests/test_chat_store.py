@@ -0,0 +1,52 @@
+"""
+Chat rooms deleted through one worker must not be served from another
+worker's cache.
+
+Run from the server directory:
+    python -m pytest -q tests
+"""
+import pytest
+
+from src.chat_store import ChatStore
+
+mongomock = pytest.importorskip("mongomock")
+
+
+@pytest.fixture
+def workers():
+    db = mongomock.MongoClient().db
+    return ChatStore(db.messages, db.chat_rooms), ChatStore(db.messages, db.chat_rooms)
+
+
+def test_delete_invalidates_other_workers(workers):
+    a, b = workers
+    for i in range(3):
+        a.send("farmer", "fpc", f"hello {i}", "farmer_fpc")
+    assert len(b.history("farmer_fpc")) == 3
+
+    a.delete_rooms(["farmer_fpc", "fpc_farmer"])
+    assert b.history("farmer_fpc") == []
+    assert a.history("farmer_fpc") == []
+
+
+def test_seq_stays_monotonic_after_delete(workers):
+    a, b = workers
+    first = a.send("farmer", "fpc", "before", "farmer_fpc")
+    a.delete_rooms(["farmer_fpc"])
+    b.history("farmer_fpc")
+
+    after = b.send("fpc", "farmer", "after", "farmer_fpc")
+    assert after["seq"] > first["seq"] + 1
+    # A client polling from before the delete gets the new message without a gap wait
+    assert [m["text"] for m in a.history("farmer_fpc", since=first["seq"])] == ["after"]
+    assert [m["text"] for m in b.history("farmer_fpc", since=first["seq"])] == ["after"]
+
+
+def test_empty_room_after_delete_stays_cached(workers):
+    a, b = workers
+    a.send("farmer", "fpc", "hi", "farmer_fpc")
+    a.delete_rooms(["farmer_fpc"])
+    b.history("farmer_fpc")
+    misses = b.misses
+    b.history("farmer_fpc")
+    assert b.misses == misses
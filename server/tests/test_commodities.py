@@ -0,0 +1,62 @@
+"""
+The commodity index must select every seller the old substring filter
+selected (crop in commodity text), on real registry commodity strings.
+
+Run from the server directory:
+    python -m pytest -q tests
+"""
+import csv
+import os
+
+from src.commodities import CommodityIndex, parse_commodities
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FPC_SAMPLE = os.path.join(BASE_DIR, "data", "FPC_sample_alipurduar.csv")
+
+COMPOUND = [
+    "Paddy and Vegetable",
+    "Vegetables",
+    "Paddy, Potato, Medicinal Plant and Vegetables",
+    "Paddy, Potato",
+    "Food Processing, Sale Vegetables, Nolen gur and Scented rice",
+    "Basumoti Rice Cultivation, Pototo, Input Supply and Marketing",
+]
+QUERIES = [
+    "paddy", "rice", "vegetables", "vegetable", "potato", "mustard", "honey", "chili",
+    "jaggery", "pulses", "processed vegetables", "gur", "nut", "seeds", "flower",
+]
+
+
+def _registry_commodities():
+    with open(FPC_SAMPLE, encoding="cp1252") as f:
+        return [row["Commodities"] for row in csv.DictReader(f)]
+
+
+def _baseline(texts, crop):
+    return {i for i, t in enumerate(texts) if crop in t.lower()}
+
+
+def _indexed(texts, crop):
+    index = CommodityIndex([parse_commodities(t) for t in texts])
+    return set(index.rows_for(crop).tolist())
+
+
+def test_parse_splits_compound_entries():
+    assert parse_commodities("Paddy and Vegetable") == ["rice", "vegetables"]
+    assert parse_commodities("Nolen gur and Scented rice") == ["nolen gur", "scented rice"]
+    assert parse_commodities(["Paddy & Jute", "Potato/Onion"]) == ["rice", "jute", "potato", "onion"]
+
+
+def test_compound_strings_match_substring_baseline():
+    for crop in ("paddy", "rice", "vegetables"):
+        assert _indexed(COMPOUND, crop) >= _baseline(COMPOUND, crop), crop
+    # Paddy and rice are the same canonical commodity
+    assert _indexed(COMPOUND, "paddy") == _indexed(COMPOUND, "rice") == {0, 2, 3, 4, 5}
+    assert _indexed(COMPOUND, "vegetables") == {0, 1, 2, 4}
+
+
+def test_registry_sample_matches_substring_baseline():
+    texts = _registry_commodities()
+    for crop in QUERIES:
+        missed = _baseline(texts, crop) - _indexed(texts, crop)
+        assert not missed, (crop, [texts[i] for i in sorted(missed)])
@@ -0,0 +1,55 @@
+"""
+FPC registry import: rows sharing an _id within one file are reported, not
+merged into one seller.
+
+Run from the server directory:
+    python -m pytest -q tests
+"""
+import os
+
+from src.fpc_import import import_sellers, iter_rows
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FPC_SAMPLE = os.path.join(BASE_DIR, "data", "FPC_sample_alipurduar.csv")
+
+
+def _row(name, district, reg_no=""):
+    return {"FPC_Name": name, "District": district, "Registration_No": reg_no, "Commodities": "Paddy"}
+
+
+class RecordingCollection:
+    def __init__(self):
+        self.ops = []
+
+    def bulk_write(self, ops, ordered=False):
+        self.ops.extend(ops)
+
+        class Result:
+            bulk_api_result = {"nUpserted": len(ops), "nModified": 0, "nMatched": 0}
+        return Result()
+
+
+def test_duplicate_registration_no_is_rejected():
+    rows = [
+        _row("Masmad Farmer Producer Company Ltd", "Bankura", "U01400WB2019PTC231850"),
+        _row("Other FPC", "Bankura", "U01400WB2020PTC000001"),
+        _row("Masmad Farmers Producer Company Ltd", "Bankura", "U01400WB2019PTC231850"),
+    ]
+    collection = RecordingCollection()
+    report = import_sellers(rows, collection, "West Bengal", batch_size=1)
+
+    assert report["valid"] == 2
+    assert report["rejected"] == {"duplicate_in_file": 1}
+    assert report["duplicate_ids"] == ["fpcu01400wb2019ptc231850"]
+    # The first row is written and the repeat is not
+    first = collection.ops[0]._doc["$set"]
+    assert first["fpcName"] == "Masmad Farmer Producer Company Ltd"
+    assert len(collection.ops) == 2
+
+
+def test_bundled_sample_reports_its_duplicate():
+    report = import_sellers(iter_rows(FPC_SAMPLE), None, "West Bengal", dry_run=True)
+    assert report["rows"] == 44
+    assert report["valid"] == 43
+    assert report["rejected"] == {"duplicate_in_file": 1}
+    assert report["duplicate_ids"] == ["fpcu01400wb2019ptc231850"]
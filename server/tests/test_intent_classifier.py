@@ -0,0 +1,45 @@
+"""
+The intent classifier is trained and saved on first startup when none
+exists for the embedding model.
+
+Run from the server directory:
+    python -m pytest -q tests
+"""
+import os
+
+from benchmarks.fakes import HashingEncoder
+from src import intent_classifier
+from src.intent_classifier import AgriIntentClassifier, classifier_path, ensure_classifier
+
+
+def test_trains_and_saves_when_missing(tmp_path):
+    path = str(tmp_path / "agri_intent.pkl")
+    classifier = ensure_classifier(HashingEncoder(), "all-MiniLM-L6-v2", path)
+
+    assert classifier is not None and classifier.model_name == "all-MiniLM-L6-v2"
+    assert os.path.exists(path)
+    assert AgriIntentClassifier.load(path).model_name == "all-MiniLM-L6-v2"
+
+
+def test_reuses_saved_classifier(tmp_path, monkeypatch):
+    path = str(tmp_path / "agri_intent.pkl")
+    ensure_classifier(HashingEncoder(), "all-MiniLM-L6-v2", path)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("retrained a matching classifier")
+    monkeypatch.setattr(intent_classifier, "train", fail)
+    assert ensure_classifier(HashingEncoder(), "all-MiniLM-L6-v2", path) is not None
+
+
+def test_retrains_classifier_of_another_model(tmp_path):
+    path = str(tmp_path / "agri_intent.pkl")
+    ensure_classifier(HashingEncoder(), "all-MiniLM-L6-v2", path)
+    classifier = ensure_classifier(HashingEncoder(), "paraphrase-multilingual-MiniLM-L12-v2", path)
+    assert classifier.model_name == "paraphrase-multilingual-MiniLM-L12-v2"
+
+
+def test_classifier_path_per_model():
+    assert classifier_path("all-MiniLM-L6-v2") == intent_classifier.MODEL_PATH
+    other = classifier_path("sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+    assert other != intent_classifier.MODEL_PATH
+    assert os.path.dirname(other) == os.path.dirname(intent_classifier.MODEL_PATH)
@@ -0,0 +1,41 @@
+"""
+SqliteKVStore keeps LRU order on batched lookups too.
+
+Run from the server directory:
+    python -m pytest -q tests
+"""
+import time
+
+from src.kvstore import _TOUCH_INTERVAL, SqliteKVStore
+
+
+def _accessed(store, key):
+    return store._conn().execute(
+        f"SELECT accessed FROM {store.table} WHERE key = ?", (key,)
+    ).fetchone()[0]
+
+
+def test_get_many_refreshes_stale_access_times(tmp_path):
+    store = SqliteKVStore(str(tmp_path / "kv.sqlite"))
+    store.set_many([("a", "1"), ("b", "2"), ("c", "3")])
+    stale = time.time() - 2 * _TOUCH_INTERVAL
+    store._conn().execute(f"UPDATE {store.table} SET accessed = ?", (stale,))
+    store._conn().commit()
+
+    assert store.get_many(["a", "b", "missing"]) == {"a": "1", "b": "2"}
+    assert _accessed(store, "a") > stale
+    assert _accessed(store, "b") > stale
+    assert _accessed(store, "c") == stale
+
+
+def test_get_many_keeps_hits_out_of_lru_eviction(tmp_path):
+    store = SqliteKVStore(str(tmp_path / "kv.sqlite"), max_entries=10, evict_check_every=10**6)
+    store.set_many([(f"k{i}", str(i)) for i in range(12)])
+    stale = time.time() - 2 * _TOUCH_INTERVAL
+    store._conn().execute(f"UPDATE {store.table} SET accessed = ?", (stale,))
+    store._conn().commit()
+
+    store.get_many(["k0", "k1"])
+    store.evict()
+    assert store.get_many(["k0", "k1"]) == {"k0": "0", "k1": "1"}
+    assert len(store) == 9